@@ -10,68 +10,219 @@ Nota: pensado para ejecutarse en Windows PowerShell.
 """
 import argparse
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from faker import Faker
 import random
 
-fake = Faker()
+from output_formats import (DEFAULT_ROW_GROUP_ROWS, FORMATS, TableWriter, output_file, to_arrow,
+                            write_frame)
+from perf_utils import peak_rss_mb
+from text_pool import DEFAULT_POOL_SIZE, TextPool
 
+# filas por shard/bloque de escritura cuando no se indica --chunk-rows
+DEFAULT_CHUNK_ROWS = 100_000
 
-def augment_ventas(path, out_path, multiplier=10):
+# distribución de 'cantidad' por venta (50/30/10/7/3)
+VENTAS_CANTIDADES = np.array([1, 2, 3, 4, 5])
+VENTAS_PESOS = np.array([50, 30, 10, 7, 3]) / 100
+
+# desviaciones usadas al muestrear clima alrededor de las medias
+CLIMA_TEMP_SIGMA = 3
+CLIMA_HUM_SIGMA = 5
+
+OPINIONES_TEXTOS = [
+    "Me gusta este curso",
+    "Aprendiendo SQL",
+    "Pandas me confunde",
+    "Buscando trabajo en data",
+    "Hoy hice un pipeline",
+    "La nube es increíble",
+    "Necesito practicar joins",
+    "Aprendiendo sobre ETL",
+    "Modelando datos con Python",
+    "Debugging y tests"
+]
+
+
+def _random_dates(rng, start, end, n):
+    # fechas uniformes en [start, end] (ambos inclusive) como strings '%Y-%m-%d'
+    start = np.datetime64(pd.Timestamp(start).date(), 'D')
+    end = np.datetime64(pd.Timestamp(end).date(), 'D')
+    span = int((end - start).astype(int)) + 1
+    offsets = rng.integers(0, span, size=n)
+    return (start + offsets).astype(str)
+
+
+def _mostly_known(rng, known, n, new_max, n_new=3):
+    # equivalente vectorizado de random.choice(known + [n_new enteros nuevos en 1..new_max])
+    known = np.asarray(known)
+    idx = rng.integers(0, len(known) + n_new, size=n)
+    out = rng.integers(1, new_max + 1, size=n).astype(known.dtype, copy=False)
+    is_known = idx < len(known)
+    out[is_known] = known[idx[is_known]]
+    return out
+
+
+def _run_shard(task):
+    """Genera un shard y lo devuelve ya formateado: texto CSV sin cabecera o tabla Arrow."""
+    synth, entropy, shard_idx, offset, n, params, columns, fmt = task
+    # semilla hija que depende solo de (seed, shard), no del número de workers
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(shard_idx,)))
+    chunk = synth(rng, n, offset, **params)
+    chunk.columns = columns
+    if fmt == 'csv':
+        return chunk.to_csv(header=False, index=False)
+    return to_arrow(chunk)
+
+
+def _ordered_results(tasks, workers):
+    # resultados en orden de shard; como mucho 2*workers shards en vuelo
+    if workers <= 1:
+        for task in tasks:
+            yield _run_shard(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_run_shard, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_augmented(df, out_file, n_new, synth, params, seed=None, chunk_rows=None, workers=1,
+                    fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """
+    Escribe el original seguido de n_new filas sintéticas y devuelve el shape final.
+    synth(rng, n, offset, **params) genera las filas [offset, offset + n) del rango
+    sintético. El rango se parte en shards de chunk_rows filas, cada uno con su
+    propia semilla hija de `seed`, y se añaden a la salida en orden: la memoria
+    depende del tamaño de shard y, a igual seed y chunk_rows, el archivo es
+    idéntico byte a byte con cualquier número de workers.
+    """
+    chunk_rows = DEFAULT_CHUNK_ROWS if chunk_rows is None else chunk_rows
+    if chunk_rows < 1:
+        raise ValueError(f"chunk_rows debe ser positivo: {chunk_rows}")
+    entropy = np.random.SeedSequence(seed).entropy
+    tasks = (
+        (synth, entropy, shard_idx, offset, min(chunk_rows, n_new - offset), params, df.columns, fmt)
+        for shard_idx, offset in enumerate(range(0, n_new, chunk_rows))
+    )
+
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == 'csv':
+        df.to_csv(out_file, index=False)
+        with open(out_file, 'a', newline='', encoding='utf-8') as f:
+            for text in _ordered_results(tasks, workers):
+                f.write(text)
+    else:
+        with TableWriter(out_file, fmt, compression=compression, row_group_rows=row_group_rows) as writer:
+            writer.write(df)
+            for table in _ordered_results(tasks, workers):
+                writer.write(table)
+    return (len(df) + n_new, df.shape[1])
+
+
+def synth_ventas(rng, n, offset, max_id, clients, products, start, end):
+    """Genera n ventas sintéticas como arrays; venta_id sigue a max_id + offset."""
+    start_id = max_id + offset
+    return pd.DataFrame({
+        'venta_id': np.arange(start_id + 1, start_id + n + 1, dtype=np.int64),
+        'cliente_id': _mostly_known(rng, clients, n, new_max=1000),
+        'producto_id': _mostly_known(rng, products, n, new_max=500),
+        'fecha': _random_dates(rng, start, end, n),
+        'cantidad': rng.choice(VENTAS_CANTIDADES, size=n, p=VENTAS_PESOS),
+    })
+
+
+def augment_ventas(path, out_path, multiplier=10, seed=None, chunk_rows=None, workers=1,
+                   fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
     df = pd.read_csv(path)
     # suposiciones: columnas ['venta_id','cliente_id','producto_id','fecha','cantidad']
     max_id = df['venta_id'].max()
-    clients = df['cliente_id'].unique().tolist()
-    products = df['producto_id'].unique().tolist()
+    clients = df['cliente_id'].unique()
+    products = df['producto_id'].unique()
     dates = pd.to_datetime(df['fecha'])
     start = dates.min()
     end = dates.max()
 
-    rows = []
-    for i in range(len(df) * multiplier):
-        max_id += 1
-        cliente = random.choice(clients + [fake.random_int(min=1, max=1000) for _ in range(3)])
-        producto = random.choice(products + [fake.random_int(min=1, max=500) for _ in range(3)])
-        fecha = fake.date_between(start_date=start, end_date=end)
-        cantidad = random.choices([1,2,3,4,5], weights=[50,30,10,7,3])[0]
-        rows.append([max_id, cliente, producto, fecha.strftime('%Y-%m-%d'), cantidad])
+    out_file = output_file(out_path, 'proyecto1_ventas_augmented', fmt)
+    shape = write_augmented(
+        df, out_file, len(df) * multiplier,
+        synth_ventas,
+        dict(max_id=max_id, clients=clients, products=products, start=start, end=end),
+        seed=seed, chunk_rows=chunk_rows, workers=workers,
+        fmt=fmt, compression=compression, row_group_rows=row_group_rows,
+    )
+    print(f"Ventas ampliadas: {shape} -> {out_file}")
+
+
+def clima_stats(df):
+    """Tabla por ciudad con la media de temp_c (se calcula una sola vez en vez de filtrar por fila)."""
+    return df.groupby('ciudad', sort=False).agg(temp_mean=('temp_c', 'mean'))
+
 
-    df_new = pd.DataFrame(rows, columns=df.columns)
-    df_out = pd.concat([df, df_new], ignore_index=True)
-    out_path.mkdir(parents=True, exist_ok=True)
-    out_file = out_path / 'proyecto1_ventas_augmented.csv'
-    df_out.to_csv(out_file, index=False)
-    print(f"Ventas ampliadas: {df_out.shape} -> {out_file}")
+def synth_clima(rng, n, offset, stats, hum_mean, start, end):
+    """Genera n filas de clima; temp ~ N(media ciudad, 3), humedad ~ N(media global, 5)."""
+    fechas = _random_dates(rng, start, end, n)
+    city_idx = rng.integers(0, len(stats), size=n)
+    temp = rng.normal(stats['temp_mean'].to_numpy()[city_idx], CLIMA_TEMP_SIGMA)
+    humedad = rng.normal(hum_mean, CLIMA_HUM_SIGMA, size=n)
+    # mismo truncado que int() y mismo recorte [0, 100] que la versión fila a fila
+    return pd.DataFrame({
+        'fecha': fechas,
+        'ciudad': stats.index.to_numpy()[city_idx],
+        'temp_c': np.trunc(temp).astype(np.int64),
+        'humedad': np.clip(np.trunc(humedad), 0, 100).astype(np.int64),
+    })
 
 
-def augment_clima(path, out_path, multiplier=10):
+def augment_clima(path, out_path, multiplier=10, seed=None, chunk_rows=None, workers=1,
+                  fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
     df = pd.read_csv(path)
     # columnas: ['fecha','ciudad','temp_c','humedad']
-    cities = df['ciudad'].unique().tolist()
+    stats = clima_stats(df)
+    hum_mean = df['humedad'].mean()
     dates = pd.to_datetime(df['fecha'])
     start = dates.min()
     end = dates.max()
 
-    rows = []
-    for i in range(len(df) * multiplier):
-        fecha = fake.date_between(start_date=start, end_date=end)
-        ciudad = random.choice(cities)
-        # sample temperature around city mean
-        city_mean = df[df['ciudad'] == ciudad]['temp_c'].mean()
-        temp = int(random.gauss(mu=city_mean, sigma=3))
-        humedad = int(random.gauss(mu=df['humedad'].mean(), sigma=5))
-        rows.append([fecha.strftime('%Y-%m-%d'), ciudad, temp, max(0, min(100, humedad))])
-
-    df_new = pd.DataFrame(rows, columns=df.columns)
-    df_out = pd.concat([df, df_new], ignore_index=True)
-    out_path.mkdir(parents=True, exist_ok=True)
-    out_file = out_path / 'proyecto2_clima_augmented.csv'
-    df_out.to_csv(out_file, index=False)
-    print(f"Clima ampliado: {df_out.shape} -> {out_file}")
-
-
-def augment_opiniones(path, out_path, multiplier=10):
+    out_file = output_file(out_path, 'proyecto2_clima_augmented', fmt)
+    shape = write_augmented(
+        df, out_file, len(df) * multiplier,
+        synth_clima,
+        dict(stats=stats, hum_mean=hum_mean, start=start, end=end),
+        seed=seed, chunk_rows=chunk_rows, workers=workers,
+        fmt=fmt, compression=compression, row_group_rows=row_group_rows,
+    )
+    print(f"Clima ampliado: {shape} -> {out_file}")
+
+
+def synth_opiniones(rng, n, offset, max_id, users, text_pool, start, end):
+    """Genera n opiniones sintéticas; tweet_id sigue a max_id + offset."""
+    start_id = max_id + offset
+    # usuario conocido o, con probabilidad 1/(len(users)+1), uno nuevo del pool
+    users = np.asarray(users, dtype=object)
+    user_idx = rng.integers(0, len(users) + 1, size=n)
+    usuarios = text_pool.sample_user_names(rng, n)
+    is_known = user_idx < len(users)
+    usuarios[is_known] = users[user_idx[is_known]]
+    return pd.DataFrame({
+        'tweet_id': np.arange(start_id + 1, start_id + n + 1, dtype=np.int64),
+        'usuario': usuarios,
+        'texto': text_pool.compose(rng, n, OPINIONES_TEXTOS),
+        'fecha': _random_dates(rng, start, end, n),
+    })
+
+
+def augment_opiniones(path, out_path, multiplier=10, seed=None, chunk_rows=None, workers=1,
+                      text_pool_size=DEFAULT_POOL_SIZE, fmt='csv', compression=None,
+                      row_group_rows=DEFAULT_ROW_GROUP_ROWS):
     df = pd.read_csv(path)
     # columnas: ['tweet_id','usuario','texto','fecha']
     users = df['usuario'].unique().tolist()
@@ -79,34 +230,26 @@ def augment_opiniones(path, out_path, multiplier=10):
     start = dates.min()
     end = dates.max()
 
-    sample_texts = [
-        "Me gusta este curso",
-        "Aprendiendo SQL",
-        "Pandas me confunde",
-        "Buscando trabajo en data",
-        "Hoy hice un pipeline",
-        "La nube es increíble",
-        "Necesito practicar joins",
-        "Aprendiendo sobre ETL",
-        "Modelando datos con Python",
-        "Debugging y tests"
-    ]
-
-    rows = []
     max_id = df['tweet_id'].max()
-    for i in range(len(df) * multiplier):
-        max_id += 1
-        usuario = random.choice(users + [fake.user_name()])
-        texto = random.choice(sample_texts) + ' ' + fake.sentence(nb_words=6)
-        fecha = fake.date_between(start_date=start, end_date=end)
-        rows.append([max_id, usuario, texto, fecha.strftime('%Y-%m-%d')])
+    # el pool se arma una vez aquí y viaja igual a todos los shards
+    text_pool = TextPool(pool_size=text_pool_size, seed=seed)
+    out_file = output_file(out_path, 'proyecto3_opiniones_augmented', fmt)
+    shape = write_augmented(
+        df, out_file, len(df) * multiplier,
+        synth_opiniones,
+        dict(max_id=max_id, users=users, text_pool=text_pool, start=start, end=end),
+        seed=seed, chunk_rows=chunk_rows, workers=workers,
+        fmt=fmt, compression=compression, row_group_rows=row_group_rows,
+    )
+    print(f"Opiniones ampliadas: {shape} -> {out_file}")
+
 
-    df_new = pd.DataFrame(rows, columns=df.columns)
-    df_out = pd.concat([df, df_new], ignore_index=True)
-    out_path.mkdir(parents=True, exist_ok=True)
-    out_file = out_path / 'proyecto3_opiniones_augmented.csv'
-    df_out.to_csv(out_file, index=False)
-    print(f"Opiniones ampliadas: {df_out.shape} -> {out_file}")
+def positive_int(value):
+    """Tipo de argparse para enteros >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero positivo: {value}")
+    return number
 
 
 def main():
@@ -116,6 +259,12 @@ def main():
     parser.add_argument('--n-multiplier', type=int, required=False, default=10, help='Multiplicador de tamaño (entero)')
     parser.add_argument('--method', type=str, required=False, default='faker', choices=['faker', 'sdv'], help='Método para generar datos: faker o sdv')
     parser.add_argument('--seed', type=int, required=False, default=None, help='Semilla opcional para reproducibilidad')
+    parser.add_argument('--chunk-rows', type=positive_int, required=False, default=DEFAULT_CHUNK_ROWS, help=f'Filas por shard/bloque de escritura (default: {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--workers', type=positive_int, required=False, default=1, help='Procesos para generar shards en paralelo (no cambia la salida)')
+    parser.add_argument('--text-pool-size', type=int, required=False, default=DEFAULT_POOL_SIZE, help=f'Frases/usuarios pre-generados para opiniones (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--format', type=str, required=False, default='csv', choices=FORMATS, help='Formato de salida (parquet/feather con esquema tipado)')
+    parser.add_argument('--compression', type=str, required=False, default=None, help='Compresión parquet/feather (default: snappy / lz4)')
+    parser.add_argument('--row-group-rows', type=int, required=False, default=DEFAULT_ROW_GROUP_ROWS, help=f'Filas por row group en parquet (default: {DEFAULT_ROW_GROUP_ROWS})')
     args = parser.parse_args()
 
     base_dir = Path(args.dir)
@@ -123,6 +272,8 @@ def main():
     if args.seed is not None:
         Faker.seed(args.seed)
         random.seed(args.seed)
+    output = dict(fmt=args.format, compression=args.compression, row_group_rows=args.row_group_rows)
+    opts = dict(multiplier=args.n_multiplier, seed=args.seed, chunk_rows=args.chunk_rows, workers=args.workers, **output)
 
     # paths esperados
     ventas_path = base_dir / 'Proyecto_1_Ecommerce' / 'proyecto1_ventas.csv'
@@ -140,14 +291,14 @@ def main():
                 df_new = model.sample(n_samples)
                 df_out = pd.concat([df, df_new], ignore_index=True)
                 out_dir.mkdir(parents=True, exist_ok=True)
-                out_file = out_dir / 'proyecto1_ventas_augmented.csv'
-                df_out.to_csv(out_file, index=False)
+                out_file = output_file(out_dir, 'proyecto1_ventas_augmented', args.format)
+                write_frame(df_out, out_file, **output)
                 print(f"Ventas ampliadas (sdv): {df_out.shape} -> {out_file}")
             except Exception as e:
                 print(f"SDV falló para ventas: {e}. Volviendo a faker.")
-                augment_ventas(ventas_path, out_dir, multiplier=args.n_multiplier)
+                augment_ventas(ventas_path, out_dir, **opts)
         else:
-            augment_ventas(ventas_path, out_dir, multiplier=args.n_multiplier)
+            augment_ventas(ventas_path, out_dir, **opts)
     else:
         print(f"No se encontró {ventas_path}")
 
@@ -162,14 +313,14 @@ def main():
                 df_new = model.sample(n_samples)
                 df_out = pd.concat([df, df_new], ignore_index=True)
                 out_dir.mkdir(parents=True, exist_ok=True)
-                out_file = out_dir / 'proyecto2_clima_augmented.csv'
-                df_out.to_csv(out_file, index=False)
+                out_file = output_file(out_dir, 'proyecto2_clima_augmented', args.format)
+                write_frame(df_out, out_file, **output)
                 print(f"Clima ampliado (sdv): {df_out.shape} -> {out_file}")
             except Exception as e:
                 print(f"SDV falló para clima: {e}. Volviendo a faker.")
-                augment_clima(clima_path, out_dir, multiplier=args.n_multiplier)
+                augment_clima(clima_path, out_dir, **opts)
         else:
-            augment_clima(clima_path, out_dir, multiplier=args.n_multiplier)
+            augment_clima(clima_path, out_dir, **opts)
     else:
         print(f"No se encontró {clima_path}")
 
@@ -185,23 +336,27 @@ def main():
                 model.fit(model_df)
                 n_samples = len(df) * args.n_multiplier
                 df_new = model.sample(n_samples)
-                # regenerate texto with Faker
-                textos = [fake.sentence(nb_words=8) for _ in range(len(df_new))]
+                # regenerate texto from a Faker sentence pool
+                text_pool = TextPool(pool_size=args.text_pool_size, nb_words=8, seed=args.seed)
+                textos = text_pool.sample_sentences(np.random.default_rng(args.seed), len(df_new))
                 if texto_col:
                     df_new[texto_col] = textos
                 df_out = pd.concat([df, df_new], ignore_index=True)
                 out_dir.mkdir(parents=True, exist_ok=True)
-                out_file = out_dir / 'proyecto3_opiniones_augmented.csv'
-                df_out.to_csv(out_file, index=False)
+                out_file = output_file(out_dir, 'proyecto3_opiniones_augmented', args.format)
+                write_frame(df_out, out_file, **output)
                 print(f"Opiniones ampliadas (sdv): {df_out.shape} -> {out_file}")
             except Exception as e:
                 print(f"SDV falló para opiniones: {e}. Volviendo a faker.")
-                augment_opiniones(opin_path, out_dir, multiplier=args.n_multiplier)
+                augment_opiniones(opin_path, out_dir, text_pool_size=args.text_pool_size, **opts)
         else:
-            augment_opiniones(opin_path, out_dir, multiplier=args.n_multiplier)
+            augment_opiniones(opin_path, out_dir, text_pool_size=args.text_pool_size, **opts)
     else:
         print(f"No se encontró {opin_path}")
 
+    peak = peak_rss_mb()
+    print(f"Pico de memoria (RSS): {peak:.1f} MB" if peak is not None else "Pico de memoria (RSS): N/D")
+
 
 if __name__ == '__main__':
     main()
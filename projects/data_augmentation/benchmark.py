@@ -0,0 +1,184 @@
+"""
+Suite de benchmarks para los generadores de data_augmentation.
+- Construye CSVs de entrada sintéticos y sembrados (ventas, clima, opiniones) de varios tamaños.
+- Ejecuta cada generador (faker = augment.py, sdv = synthetic_data_generator.py) para una
+  grilla de multiplicadores, cada caso en un proceso nuevo para medir su pico de memoria.
+- Guarda filas/s, tiempo y pico de RSS en JSON y compara contra un baseline guardado:
+  termina con código 1 si algún caso empeora más que --threshold.
+
+Uso:
+    python benchmark.py --sizes 1000,10000 --multipliers 10,50 --baseline benchmark_baseline.json
+    python benchmark.py --update-baseline   # guarda los resultados actuales como baseline
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from output_formats import output_file
+from perf_utils import peak_rss_mb
+
+DATASETS = {
+    'ventas': ('Proyecto_1_Ecommerce/proyecto1_ventas.csv', 'proyecto1_ventas_augmented'),
+    'clima': ('Proyecto_2_Clima/proyecto2_clima.csv', 'proyecto2_clima_augmented'),
+    'opiniones': ('Proyecto_3_Opiniones/proyecto3_opiniones.csv', 'proyecto3_opiniones_augmented'),
+}
+CIUDADES = ['Buenos Aires', 'Córdoba', 'Rosario', 'Mendoza', 'Madrid', 'Lima']
+
+
+def build_inputs(base_dir, n_rows, seed=0):
+    """Escribe los tres CSV de entrada con n_rows filas cada uno, siempre iguales para una misma seed."""
+    rng = np.random.default_rng(seed)
+    fechas = (np.datetime64('2024-01-01') + rng.integers(0, 365, size=(3, n_rows))).astype(str)
+    frames = {
+        'ventas': pd.DataFrame({
+            'venta_id': np.arange(1, n_rows + 1),
+            'cliente_id': rng.zipf(1.5, n_rows) % 1000 + 1,
+            'producto_id': rng.integers(1, 500, n_rows),
+            'fecha': fechas[0],
+            'cantidad': rng.choice([1, 2, 3, 4, 5], n_rows, p=[0.5, 0.3, 0.1, 0.07, 0.03]),
+        }),
+        'clima': pd.DataFrame({
+            'fecha': fechas[1],
+            'ciudad': rng.choice(CIUDADES, n_rows),
+            'temp_c': rng.normal(18, 7, n_rows).round().astype(int),
+            'humedad': rng.integers(20, 100, n_rows),
+        }),
+        'opiniones': pd.DataFrame({
+            'tweet_id': np.arange(1, n_rows + 1),
+            'usuario': np.char.add('usuario_', rng.integers(0, max(10, n_rows // 20), n_rows).astype(str)),
+            'texto': rng.choice(['Aprendiendo SQL', 'Hoy hice un pipeline', 'Pandas me confunde'], n_rows),
+            'fecha': fechas[2],
+        }),
+    }
+    paths = {}
+    for name, df in frames.items():
+        path = base_dir / DATASETS[name][0]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False)
+        paths[name] = path
+    return paths
+
+
+def _run_case(case):
+    """Ejecuta un generador en este proceso (nuevo) y devuelve sus métricas."""
+    method, dataset, input_path, out_dir, multiplier, seed = case
+    # los imports quedan fuera del tiempo medido
+    if method == 'faker':
+        import augment
+        start = time.perf_counter()
+        getattr(augment, f'augment_{dataset}')(input_path, out_dir, multiplier=multiplier, seed=seed)
+    else:
+        from synthetic_data_generator import DatasetSynthesizer
+        start = time.perf_counter()
+        synthesizer = DatasetSynthesizer(seed=seed)
+        getattr(synthesizer, f'generate_{dataset}')(input_path, output_file(out_dir, DATASETS[dataset][1]), multiplier)
+    return time.perf_counter() - start, peak_rss_mb()
+
+
+def run_case(method, dataset, input_path, out_dir, multiplier, seed):
+    # 'spawn' para que el pico de RSS no herede la memoria del proceso padre
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        return pool.apply(_run_case, ((method, dataset, input_path, out_dir, multiplier, seed),))
+
+
+def run_suite(sizes, multipliers, methods, datasets, seed=0, repeat=1):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='augment_bench_') as tmp:
+        tmp = Path(tmp)
+        for size in sizes:
+            inputs = build_inputs(tmp / f'in_{size}', size, seed=seed)
+            for method in methods:
+                for dataset in datasets:
+                    for multiplier in multipliers:
+                        key = f'{method}/{dataset}/n={size}/x{multiplier}'
+                        try:
+                            # mejor de `repeat` corridas para reducir ruido
+                            runs = [run_case(method, dataset, inputs[dataset], tmp / 'out', multiplier, seed)
+                                    for _ in range(repeat)]
+                        except Exception as e:
+                            print(f"{key}: falló ({e})")
+                            results[key] = {'error': str(e)}
+                            continue
+                        wall = min(r[0] for r in runs)
+                        peak = max((r[1] for r in runs if r[1] is not None), default=None)
+                        rows = size * multiplier
+                        results[key] = {'rows': rows, 'wall_s': wall, 'rows_per_sec': rows / wall, 'peak_mb': peak}
+                        peak_text = f'{peak:.0f} MB' if peak is not None else 'N/D'
+                        print(f"{key:<40} {rows / wall:>12,.0f} filas/s  {wall:7.2f} s  {peak_text}")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lista de regresiones: filas/s por debajo o pico de memoria por encima de baseline +- threshold."""
+    regressions = []
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None or 'error' in current or 'error' in base:
+            continue
+        if current['rows_per_sec'] < base['rows_per_sec'] * (1 - threshold):
+            regressions.append(f"{key}: filas/s {base['rows_per_sec']:,.0f} -> {current['rows_per_sec']:,.0f}")
+        if base.get('peak_mb') and current.get('peak_mb') and current['peak_mb'] > base['peak_mb'] * (1 + threshold):
+            regressions.append(f"{key}: pico RSS {base['peak_mb']:.0f} MB -> {current['peak_mb']:.0f} MB")
+    return regressions
+
+
+def _int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks de los generadores de datos')
+    parser.add_argument('--sizes', type=_int_list, default=[1000, 10000], help='Filas de input, separadas por coma')
+    parser.add_argument('--multipliers', type=_int_list, default=[10, 50], help='Multiplicadores, separados por coma')
+    parser.add_argument('--methods', type=str, default='faker,sdv', help='faker, sdv o ambos')
+    parser.add_argument('--datasets', type=str, default=','.join(DATASETS), help='Datasets a medir')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de inputs y generadores')
+    parser.add_argument('--repeat', type=int, default=1, help='Corridas por caso (se toma la mejor)')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='JSON con los resultados')
+    parser.add_argument('--baseline', type=str, default='benchmark_baseline.json', help='JSON de referencia')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Regresión tolerada (0.2 = 20%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Guardar los resultados como nuevo baseline')
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.multipliers, args.methods.split(','), args.datasets.split(','),
+                        seed=args.seed, repeat=args.repeat)
+    report = {
+        'meta': {'python': sys.version.split()[0], 'platform': platform.platform(), 'seed': args.seed},
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados -> {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline actualizado -> {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No hay baseline en {baseline_path}; usar --update-baseline para crearlo.")
+        return
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegresiones (> {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"Sin regresiones respecto a {baseline_path} (umbral {args.threshold:.0%}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Mezcla (k-way merge) de runs CSV ya ordenados para el ordenamiento externo de
+synthetic_data_generator.py.
+- Como mucho MAX_MERGE_FAN_IN archivos abiertos a la vez: con más runs se hacen
+  pasadas intermedias que mezclan grupos consecutivos en runs más grandes, así
+  no se agota el límite de descriptores de archivo (ulimit -n).
+- Estable: a igual clave las filas salen en el orden de los runs.
+"""
+import csv
+import heapq
+import os
+from operator import itemgetter
+from pathlib import Path
+
+MAX_MERGE_FAN_IN = 256
+
+
+def _merge(run_paths, key_idx):
+    files = [open(p, newline='', encoding='utf-8') for p in run_paths]
+    try:
+        yield from heapq.merge(*(csv.reader(f) for f in files), key=itemgetter(*key_idx))
+    finally:
+        for f in files:
+            f.close()
+
+
+def merge_sorted_runs(run_paths, key_idx, fan_in=MAX_MERGE_FAN_IN):
+    """
+    K-way merge de CSVs ya ordenados (sin cabecera): devuelve las filas en orden.
+    Los runs intermedios se escriben junto al primero y se borran al consumirlos.
+    """
+    if fan_in < 2:
+        raise ValueError(f"fan_in debe ser al menos 2: {fan_in}")
+    runs = [Path(p) for p in run_paths]
+    tmp_dir = runs[0].parent if runs else None
+    intermediate = set()
+    level = 0
+    while len(runs) > fan_in:
+        merged = []
+        for start in range(0, len(runs), fan_in):
+            group = runs[start:start + fan_in]
+            out_path = tmp_dir / f'merge_{level:02d}_{len(merged):05d}.csv'
+            with open(out_path, 'w', newline='', encoding='utf-8') as out:
+                # mismo formato que los runs de DataFrame.to_csv
+                csv.writer(out, lineterminator=os.linesep).writerows(_merge(group, key_idx))
+            for path in group:
+                if path in intermediate:
+                    path.unlink()
+                    intermediate.discard(path)
+            intermediate.add(out_path)
+            merged.append(out_path)
+        runs = merged
+        level += 1
+    try:
+        yield from _merge(runs, key_idx)
+    finally:
+        for path in intermediate:
+            path.unlink(missing_ok=True)
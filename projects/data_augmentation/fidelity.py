@@ -0,0 +1,142 @@
+"""
+Muestras de entrenamiento y reporte de fidelidad para DatasetSynthesizer.
+- fit_sample: submuestra (estratificada o aleatoria simple) para entrenar el copula con menos filas.
+- fidelity_report: compara marginales (KS / distancia de variación total) y correlaciones
+  del sintético contra el input completo, todo con operaciones vectorizadas.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def fit_sample(df, n_rows, rng, strata=None):
+    """
+    Devuelve como mucho n_rows filas de df para entrenar.
+    Con strata (Series alineada con df) cada estrato aporta filas en proporción a su
+    tamaño (al menos una), repartidas por restos mayores para que el total sea exactamente
+    n_rows; si hay tantos estratos como n_rows o más, n_rows estratos al azar aportan una
+    fila cada uno. Sin strata es una muestra aleatoria simple sin reemplazo.
+    """
+    if not n_rows or len(df) <= n_rows:
+        return df
+    if strata is None:
+        idx = rng.choice(len(df), size=n_rows, replace=False)
+        return df.iloc[np.sort(idx)]
+
+    positions = pd.Series(np.arange(len(df)), index=df.index)
+    groups = [group.to_numpy() for _, group in positions.groupby(strata.to_numpy(), sort=False)]
+    sizes = np.array([len(group) for group in groups])
+    if len(groups) >= n_rows:
+        takes = np.zeros(len(groups), dtype=np.int64)
+        takes[rng.choice(len(groups), size=n_rows, replace=False)] = 1
+    else:
+        # restos mayores con mínimo de una fila: los estratos con cuota < 1 se quedan con
+        # una y la cuota del resto se recalcula sin ellos. Las cuotas quedan por debajo del
+        # tamaño de cada estrato, así que la fila extra de los restos nunca se pasa.
+        takes = np.ones(len(groups), dtype=np.int64)
+        free = np.ones(len(groups), dtype=bool)
+        while True:
+            rest = n_rows - np.count_nonzero(~free)
+            quota = rest * sizes[free] / sizes[free].sum()
+            small = quota < 1
+            if not small.any():
+                break
+            free[np.flatnonzero(free)[small]] = False
+        base = np.floor(quota).astype(np.int64)
+        base[np.argsort(base - quota, kind='stable')[:rest - base.sum()]] += 1
+        takes[free] = base
+    picked = [rng.choice(group, size=take, replace=False) for group, take in zip(groups, takes) if take]
+    return df.iloc[np.sort(np.concatenate(picked))]
+
+
+def frequency_strata(values, n_buckets=10):
+    """Estrato por frecuencia de cada valor (p. ej. clientes muy o poco frecuentes)."""
+    freq = values.map(values.value_counts())
+    return pd.qcut(freq.rank(method='first'), q=min(n_buckets, len(values)), labels=False)
+
+
+def _ks_statistic(real, synth):
+    real = np.sort(real)
+    synth = np.sort(synth)
+    grid = np.concatenate([real, synth])
+    cdf_real = np.searchsorted(real, grid, side='right') / len(real)
+    cdf_synth = np.searchsorted(synth, grid, side='right') / len(synth)
+    return float(np.abs(cdf_real - cdf_synth).max())
+
+
+def _total_variation(real, synth):
+    freqs = pd.concat([real.value_counts(normalize=True), synth.value_counts(normalize=True)], axis=1).fillna(0)
+    return float(0.5 * np.abs(freqs.iloc[:, 0] - freqs.iloc[:, 1]).sum())
+
+
+def _as_numeric(values, sdtype):
+    if sdtype == 'datetime':
+        return pd.to_datetime(values).to_numpy().astype('datetime64[D]').astype(np.float64)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def fidelity_report(real, synth, sdtypes):
+    """
+    sdtypes: {columna: sdtype de SDV}; las columnas 'id' se ignoran.
+    - numerical/datetime: estadístico KS y medias/desviaciones.
+    - categorical: distancia de variación total entre frecuencias.
+    - correlaciones de Pearson entre columnas numéricas/fecha: diferencia máxima y media.
+    """
+    columns = {}
+    numeric_real, numeric_synth = {}, {}
+    for col, sdtype in sdtypes.items():
+        if sdtype == 'id' or col not in real or col not in synth:
+            continue
+        if sdtype in ('numerical', 'datetime'):
+            numeric_real[col] = _as_numeric(real[col], sdtype)
+            numeric_synth[col] = _as_numeric(synth[col], sdtype)
+            r = numeric_real[col][~np.isnan(numeric_real[col])]
+            s = numeric_synth[col][~np.isnan(numeric_synth[col])]
+            columns[col] = {
+                'sdtype': sdtype,
+                'ks': _ks_statistic(r, s),
+                'mean_real': float(r.mean()),
+                'mean_synth': float(s.mean()),
+                'std_real': float(r.std()),
+                'std_synth': float(s.std()),
+            }
+        else:
+            columns[col] = {
+                'sdtype': sdtype,
+                'tvd': _total_variation(real[col].astype(str), synth[col].astype(str)),
+                'cardinality_real': int(real[col].nunique()),
+                'cardinality_synth': int(synth[col].nunique()),
+            }
+
+    report = {'rows_real': len(real), 'rows_synth': len(synth), 'columns': columns}
+    if len(numeric_real) >= 2:
+        corr_real = pd.DataFrame(numeric_real).corr().to_numpy()
+        corr_synth = pd.DataFrame(numeric_synth).corr().to_numpy()
+        upper = np.triu_indices_from(corr_real, k=1)
+        diff = np.abs(corr_real - corr_synth)[upper]
+        report['correlation'] = {
+            'columns': list(numeric_real),
+            'max_abs_diff': float(np.nanmax(diff)),
+            'mean_abs_diff': float(np.nanmean(diff)),
+        }
+    return report
+
+
+def write_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def format_report(report):
+    """Resumen de una línea por columna para la consola."""
+    lines = []
+    for col, stats in report['columns'].items():
+        if 'ks' in stats:
+            lines.append(f"  {col:<12} KS={stats['ks']:.3f}  media {stats['mean_real']:.2f} -> {stats['mean_synth']:.2f}")
+        else:
+            lines.append(f"  {col:<12} TVD={stats['tvd']:.3f}  cardinalidad {stats['cardinality_real']} -> {stats['cardinality_synth']}")
+    if 'correlation' in report:
+        corr = report['correlation']
+        lines.append(f"  correlaciones: dif. máx {corr['max_abs_diff']:.3f}, media {corr['mean_abs_diff']:.3f}")
+    return '\n'.join(lines)
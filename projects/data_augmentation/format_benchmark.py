@@ -0,0 +1,66 @@
+"""
+Benchmark pequeño de formatos de salida: CSV vs Parquet vs Feather.
+- Genera una tabla de ventas sintética (mismo motor que augment.py) de --rows filas.
+- Mide tiempo de escritura, tamaño en disco y tiempo de lectura (con `fecha` ya tipada).
+
+Uso:
+    python format_benchmark.py --rows 2000000 --out-dir .\\bench_formats
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from augment import synth_ventas
+from output_formats import FORMATS, output_file, write_frame
+
+
+def read_back(path, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(path, parse_dates=['fecha'])
+    if fmt == 'parquet':
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparar CSV, Parquet y Feather')
+    parser.add_argument('--rows', type=int, required=False, default=1_000_000, help='Filas a generar')
+    parser.add_argument('--out-dir', type=str, required=False, default='./bench_formats', help='Directorio temporal de salida')
+    parser.add_argument('--seed', type=int, required=False, default=42, help='Semilla')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df = synth_ventas(rng, args.rows, 0, 0, np.arange(1, 5001), np.arange(1, 1001),
+                      pd.Timestamp('2023-01-01'), pd.Timestamp('2024-12-31'))
+    out_dir = Path(args.out_dir)
+
+    results = []
+    for fmt in FORMATS:
+        path = output_file(out_dir, 'ventas_bench', fmt)
+        start = time.perf_counter()
+        write_frame(df, path, fmt)
+        write_s = time.perf_counter() - start
+        start = time.perf_counter()
+        read_back(path, fmt)
+        read_s = time.perf_counter() - start
+        results.append({
+            'format': fmt,
+            'write_s': write_s,
+            'size_mb': path.stat().st_size / 1024 ** 2,
+            'read_s': read_s,
+        })
+
+    table = pd.DataFrame(results).set_index('format')
+    csv_row = table.loc['csv']
+    table['write_vs_csv'] = csv_row['write_s'] / table['write_s']
+    table['size_vs_csv'] = table['size_mb'] / csv_row['size_mb']
+    table['read_vs_csv'] = csv_row['read_s'] / table['read_s']
+    print(f"Ventas sintéticas: {args.rows} filas")
+    print(table.to_string(float_format=lambda v: f'{v:.3f}'))
+
+
+if __name__ == '__main__':
+    main()
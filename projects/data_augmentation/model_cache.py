@@ -0,0 +1,80 @@
+"""
+Caché en disco de sintetizadores SDV ya entrenados.
+- La clave es un hash del contenido de los datos, del dict de SingleTableMetadata y de la semilla.
+- Un acierto carga el modelo con `load()` y evita volver a llamar a `fit()`.
+- El tamaño total está acotado: al superarlo se borran los modelos usados hace más tiempo (LRU).
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = '.sdv_model_cache'
+DEFAULT_MAX_MB = 1024
+
+
+def model_key(data, metadata, seed):
+    """Hash estable de (datos, metadata, seed)."""
+    h = hashlib.sha256()
+    h.update(','.join(map(str, data.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    h.update(json.dumps(metadata.to_dict(), sort_keys=True, default=str).encode('utf-8'))
+    h.update(str(seed).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ModelCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return self.cache_dir / f'{key}.pkl'
+
+    def get(self, key, loader):
+        """Devuelve el modelo cacheado (cargado con loader(path)) o None."""
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        try:
+            model = loader(str(path))
+        except Exception as e:
+            print(f"Caché de modelos: entrada ilegible {path.name} ({e}), se descarta.")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        # marcar como usado recientemente para la política LRU
+        os.utime(path)
+        self.hits += 1
+        return model
+
+    def put(self, key, model):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix('.tmp')
+        model.save(str(tmp))
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        # un único stat() por entrada; otro proceso que comparte el directorio
+        # puede haber borrado alguna entre el glob y el stat
+        entries = []
+        for p in self.cache_dir.glob('*.pkl'):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        # nunca se borra el más reciente, aunque por sí solo supere el límite
+        while total > self.max_bytes and len(entries) > 1:
+            _, size, oldest = entries.pop(0)
+            total -= size
+            oldest.unlink(missing_ok=True)
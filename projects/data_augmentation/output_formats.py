@@ -0,0 +1,135 @@
+"""
+Formatos de salida para los generadores: CSV, Parquet y Feather (Arrow IPC).
+- CSV mantiene el comportamiento original (fechas como '%Y-%m-%d').
+- Parquet/Feather usan un esquema tipado: IDs int64, `fecha` como date32 y
+  `ciudad`/`usuario` codificadas como diccionario.
+
+pyarrow solo se importa cuando se pide un formato columnar.
+"""
+import pandas as pd
+
+FORMATS = ['csv', 'parquet', 'feather']
+EXTENSIONS = {'csv': 'csv', 'parquet': 'parquet', 'feather': 'feather'}
+DEFAULT_COMPRESSION = {'parquet': 'snappy', 'feather': 'lz4'}
+DEFAULT_ROW_GROUP_ROWS = 1_000_000
+
+# tipo Arrow por nombre de columna (las columnas no listadas quedan como string)
+COLUMN_TYPES = {
+    'venta_id': 'int64',
+    'cliente_id': 'int64',
+    'producto_id': 'int64',
+    'cantidad': 'int64',
+    'tweet_id': 'int64',
+    'temp_c': 'int64',
+    'humedad': 'int64',
+    'fecha': 'date32',
+    'ciudad': 'dictionary',
+    'usuario': 'dictionary',
+}
+
+
+def output_file(out_dir, stem, fmt='csv'):
+    return out_dir / f'{stem}.{EXTENSIONS[fmt]}'
+
+
+def to_arrow(df):
+    """Convierte un DataFrame (tipos pandas o strings leídos de CSV) a una tabla Arrow tipada."""
+    import pyarrow as pa
+
+    arrays = {}
+    for col in df.columns:
+        kind = COLUMN_TYPES.get(col, 'string')
+        values = df[col]
+        if kind == 'int64':
+            arrays[col] = pa.array(pd.to_numeric(values).astype('int64').to_numpy(), type=pa.int64())
+        elif kind == 'date32':
+            days = pd.to_datetime(values).to_numpy().astype('datetime64[D]')
+            arrays[col] = pa.array(days, type=pa.date32())
+        elif kind == 'dictionary':
+            # los nulos (NaN en categóricas) siguen siendo nulos, no el texto 'nan'
+            strings = values.astype(str).astype(object).where(values.notna(), None)
+            arrays[col] = pa.array(strings, type=pa.string(), from_pandas=True).dictionary_encode()
+        else:
+            arrays[col] = pa.array(values, type=pa.string(), from_pandas=True)
+    return pa.table(arrays)
+
+
+class TableWriter:
+    """
+    Escritor incremental: write() recibe DataFrames (o tablas Arrow ya convertidas)
+    en orden y close() cierra el archivo.
+    - csv: cada bloque se añade al final del archivo.
+    - parquet: cada bloque se escribe en row groups de row_group_rows filas.
+    - feather: cada bloque se escribe como record batches de un archivo IPC. El
+      formato no admite reemplazar diccionarios, así que cada columna diccionario
+      se recodifica contra un vocabulario que solo crece y los valores nuevos se
+      escriben como deltas.
+    """
+
+    def __init__(self, path, fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression or DEFAULT_COMPRESSION.get(fmt)
+        self.row_group_rows = row_group_rows
+        self._writer = None
+        self._schema = None
+        self._vocab = {}
+        self._header = True
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, data):
+        if self.fmt == 'csv':
+            data.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+            return
+
+        table = data if not isinstance(data, pd.DataFrame) else to_arrow(data)
+        if self.fmt == 'feather':
+            self._write_feather(table)
+            return
+
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self._writer.write_table(table.cast(self._writer.schema), row_group_size=self.row_group_rows)
+
+    def _write_feather(self, table):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        columns = []
+        for name, column in zip(table.column_names, table.columns):
+            if pa.types.is_dictionary(column.type):
+                column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+                vocab = self._vocab.get(name, pa.array([], type=column.type.value_type))
+                new_values = column.dictionary.filter(pc.invert(pc.is_in(column.dictionary, value_set=vocab)))
+                vocab = self._vocab[name] = pa.concat_arrays([vocab, new_values])
+                positions = pc.index_in(column.dictionary, value_set=vocab).cast(column.type.index_type)
+                column = pa.DictionaryArray.from_arrays(positions.take(column.indices), vocab)
+            columns.append(column)
+        table = pa.table(columns, names=table.column_names)
+
+        if self._writer is None:
+            compression = None if self.compression == 'uncompressed' else self.compression
+            options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+            self._schema = table.schema
+            self._writer = pa.ipc.new_file(str(self.path), self._schema, options=options)
+        self._writer.write_table(table.cast(self._schema), max_chunksize=self.row_group_rows)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_frame(df, path, fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """Escribe un DataFrame completo en el formato pedido."""
+    with TableWriter(path, fmt, compression=compression, row_group_rows=row_group_rows) as writer:
+        writer.write(df)
@@ -0,0 +1,20 @@
+"""
+Utilidades de medición compartidas por los generadores de data_augmentation.
+"""
+import sys
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        # Windows: no hay 'resource'; usar psutil si está instalado
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
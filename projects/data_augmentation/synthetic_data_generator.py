@@ -4,6 +4,13 @@ Mantiene las distribuciones y correlaciones del dataset original.
 """
 
 import argparse
+import csv
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from multiprocessing import Pool
+from itertools import islice
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -13,20 +20,153 @@ from faker import Faker
 import random
 from datetime import datetime, timedelta
 
-fake = Faker(['es_ES'])  # Configurado para español
+from external_sort import merge_sorted_runs
+from fidelity import fidelity_report, fit_sample, format_report, frequency_strata, write_report
+from output_formats import DEFAULT_ROW_GROUP_ROWS, FORMATS, TableWriter, output_file, write_frame
+from perf_utils import peak_rss_mb
+from model_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, ModelCache, model_key
+from text_pool import DEFAULT_POOL_SIZE, TextPool, expand_templates
+
+FAKER_LOCALE = ['es_ES']  # Configurado para español
+
+
+def write_rows(rows, output_path, header, fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS):
+    """Escribe un iterable de filas (listas de strings) en el formato pedido, sin cargarlo entero."""
+    if fmt == 'csv':
+        with open(output_path, 'w', newline='', encoding='utf-8') as out:
+            # mismo fin de línea que DataFrame.to_csv
+            writer = csv.writer(out, lineterminator=os.linesep)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return
+    with TableWriter(output_path, fmt, compression=compression, row_group_rows=row_group_rows) as writer:
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, row_group_rows))
+            if not batch:
+                break
+            writer.write(pd.DataFrame(batch, columns=header))
+
 
 class DatasetSynthesizer:
-    def __init__(self, seed=42):
+    def __init__(self, seed=42, text_pool_size=DEFAULT_POOL_SIZE, model_cache=None, batch_rows=None,
+                 fmt='csv', compression=None, row_group_rows=DEFAULT_ROW_GROUP_ROWS,
+                 fit_sample_rows=None, fidelity=False):
         self.seed = seed
+        self.fit_sample_rows = fit_sample_rows
+        # el reporte de fidelidad se emite siempre que se entrena sobre una muestra
+        self.fidelity = fidelity or bool(fit_sample_rows)
+        self._synthetic_sample = None
+        self.batch_rows = batch_rows
+        self.output = dict(fmt=fmt, compression=compression, row_group_rows=row_group_rows)
+        self.text_pool_size = text_pool_size
+        self.model_cache = model_cache
+        self.rng = np.random.default_rng(seed)
+        self._text_pool = None
+        # tiempos por etapa del último generate_* (ver _timed)
+        self.stats = {}
         random.seed(seed)
         np.random.seed(seed)
         Faker.seed(seed)
 
+    @property
+    def text_pool(self):
+        # se genera la primera vez que se necesita texto
+        if self._text_pool is None:
+            self._text_pool = TextPool(locale=FAKER_LOCALE, pool_size=self.text_pool_size, seed=self.seed)
+        return self._text_pool
+
+    @contextmanager
+    def _timed(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats[step] = self.stats.get(step, 0.0) + time.perf_counter() - start
+
     def _train_synthesizer(self, data, metadata):
+        if self.model_cache is not None:
+            key = model_key(data, metadata, self.seed)
+            synthesizer = self.model_cache.get(key, GaussianCopulaSynthesizer.load)
+            if synthesizer is not None:
+                print(f"Modelo recuperado de caché ({key[:12]})")
+                return synthesizer
+
         synthesizer = GaussianCopulaSynthesizer(metadata)
         synthesizer.fit(data)
+        if self.model_cache is not None:
+            self.model_cache.put(key, synthesizer)
         return synthesizer
 
+    def _fit_data(self, df, strata=None):
+        """Datos de entrenamiento: df completo o una muestra de fit_sample_rows filas (estratificada con strata(df))."""
+        if not self.fit_sample_rows or len(df) <= self.fit_sample_rows:
+            return df
+        rng = np.random.default_rng(self.seed)
+        sample = fit_sample(df, self.fit_sample_rows, rng, strata=strata(df) if strata else None)
+        self.stats['fit_rows'] = len(sample)
+        print(f"Entrenando con {len(sample)} de {len(df)} filas")
+        return sample
+
+    def _report_fidelity(self, df, fit_columns, metadata, output_path):
+        """Compara el sintético (completo o primer lote) con el input completo y guarda el JSON junto a la salida."""
+        if not self.fidelity or self._synthetic_sample is None:
+            return
+        sdtypes = {col: spec['sdtype'] for col, spec in metadata.to_dict()['columns'].items() if col in fit_columns}
+        report = fidelity_report(df, self._synthetic_sample, sdtypes)
+        report['fit_rows'] = self.stats.get('fit_rows', len(df))
+        report_path = output_path.with_name(f'{output_path.stem}_fidelity.json')
+        write_report(report, report_path)
+        print(f"Fidelidad ({report['fit_rows']} filas de entrenamiento) -> {report_path}")
+        print(format_report(report))
+        self._synthetic_sample = None
+
+    def _sample_and_write(self, df, synthesizer, num_samples, finish, sort_keys, output_path):
+        """
+        Muestrea num_samples filas, las combina con df, ordena por sort_keys y escribe
+        la salida en el formato configurado (csv, parquet o feather).
+        finish(batch, offset) ajusta cada lote sintético (IDs, fechas, redondeos).
+
+        Con batch_rows se muestrea por lotes: cada lote se ordena y se vuelca a un
+        archivo temporal (run) y al final los runs se mezclan (k-way merge) en la
+        salida, así la memoria depende del lote y no del total. En ese modo
+        devuelve None en lugar del DataFrame combinado.
+        """
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.stats['rows'] = num_samples
+        if not self.batch_rows:
+            with self._timed('sample'):
+                synthetic_data = finish(synthesizer.sample(num_rows=num_samples), 0)
+            self._synthetic_sample = synthetic_data if self.fidelity else None
+            result = pd.concat([df, synthetic_data], ignore_index=True)
+            result = result.sort_values(sort_keys).reset_index(drop=True)
+            with self._timed('write'):
+                write_frame(result, output_path, **self.output)
+            return result
+
+        with tempfile.TemporaryDirectory(prefix='runs_', dir=output_path.parent) as tmp_dir:
+            runs = []
+
+            def spill(frame):
+                run_path = Path(tmp_dir) / f'run_{len(runs):05d}.csv'
+                frame[df.columns].sort_values(sort_keys, kind='stable').to_csv(run_path, index=False, header=False)
+                runs.append(run_path)
+
+            with self._timed('write'):
+                spill(df)
+            for offset in range(0, num_samples, self.batch_rows):
+                with self._timed('sample'):
+                    batch = finish(synthesizer.sample(num_rows=min(self.batch_rows, num_samples - offset)), offset)
+                if self.fidelity and offset == 0:
+                    # el primer lote hace de muestra del sintético para el reporte
+                    self._synthetic_sample = batch
+                with self._timed('write'):
+                    spill(batch)
+            with self._timed('write'):
+                rows = merge_sorted_runs(runs, [df.columns.get_loc(k) for k in sort_keys])
+                write_rows(rows, output_path, list(df.columns), **self.output)
+        return None
+
     def generate_ventas(self, input_path, output_path, multiplier=50):
         """Genera datos sintéticos para el dataset de ventas"""
         df = pd.read_csv(input_path)
@@ -40,22 +180,23 @@ class DatasetSynthesizer:
         metadata.update_column(column_name='fecha', sdtype='datetime')
         metadata.update_column(column_name='cantidad', sdtype='numerical')
 
-        synthesizer = self._train_synthesizer(df, metadata)
+        self.stats = {}
+        with self._timed('fit'):
+            fit_df = self._fit_data(df, strata=lambda d: frequency_strata(d['cliente_id']))
+            synthesizer = self._train_synthesizer(fit_df, metadata)
         num_samples = len(df) * multiplier
-        synthetic_data = synthesizer.sample(num_rows=num_samples)
 
-        # Asegurar que los IDs sean únicos y consecutivos
-        synthetic_data['venta_id'] = range(len(df) + 1, len(df) + len(synthetic_data) + 1)
-        synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
-        
-        # Combinar datos originales y sintéticos
-        result = pd.concat([df, synthetic_data], ignore_index=True)
-        result = result.sort_values('fecha').reset_index(drop=True)
-        
-        # Guardar resultado
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        result.to_csv(output_path, index=False)
-        print(f"Ventas ampliadas: {result.shape} -> {output_path}")
+        def finish(synthetic_data, offset):
+            # Asegurar que los IDs sean únicos y consecutivos
+            start = len(df) + offset + 1
+            synthetic_data['venta_id'] = range(start, start + len(synthetic_data))
+            synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
+            return synthetic_data
+
+        # Combinar datos originales y sintéticos, ordenar y guardar
+        result = self._sample_and_write(df, synthesizer, num_samples, finish, ['fecha'], output_path)
+        print(f"Ventas ampliadas: {(len(df) + num_samples, df.shape[1])} -> {output_path}")
+        self._report_fidelity(df, fit_df.columns, metadata, output_path)
         return result
 
     def generate_clima(self, input_path, output_path, multiplier=50):
@@ -69,22 +210,23 @@ class DatasetSynthesizer:
         metadata.update_column(column_name='temp_c', sdtype='numerical')
         metadata.update_column(column_name='humedad', sdtype='numerical')
 
-        synthesizer = self._train_synthesizer(df, metadata)
+        self.stats = {}
+        with self._timed('fit'):
+            fit_df = self._fit_data(df, strata=lambda d: d['ciudad'])
+            synthesizer = self._train_synthesizer(fit_df, metadata)
         num_samples = len(df) * multiplier
-        synthetic_data = synthesizer.sample(num_rows=num_samples)
 
-        # Ajustar valores generados
-        synthetic_data['temp_c'] = synthetic_data['temp_c'].round().astype(int)
-        synthetic_data['humedad'] = synthetic_data['humedad'].round().clip(0, 100).astype(int)
-        synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
+        def finish(synthetic_data, offset):
+            # Ajustar valores generados
+            synthetic_data['temp_c'] = synthetic_data['temp_c'].round().astype(int)
+            synthetic_data['humedad'] = synthetic_data['humedad'].round().clip(0, 100).astype(int)
+            synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
+            return synthetic_data
 
-        # Combinar y ordenar
-        result = pd.concat([df, synthetic_data], ignore_index=True)
-        result = result.sort_values(['fecha', 'ciudad']).reset_index(drop=True)
-        
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        result.to_csv(output_path, index=False)
-        print(f"Clima ampliado: {result.shape} -> {output_path}")
+        # Combinar, ordenar y guardar
+        result = self._sample_and_write(df, synthesizer, num_samples, finish, ['fecha', 'ciudad'], output_path)
+        print(f"Clima ampliado: {(len(df) + num_samples, df.shape[1])} -> {output_path}")
+        self._report_fidelity(df, fit_df.columns, metadata, output_path)
         return result
 
     def generate_opiniones(self, input_path, output_path, multiplier=50):
@@ -119,29 +261,50 @@ class DatasetSynthesizer:
             "data mining", "business intelligence"
         ]
 
-        synthesizer = self._train_synthesizer(df[['tweet_id', 'usuario', 'fecha']], metadata)
+        self.stats = {}
+        with self._timed('fit'):
+            fit_df = self._fit_data(df[['tweet_id', 'usuario', 'fecha']])
+            synthesizer = self._train_synthesizer(fit_df, metadata)
         num_samples = len(df) * multiplier
-        synthetic_data = synthesizer.sample(num_rows=num_samples)
-
-        # Generar textos más variados y realistas
-        synthetic_data['texto'] = [
-            random.choice(templates).format(tema=random.choice(temas)) + " " + fake.sentence()
-            for _ in range(len(synthetic_data))
-        ]
+        prefixes = expand_templates(templates, temas)
 
-        # Asegurar IDs únicos y fechas correctas
-        synthetic_data['tweet_id'] = range(len(df) + 1, len(df) + len(synthetic_data) + 1)
-        synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
+        def finish(synthetic_data, offset):
+            # Generar textos más variados y realistas: plantilla x tema + frase del pool
+            synthetic_data['texto'] = self.text_pool.compose(self.rng, len(synthetic_data), prefixes)
+            # Asegurar IDs únicos y fechas correctas
+            start = len(df) + offset + 1
+            synthetic_data['tweet_id'] = range(start, start + len(synthetic_data))
+            synthetic_data['fecha'] = pd.to_datetime(synthetic_data['fecha']).dt.strftime('%Y-%m-%d')
+            return synthetic_data
 
-        # Combinar y ordenar
-        result = pd.concat([df, synthetic_data], ignore_index=True)
-        result = result.sort_values('fecha').reset_index(drop=True)
-        
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        result.to_csv(output_path, index=False)
-        print(f"Opiniones ampliadas: {result.shape} -> {output_path}")
+        # Combinar, ordenar y guardar
+        result = self._sample_and_write(df, synthesizer, num_samples, finish, ['fecha'], output_path)
+        print(f"Opiniones ampliadas: {(len(df) + num_samples, df.shape[1])} -> {output_path}")
+        self._report_fidelity(df, fit_df.columns, metadata, output_path)
         return result
 
+def _run_dataset(task):
+    """Genera un dataset con un DatasetSynthesizer propio (sembrado con la misma seed) y devuelve sus métricas."""
+    method, input_path, output_path, multiplier, options = task
+    synthesizer = DatasetSynthesizer(**options)
+    getattr(synthesizer, method)(input_path, output_path, multiplier)
+    stats = dict(synthesizer.stats)
+    stats['peak_mb'] = peak_rss_mb()
+    if synthesizer.model_cache is not None:
+        stats['cache_hits'] = synthesizer.model_cache.hits
+        stats['cache_misses'] = synthesizer.model_cache.misses
+    return stats
+
+
+def print_summary(summary):
+    """Tabla por dataset con tiempos por etapa, filas/s y pico de memoria."""
+    table = pd.DataFrame(summary).set_index('dataset')
+    total = table[['fit', 'sample', 'write']].sum(axis=1)
+    table['rows_per_sec'] = (table['rows'] / total).round(0)
+    columns = ['rows', 'fit', 'sample', 'write', 'rows_per_sec', 'peak_mb']
+    print("\nResumen por dataset (segundos; peak_mb = pico RSS del proceso que lo generó):")
+    print(table[columns].to_string(float_format=lambda v: f'{v:.2f}'))
+
 def main():
     parser = argparse.ArgumentParser(description='Generar datos sintéticos realistas')
     parser.add_argument('--dir', type=str, required=False, default='.',
@@ -152,26 +315,71 @@ def main():
                       help='Multiplicador de tamaño (default: 50)')
     parser.add_argument('--seed', type=int, required=False, default=42,
                       help='Semilla para reproducibilidad')
+    parser.add_argument('--text-pool-size', type=int, required=False, default=DEFAULT_POOL_SIZE,
+                      help=f'Frases pre-generadas para textos de opiniones (default: {DEFAULT_POOL_SIZE})')
+    parser.add_argument('--model-cache-dir', type=str, required=False, default=DEFAULT_CACHE_DIR,
+                      help=f'Directorio de la caché de modelos entrenados (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--model-cache-max-mb', type=float, required=False, default=DEFAULT_MAX_MB,
+                      help=f'Tamaño máximo de la caché en MB, LRU (default: {DEFAULT_MAX_MB})')
+    parser.add_argument('--no-model-cache', action='store_true',
+                      help='Reentrenar siempre sin leer ni escribir la caché')
+    parser.add_argument('--batch-rows', type=int, required=False, default=None,
+                      help='Muestrear por lotes de N filas y ordenar con merge externo (memoria acotada)')
+    parser.add_argument('--format', type=str, required=False, default='csv', choices=FORMATS,
+                      help='Formato de salida (parquet/feather con esquema tipado)')
+    parser.add_argument('--compression', type=str, required=False, default=None,
+                      help='Compresión parquet/feather (default: snappy / lz4)')
+    parser.add_argument('--row-group-rows', type=int, required=False, default=DEFAULT_ROW_GROUP_ROWS,
+                      help=f'Filas por row group en parquet (default: {DEFAULT_ROW_GROUP_ROWS})')
+    parser.add_argument('--fit-sample-rows', type=int, required=False, default=None,
+                      help='Entrenar con una muestra de N filas (estratificada por ciudad en clima y por frecuencia de cliente en ventas)')
+    parser.add_argument('--fidelity-report', action='store_true',
+                      help='Escribir el reporte de fidelidad aunque se entrene con todo el input')
+    parser.add_argument('--jobs', type=int, required=False, default=1,
+                      help='Procesos para generar los datasets en paralelo (default: 1)')
     args = parser.parse_args()
 
     base_dir = Path(args.dir)
     out_dir = Path(args.out_dir)
+    model_cache = None if args.no_model_cache else ModelCache(args.model_cache_dir, args.model_cache_max_mb)
     
-    synthesizer = DatasetSynthesizer(seed=args.seed)
+    options = dict(seed=args.seed, text_pool_size=args.text_pool_size, model_cache=model_cache,
+                   batch_rows=args.batch_rows, fmt=args.format, compression=args.compression,
+                   row_group_rows=args.row_group_rows, fit_sample_rows=args.fit_sample_rows,
+                   fidelity=args.fidelity_report)
 
-    # Procesar cada dataset
+    # Procesar cada dataset; cada uno con su propio DatasetSynthesizer para que
+    # el resultado no dependa del orden ni de --jobs
     datasets = [
-        ('Proyecto_1_Ecommerce/proyecto1_ventas.csv', 'proyecto1_ventas_augmented.csv', synthesizer.generate_ventas),
-        ('Proyecto_2_Clima/proyecto2_clima.csv', 'proyecto2_clima_augmented.csv', synthesizer.generate_clima),
-        ('Proyecto_3_Opiniones/proyecto3_opiniones.csv', 'proyecto3_opiniones_augmented.csv', synthesizer.generate_opiniones)
+        ('ventas', 'Proyecto_1_Ecommerce/proyecto1_ventas.csv', 'proyecto1_ventas_augmented', 'generate_ventas'),
+        ('clima', 'Proyecto_2_Clima/proyecto2_clima.csv', 'proyecto2_clima_augmented', 'generate_clima'),
+        ('opiniones', 'Proyecto_3_Opiniones/proyecto3_opiniones.csv', 'proyecto3_opiniones_augmented', 'generate_opiniones')
     ]
 
-    for input_file, output_file, generator in datasets:
+    names, tasks = [], []
+    for name, input_file, output_stem, method in datasets:
         input_path = base_dir / input_file
         if input_path.exists():
-            generator(input_path, out_dir / output_file, args.n_multiplier)
+            names.append(name)
+            tasks.append((method, input_path, output_file(out_dir, output_stem, args.format), args.n_multiplier, options))
         else:
             print(f"No se encontró {input_path}")
 
+    if len(tasks) > 1:
+        # un proceso nuevo por dataset (también con --jobs 1, en secuencia) para que
+        # el pico de memoria sea el suyo: ru_maxrss no baja entre datasets
+        with Pool(processes=min(max(args.jobs, 1), len(tasks)), maxtasksperchild=1) as pool:
+            results = pool.map(_run_dataset, tasks, chunksize=1)
+    else:
+        results = [_run_dataset(task) for task in tasks]
+
+    if results:
+        print_summary([dict(stats, dataset=name) for name, stats in zip(names, results)])
+
+    if model_cache is not None:
+        hits = sum(stats.get('cache_hits', 0) for stats in results)
+        misses = sum(stats.get('cache_misses', 0) for stats in results)
+        print(f"Caché de modelos: {hits} aciertos, {misses} fallos ({model_cache.cache_dir})")
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# los tests importan los módulos del proyecto (augment.py, ...) desde la carpeta padre
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
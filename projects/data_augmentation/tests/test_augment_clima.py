@@ -0,0 +1,78 @@
+"""
+Momentos por ciudad de augment_clima frente al comportamiento original fila a fila:
+temp = int(gauss(media de la ciudad, 3)), humedad = int(gauss(media global, 5)) en [0, 100].
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from augment import CLIMA_HUM_SIGMA, CLIMA_TEMP_SIGMA, augment_clima, clima_stats, synth_clima
+
+SEED = 1234
+N = 200_000
+
+
+@pytest.fixture
+def clima():
+    # ciudades con medias distintas, incluida una negativa (int() trunca hacia cero)
+    rng = np.random.default_rng(0)
+    medias = {'Madrid': 22.0, 'Oslo': -4.0, 'Lima': 18.5}
+    filas = [
+        (f"2024-01-{dia:02d}", ciudad, int(rng.normal(media, 2)), int(rng.integers(30, 90)))
+        for ciudad, media in medias.items() for dia in range(1, 29)
+    ]
+    return pd.DataFrame(filas, columns=['fecha', 'ciudad', 'temp_c', 'humedad'])
+
+
+def reference_moments(mu, sigma, n=N, seed=SEED):
+    # el bucle original, para una sola ciudad
+    r = random.Random(seed)
+    values = np.array([int(r.gauss(mu=mu, sigma=sigma)) for _ in range(n)])
+    return values.mean(), values.std()
+
+
+def generate(df, n=N, seed=SEED):
+    return synth_clima(np.random.default_rng(seed), n, 0, clima_stats(df), df['humedad'].mean(),
+                       pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-28'))
+
+
+def test_temp_moments_per_city_match_row_by_row(clima):
+    out = generate(clima)
+    source_means = clima.groupby('ciudad')['temp_c'].mean()
+    for ciudad, grupo in out.groupby('ciudad'):
+        ref_mean, ref_std = reference_moments(source_means[ciudad], CLIMA_TEMP_SIGMA)
+        assert grupo['temp_c'].mean() == pytest.approx(ref_mean, abs=0.05)
+        assert grupo['temp_c'].std() == pytest.approx(ref_std, abs=0.05)
+        # truncar con int() mueve la media como mucho medio grado hacia cero
+        assert abs(grupo['temp_c'].mean() - source_means[ciudad]) < 0.6
+
+
+def test_humidity_uses_global_mean_and_is_clipped(clima):
+    out = generate(clima)
+    ref_mean, ref_std = reference_moments(clima['humedad'].mean(), CLIMA_HUM_SIGMA)
+    assert out['humedad'].between(0, 100).all()
+    for _, grupo in out.groupby('ciudad'):
+        assert grupo['humedad'].mean() == pytest.approx(ref_mean, abs=0.1)
+        assert grupo['humedad'].std() == pytest.approx(ref_std, abs=0.1)
+
+
+def test_cities_sampled_uniformly_and_types_kept(clima):
+    out = generate(clima)
+    assert set(out['ciudad']) == set(clima['ciudad'])
+    shares = out['ciudad'].value_counts(normalize=True)
+    assert shares.to_numpy() == pytest.approx([1 / 3] * 3, abs=0.01)
+    assert out['temp_c'].dtype == np.int64 and out['humedad'].dtype == np.int64
+
+
+def test_augment_clima_is_reproducible(clima, tmp_path):
+    src = tmp_path / 'clima.csv'
+    clima.to_csv(src, index=False)
+    for out_dir in ('a', 'b'):
+        augment_clima(src, tmp_path / out_dir, multiplier=50, seed=SEED, chunk_rows=1000)
+    first = (tmp_path / 'a' / 'proyecto2_clima_augmented.csv').read_bytes()
+    assert first == (tmp_path / 'b' / 'proyecto2_clima_augmented.csv').read_bytes()
+    out = pd.read_csv(tmp_path / 'a' / 'proyecto2_clima_augmented.csv')
+    assert len(out) == len(clima) * 51
+    pd.testing.assert_frame_equal(out.head(len(clima)), clima)
@@ -0,0 +1,58 @@
+"""
+merge_sorted_runs con más runs que fan_in: pasadas intermedias con pocos archivos
+abiertos a la vez, mismo resultado (estable) que ordenar todo en memoria.
+"""
+import builtins
+import csv
+
+import pytest
+
+import external_sort
+from external_sort import merge_sorted_runs
+
+
+@pytest.fixture
+def runs(tmp_path):
+    # 40 runs ordenados por (clave, subclave) con claves repetidas entre runs
+    rows = []
+    for run in range(40):
+        run_rows = sorted(([f"{(run * 7 + i) % 13:02d}", f"{i % 3}", f"{run}-{i}"] for i in range(25)),
+                          key=lambda r: (r[0], r[1]))
+        with open(tmp_path / f"run_{run:05d}.csv", 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(run_rows)
+        rows.extend(run_rows)
+    return sorted(tmp_path.glob("run_*.csv")), rows
+
+
+@pytest.mark.parametrize("fan_in", [2, 3, 16, 256])
+def test_merge_matches_stable_sort(runs, fan_in):
+    paths, rows = runs
+    merged = list(merge_sorted_runs(paths, [0, 1], fan_in=fan_in))
+
+    assert merged == sorted(rows, key=lambda r: (r[0], r[1]))
+    # solo quedan los runs originales
+    assert sorted(paths[0].parent.iterdir()) == paths
+
+
+def test_open_files_bounded_by_fan_in(runs, monkeypatch):
+    paths, _ = runs
+    open_now, peak = set(), [0]
+
+    def tracking_open(*args, **kwargs):
+        f = builtins.open(*args, **kwargs)
+        open_now.add(f)
+        close = f.close
+
+        def tracked_close():
+            open_now.discard(f)
+            close()
+        f.close = tracked_close
+        peak[0] = max(peak[0], len(open_now))
+        return f
+
+    monkeypatch.setattr(external_sort, "open", tracking_open, raising=False)
+    for _ in merge_sorted_runs(paths, [0], fan_in=4):
+        pass
+
+    assert 4 <= peak[0] <= 4 + 1  # un grupo de entrada y el run intermedio de salida
+    assert not open_now
@@ -0,0 +1,38 @@
+"""
+fit_sample con estratos: una fila por estrato como mínimo y nunca más de n_rows en total,
+aunque haya muchos estratos pequeños (el redondeo por estrato se pasaba de n_rows).
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from fidelity import fit_sample
+
+
+@pytest.mark.parametrize("sizes, n_rows", [
+    ([1] * 40 + [200], 50),    # 40 estratos de una fila: el redondeo daba 40 + 40
+    ([3] * 30 + [10], 20),     # más estratos que filas libres
+    ([5] * 60, 50),            # más estratos que n_rows
+    ([900, 90, 9, 1], 100),
+])
+def test_fit_sample_respects_n_rows(sizes, n_rows):
+    strata = pd.Series(np.repeat(np.arange(len(sizes)), sizes))
+    df = pd.DataFrame({'x': np.arange(len(strata))})
+
+    sample = fit_sample(df, n_rows, np.random.default_rng(0), strata=strata)
+
+    assert len(sample) == n_rows
+    assert sample.index.is_unique
+    counts = strata[sample.index].value_counts()
+    if len(sizes) <= n_rows:
+        assert len(counts) == len(sizes)
+    assert (counts <= pd.Series(sizes)[counts.index]).all()
+
+
+def test_fit_sample_is_proportional():
+    strata = pd.Series(np.repeat(['a', 'b', 'c'], [600, 300, 100]))
+    df = pd.DataFrame({'x': np.arange(len(strata))})
+
+    sample = fit_sample(df, 100, np.random.default_rng(0), strata=strata)
+
+    assert strata[sample.index].value_counts().to_dict() == {'a': 60, 'b': 30, 'c': 10}
@@ -0,0 +1,41 @@
+"""
+Motor de texto por pool para los generadores de opiniones.
+- Genera una sola vez, con Faker, un pool de frases y de nombres de usuario.
+- Después arma cada texto muestreando índices con NumPy: prefijo (plantilla x tema
+  o texto fijo) + ' ' + frase del pool, sin llamar a Faker por fila.
+
+Lo usan augment.py y synthetic_data_generator.py.
+"""
+import numpy as np
+import pandas as pd
+from faker import Faker
+
+DEFAULT_POOL_SIZE = 10_000
+
+
+def expand_templates(templates, temas):
+    """Todas las combinaciones plantilla x tema ya formateadas."""
+    return [template.format(tema=tema) for template in templates for tema in temas]
+
+
+class TextPool:
+    def __init__(self, locale=None, pool_size=DEFAULT_POOL_SIZE, nb_words=6, seed=None):
+        fake = Faker(locale)
+        if seed is not None:
+            fake.seed_instance(seed)
+        self.pool_size = pool_size
+        self.sentences = np.array([fake.sentence(nb_words=nb_words) for _ in range(pool_size)], dtype=object)
+        self.user_names = np.array([fake.user_name() for _ in range(pool_size)], dtype=object)
+
+    def sample_sentences(self, rng, n):
+        return self.sentences[rng.integers(0, len(self.sentences), size=n)]
+
+    def sample_user_names(self, rng, n):
+        return self.user_names[rng.integers(0, len(self.user_names), size=n)]
+
+    def compose(self, rng, n, prefixes):
+        """n textos '<prefijo> <frase>' con prefijo y frase elegidos al azar."""
+        prefixes = np.asarray(prefixes, dtype=object)
+        head = pd.Series(prefixes[rng.integers(0, len(prefixes), size=n)])
+        tail = pd.Series(self.sample_sentences(rng, n))
+        return (head + ' ' + tail).to_numpy()
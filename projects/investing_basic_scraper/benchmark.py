@@ -0,0 +1,95 @@
+"""
+Side-by-side latency and memory comparison of the extraction paths.
+
+Serves the HTML fixtures in fixtures/ from a local HTTP server and runs
+scraper.py once per repeat in each mode (http, auto, selenium), every run in a
+fresh process so interpreter start-up, imports and browser launch are all
+counted, like a cron run. Memory is the peak RSS reported by the OS for the
+run (the largest process of the tree, i.e. Chrome itself on the Selenium
+path).
+
+Usage:
+    python benchmark.py                       # all fixtures, all modes
+    python benchmark.py --modes http auto --repeats 10
+"""
+import argparse
+import functools
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+FIXTURES_DIR = HERE / "fixtures"
+MODES = ["http", "auto", "selenium"]
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_fixtures():
+    """Start a local server for fixtures/ on a free port and return its base URL."""
+    handler = functools.partial(QuietHandler, directory=str(FIXTURES_DIR))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_once(url, mode):
+    """Run scraper.py in a fresh process; return (seconds, peak RSS in MB or None, "found/total" or None)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "out.csv")
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, str(HERE / "scraper.py"), "--mode", mode, "--url", url, "--output", output],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        if hasattr(os, "wait4"):
+            # rusage of this child (and the descendants it reaped), not of earlier runs
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.WEXITSTATUS(status)
+            peak_mb = usage.ru_maxrss / 1024
+        else:
+            proc.wait()
+            peak_mb = None
+        elapsed = time.perf_counter() - start
+        if not os.path.exists(output):
+            return elapsed, peak_mb, None
+        row = pd.read_csv(output, dtype=str, keep_default_na=False).iloc[0]
+        return elapsed, peak_mb, f"{int((row != 'N/A').sum())}/{len(row)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTTP and Selenium extraction on local fixtures")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    base_url = serve_fixtures()
+    fixtures = sorted(p.name for p in FIXTURES_DIR.glob("*.html"))
+
+    print(f"{'fixture':<20} {'mode':<9} {'median s':>9} {'max s':>7} {'peak MB':>8} {'fields':>7}")
+    for fixture in fixtures:
+        for mode in args.modes:
+            runs = [run_once(f"{base_url}/{fixture}", mode) for _ in range(args.repeats)]
+            times = [elapsed for elapsed, _, _ in runs]
+            peaks = [peak for _, peak, _ in runs if peak is not None]
+            found = runs[-1][2]
+            print(
+                f"{fixture:<20} {mode:<9} {statistics.median(times):>9.2f} {max(times):>7.2f} "
+                f"{max(peaks) if peaks else float('nan'):>8.1f} "
+                f"{found or 'failed':>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Typed quote snapshots, buffered time-series storage and latency histograms
+for the poll mode of scraper.py.
+
+- parse_quote() turns the scraped text ('229,87', '(+1,24%)', '45.678.901',
+  '226,50-230,10') into typed numerics.
+- QuoteStore buffers snapshots in memory and flushes them in batches, either
+  to date-partitioned Parquet files (<dir>/date=YYYY-MM-DD/*.parquet) or to a
+  SQLite table indexed by date.
+- LatencyHistogram keeps fixed-bucket counts plus recent samples for
+  percentiles.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+import sqlite3
+import time
+from collections import deque
+from pathlib import Path
+
+import pandas as pd
+
+STORE_FORMATS = ["parquet", "sqlite"]
+FLUSH_ROWS = 500      # Flush once this many snapshots are buffered...
+FLUSH_SECONDS = 60    # ...or when the oldest buffered snapshot is this old
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]  # Upper bounds in seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    timestamp TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    price REAL,
+    change_pct REAL,
+    volume REAL,
+    day_low REAL,
+    day_high REAL
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_date_ticker ON quotes (date, ticker);
+"""
+
+_NUMBER = re.compile(r"[-+−]?\d[\d.,]*\s*[KMB]?", re.IGNORECASE)
+_SUFFIXES = {"K": 1e3, "M": 1e6, "B": 1e9}
+
+
+def parse_number(text) -> float | None:
+    """
+    Parses a number in Spanish notation ('.' thousands, ',' decimals), with an
+    optional sign, % sign and K/M/B suffix. Returns None for 'N/A' and the like.
+    """
+    if not isinstance(text, str):
+        return None
+    match = _NUMBER.search(text)
+    if match is None:
+        return None
+    token = match.group(0).replace("−", "-").replace(" ", "")
+    multiplier = _SUFFIXES.get(token[-1].upper(), 1)
+    if multiplier != 1:
+        token = token[:-1]
+    try:
+        return float(token.replace(".", "").replace(",", ".")) * multiplier
+    except ValueError:
+        return None
+
+
+def parse_range(text) -> tuple:
+    """'226,50 - 230,10' -> (226.5, 230.1); (None, None) if it cannot be parsed."""
+    if not isinstance(text, str):
+        return None, None
+    bounds = [parse_number(part) for part in re.split(r"\s*-\s*", text.strip()) if part]
+    return (bounds[0], bounds[1]) if len(bounds) == 2 else (None, None)
+
+
+def parse_quote(row: dict, timestamp: pd.Timestamp) -> dict:
+    """One scraped row (text fields) -> one typed snapshot."""
+    day_low, day_high = parse_range(row.get("Day_Range"))
+    return {
+        "timestamp": timestamp,
+        "ticker": row["Ticker"],
+        "price": parse_number(row.get("Current_Price")),
+        "change_pct": parse_number(row.get("Daily_Change_Percent")),
+        "volume": parse_number(row.get("Volume")),
+        "day_low": day_low,
+        "day_high": day_high,
+    }
+
+
+class QuoteStore:
+    """Buffered, append-only store for quote snapshots."""
+
+    def __init__(self, path, fmt="parquet", flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS):
+        if fmt not in STORE_FORMATS:
+            raise ValueError(f"Unknown store format '{fmt}' (expected one of {STORE_FORMATS})")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.buffer = []
+        self.buffered_since = None
+        self.rows_written = 0
+        self.flushes = 0
+        if fmt == "sqlite":
+            self.conn = sqlite3.connect(self.path)
+            self.conn.executescript(SCHEMA)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def append(self, snapshots: list):
+        """Buffers snapshots and flushes when the batch is full or old enough."""
+        if not snapshots:
+            return
+        if not self.buffer:
+            self.buffered_since = time.monotonic()
+        self.buffer.extend(snapshots)
+        if len(self.buffer) >= self.flush_rows or time.monotonic() - self.buffered_since >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        df = pd.DataFrame(self.buffer)
+        df["date"] = df["timestamp"].dt.strftime("%Y-%m-%d")
+        if self.fmt == "sqlite":
+            df["timestamp"] = df["timestamp"].map(lambda ts: ts.isoformat())
+            columns = ["timestamp", "date", "ticker", "price", "change_pct", "volume", "day_low", "day_high"]
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO quotes ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None),
+                )
+        else:
+            # One file per flush and day, so a batch that spans midnight lands in both partitions
+            stamp = time.strftime("%H%M%S")
+            for date, part in df.groupby("date"):
+                partition = self.path / f"date={date}"
+                partition.mkdir(exist_ok=True)
+                part.drop(columns="date").to_parquet(
+                    partition / f"quotes-{stamp}-{self.flushes:05d}.parquet", index=False
+                )
+        self.rows_written += len(df)
+        self.flushes += 1
+        self.buffer = []
+        self.buffered_since = None
+
+    def close(self):
+        self.flush()
+        if self.fmt == "sqlite":
+            self.conn.close()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentiles over the last `window` samples."""
+
+    def __init__(self, name, buckets=LATENCY_BUCKETS, window=1000):
+        self.name = name
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last bucket: above the largest bound
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float:
+        return float(pd.Series(self.samples).quantile(q)) if self.samples else float("nan")
+
+    def report(self) -> str:
+        total = sum(self.counts)
+        lines = [f"{self.name}: {total} samples, p50 {self.percentile(0.5):.3f}s, "
+                 f"p95 {self.percentile(0.95):.3f}s, max {max(self.samples, default=float('nan')):.3f}s"]
+        labels = [f"<= {bound}s" for bound in self.buckets] + [f"> {self.buckets[-1]}s"]
+        for label, count in zip(labels, self.counts):
+            if count:
+                bar = "#" * max(1, round(40 * count / total))
+                lines.append(f"  {label:>9} {count:>6} {bar}")
+        return "\n".join(lines)
@@ -1,59 +1,151 @@
+from __future__ import annotations
+
+import argparse
+import math
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+import requests
+import lxml.html
 import time
 import os
 
+from quote_store import FLUSH_ROWS, FLUSH_SECONDS, STORE_FORMATS, LatencyHistogram, QuoteStore, parse_quote
+from request_scheduler import RequestScheduler
+
+# Selenium is only needed for the browser fallback
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    webdriver = None
 # --- 1. CONFIGURATION ---
-TARGET_URL = "https://es.investing.com/equities/apple-computer-inc"
+BASE_URL = "https://es.investing.com"
+TARGET_URL = f"{BASE_URL}/equities/apple-computer-inc"
 OUTPUT_FILE = "investing_data_output.csv"
-WAIT_TIMEOUT = 10 # Maximum seconds to wait for an element to appear
+STORE_PATHS = {"parquet": "quotes_store", "sqlite": "quotes.sqlite"} # Poll mode defaults
+WAIT_TIMEOUT = 10 # Maximum seconds to wait for the page to be ready
+HTTP_TIMEOUT = 15 # Seconds for the plain HTTP request
+RATE_LIMIT = None # Requests per second per host (None: no rate limit, opt in with --rate)
+MAX_RETRIES = 3 # Retries on 429/503 (after Retry-After), 5xx and connection errors
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Output column -> (label, XPath). The same expressions are used against the
+# server-rendered HTML (lxml) and the live DOM (Selenium).
+FIELDS = {
+    "Current_Price": ("Current Price", '//*[@data-test="instrument-price-last"]'),
+    "Daily_Change_Percent": ("Daily Change (%)", '//*[@data-test="instrument-price-change-percent"]'),
+    "Volume": ("Volume", "//dt[text()='Volumen']/following-sibling::dd[1]"),
+    "Day_Range": ("Day's Range", "//dt[text()='Rango día']/following-sibling::dd[1]"),
+}
+READY_FIELD = "Current_Price" # The page counts as rendered once this field is visible
+
+# Evaluates every XPath in one round trip and returns {column: text or null}
+EXTRACT_SCRIPT = """
+const out = {};
+for (const [column, xpath] of Object.entries(arguments[0])) {
+    const node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    const text = node ? node.innerText.trim() : "";
+    out[column] = text || null;
+}
+return out;
+"""
 
-# --- 2. ROBUST EXTRACTION HELPER FUNCTION ---
+# --- 2. ROBUST EXTRACTION HELPER FUNCTIONS ---
 
-def get_element_text(driver: webdriver.Chrome, by: By, selector: str, timeout: int) -> str:
+def wait_until_ready(driver: webdriver.Chrome, timeout: int) -> bool:
     """
-    Explicitly waits for an element to be visible and extracts its text.
-    Handles errors if the element is not found after the timeout.
-    
+    Single readiness wait: the document has loaded and READY_FIELD is visible.
+
     Args:
         driver: The Selenium driver instance.
-        by: The selection method (By.CSS_SELECTOR, By.XPATH, etc.).
-        selector: The selector string.
         timeout: Maximum wait time in seconds.
 
     Returns:
-        The element's text (.strip()) or 'N/A' if not found.
+        True if the page became ready, False on timeout (extraction can still
+        pick up whatever fields did render).
     """
     try:
-        # 1. Wait for the element to be visible
-        element = WebDriverWait(driver, timeout).until(
-            EC.visibility_of_element_located((by, selector))
+        WebDriverWait(driver, timeout).until(
+            EC.visibility_of_element_located((By.XPATH, FIELDS[READY_FIELD][1]))
         )
-        # 2. Extract and clean text
-        return element.text.strip()
-    
+        return True
     except TimeoutException:
-        print(f"  Error (Timeout): Element not found or visible -> {selector}")
-        return "N/A"
-    except Exception as e:
-        print(f"  Error extracting '{selector}': {e}")
-        return "Error"
+        print(f"  Error (Timeout): page not ready after {timeout}s")
+        return False
 
-# --- 3. MAIN SCRIPT ---
 
-def main():
+def extract_from_driver(driver: webdriver.Chrome, columns: list) -> dict:
     """
-    Main function that runs the scraper.
+    Extracts all requested fields from the live DOM with one execute_script
+    call instead of one wait + lookup per field.
+
+    Returns:
+        A dictionary column -> text, with None for fields not in the DOM.
+    """
+    return driver.execute_script(EXTRACT_SCRIPT, {column: FIELDS[column][1] for column in columns})
+
+
+def extract_from_html(html: str | bytes) -> dict:
+    """
+    Extracts every field in FIELDS from server-rendered HTML.
+
+    Args:
+        html: The page source as returned by the server (bytes let lxml honour
+            the page's <meta charset>).
+
+    Returns:
+        A dictionary column -> text, with None for fields not present in the HTML.
+    """
+    root = lxml.html.document_fromstring(html)
+    data = {}
+    for column, (label, xpath) in FIELDS.items():
+        matches = root.xpath(xpath)
+        # Collapse whitespace the way a browser renders it
+        text = " ".join(matches[0].text_content().split()) if matches else ""
+        data[column] = text or None
+    return data
+
+
+def scrape_http(url: str, session: requests.Session | RequestScheduler | None = None) -> dict:
+    """
+    Fetches the page over plain HTTP (no browser) and extracts the fields.
+    Pass a session (or a RequestScheduler wrapping one) to reuse its
+    connections across tickers.
+
+    Returns:
+        A dictionary column -> text (None for missing fields). All fields are
+        None if the request itself fails (e.g. blocked or offline).
     """
-    
-    # --- 3.1. CONFIGURE SELENIUM (HEADLESS MODE) ---
+    try:
+        response = (session or requests).get(url, timeout=HTTP_TIMEOUT,
+                                headers={"User-Agent": USER_AGENT, "Accept-Language": "es-ES,es;q=0.9"})
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"  HTTP request failed: {e}")
+        return dict.fromkeys(FIELDS)
+    # Raw bytes: a missing charset header must not turn 'Rango día' into mojibake
+    return extract_from_html(response.content)
+
+
+def make_driver() -> webdriver.Chrome | None:
+    """
+    Configures a headless Chrome driver.
+
+    Returns:
+        The driver, or None if Selenium/Chrome is not available.
+    """
+    if webdriver is None:
+        print("Critical error: Selenium is not installed (pip install selenium webdriver-manager).")
+        return None
+
     print("Configuring Selenium driver in headless mode...")
     chrome_options = Options()
     chrome_options.add_argument("--headless=new") # New headless mode
@@ -61,72 +153,293 @@ def main():
     chrome_options.add_argument("--window-size=1920,1080") # Define window size
     chrome_options.add_argument("--log-level=3") # Reduce console logs
     chrome_options.add_argument("--disable-gpu") # Often necessary in headless
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
 
     # Use webdriver_manager to install/manage the driver automatically
     try:
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=chrome_options)
         print("Driver configured successfully.")
+        return driver
     except Exception as e:
         print(f"Critical error initializing WebDriver: {e}")
         print("Ensure Google Chrome is installed.")
-        return
+        return None
 
-    # Dictionary to store extracted data
-    data = {}
 
-    try:
-        # --- 3.2. OPEN URL ---
-        print(f"Opening URL: {TARGET_URL}")
-        driver.get(TARGET_URL)
-        
-        # Optional: Short pause to allow initial JS to settle
-        # time.sleep(1) 
-
-        # --- 3.3. DATA EXTRACTION WITH EXPLICIT WAITS ---
-        print("Starting key data extraction...")
-
-        # A. Current Price
-        price = get_element_text(driver, By.CSS_SELECTOR, '[data-test="instrument-price-last"]', WAIT_TIMEOUT)
-        data['Current_Price'] = price
-        print(f"  Current Price: {price}")
-
-        # B. Daily Change (%)
-        change_perc = get_element_text(driver, By.CSS_SELECTOR, '[data-test="instrument-price-change-percent"]', WAIT_TIMEOUT)
-        data['Daily_Change_Percent'] = change_perc
-        print(f"  Daily Change (%): {change_perc}")
-
-        # C. Volume (Using XPath for 'following-sibling')
-        volume = get_element_text(driver, By.XPATH, "//dt[text()='Volumen']/following-sibling::dd[1]", WAIT_TIMEOUT)
-        data['Volume'] = volume
-        print(f"  Volume: {volume}")
-
-        # D. Day's Range (Using XPath for 'following-sibling')
-        day_range = get_element_text(driver, By.XPATH, "//dt[text()='Rango día']/following-sibling::dd[1]", WAIT_TIMEOUT)
-        data['Day_Range'] = day_range
-        print(f"  Day's Range: {day_range}")
-
-        # --- 3.4. SAVE DATA TO CSV ---
-        print("\nExtraction complete. Saving to CSV...")
-        
-        # Create Pandas DataFrame from the dictionary (single row)
-        # Use [data] to create a list of a single dictionary
-        df = pd.DataFrame([data])
-        
-        # Save to CSV
-        df.to_csv(OUTPUT_FILE, index=False, encoding='utf-8-sig')
-        print(f"Data saved successfully to '{os.path.abspath(OUTPUT_FILE)}'")
+def scrape_selenium(url: str, columns: list, driver: webdriver.Chrome | None = None) -> dict:
+    """
+    Opens the page in headless Chrome and extracts the requested fields.
 
+    Args:
+        url: The page to open.
+        columns: The FIELDS keys to extract.
+        driver: A warm driver to reuse; if None, one is started and closed here.
+
+    Returns:
+        A dictionary column -> text (None for missing fields); empty if the
+        browser could not be started or the page failed to load.
+    """
+    own_driver = driver is None
+    if own_driver:
+        driver = make_driver()
+        if driver is None:
+            return {}
+
+    data = {}
+    try:
+        print(f"Opening URL: {url}")
+        driver.get(url)
+        wait_until_ready(driver, WAIT_TIMEOUT)
+        data = extract_from_driver(driver, columns)
     except Exception as e:
-        print(f"An unexpected error occurred in the main process: {e}")
-    
+        print(f"An unexpected error occurred in the browser session: {e}")
     finally:
-        # --- 3.5. CLEANUP ---
-        if 'driver' in locals():
+        if own_driver:
             driver.quit()
             print("Browser closed cleanly.")
+    return data
+
+
+def ticker_url(ticker: str) -> str:
+    """Accepts a full URL or an Investing.com equity slug (e.g. 'apple-computer-inc')."""
+    return ticker if ticker.startswith(("http://", "https://")) else f"{BASE_URL}/equities/{ticker}"
+
+
+class BrowserPool:
+    """
+    One lazily started driver per worker thread, reused for every ticker that
+    thread handles; all of them are closed by close().
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def get(self) -> webdriver.Chrome | None:
+        if not hasattr(self._local, "driver"):
+            self._local.driver = make_driver()
+            if self._local.driver is not None:
+                with self._lock:
+                    self._drivers.append(self._local.driver)
+        return self._local.driver
+
+    def close(self):
+        for driver in self._drivers:
+            driver.quit()
+        if self._drivers:
+            print(f"{len(self._drivers)} browser session(s) closed cleanly.")
+        self._drivers = []
+
+
+def scrape_ticker(ticker: str, mode: str, session: requests.Session | RequestScheduler, browsers: BrowserPool) -> dict:
+    """
+    Scrapes one ticker (HTTP first in 'auto' mode, browser for missing fields).
+
+    Returns:
+        A result row: Ticker, the FIELDS columns ('N/A' when missing), the
+        Source that was used, Latency_s and Failed_Fields.
+    """
+    url = ticker_url(ticker)
+    start = time.perf_counter()
+    data, source = {}, "http"
+
+    if mode in ("auto", "http"):
+        data = scrape_http(url, session)
+    missing = [column for column in FIELDS if data.get(column) is None]
+
+    if missing and mode != "http":
+        if mode == "auto":
+            print(f"  {ticker}: missing from the HTML: {', '.join(missing)}. Falling back to Selenium...")
+        driver = browsers.get()
+        if driver is not None:
+            source = "selenium" if mode == "selenium" else "http+selenium"
+            data.update({column: value for column, value in scrape_selenium(url, missing, driver).items() if value})
+        elif mode == "selenium":
+            # No request was made at all
+            source = "selenium (unavailable)"
+
+    row = {"Ticker": ticker}
+    row.update({column: data.get(column) or "N/A" for column in FIELDS})
+    row["Source"] = source
+    row["Latency_s"] = round(time.perf_counter() - start, 3)
+    row["Failed_Fields"] = sum(row[column] == "N/A" for column in FIELDS)
+    return row
+
+
+class QuoteScraper:
+    """
+    The HTTP session, browser pool and worker threads, kept warm across
+    batches (one batch per run, or one per poll in --poll mode). HTTP requests
+    go through a RequestScheduler: concurrency per host backs off on 429/503
+    and honours Retry-After, optionally under a `rate` requests/second cap.
+    """
+
+    def __init__(self, mode: str, sessions: int = 1, rate: float | None = RATE_LIMIT,
+                 max_retries: int = MAX_RETRIES):
+        self.mode = mode
+        self.browsers = BrowserPool()
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "es-ES,es;q=0.9"})
+        self.http = RequestScheduler(self.session, rate=rate, max_concurrency=sessions, max_retries=max_retries)
+        self.pool = ThreadPoolExecutor(max_workers=sessions)
+
+    def scrape(self, tickers: list) -> pd.DataFrame:
+        """One row per ticker, in input order."""
+        return pd.DataFrame(self.pool.map(lambda ticker: scrape_ticker(ticker, self.mode, self.http, self.browsers), tickers))
+
+    def close(self):
+        self.pool.shutdown()
+        self.browsers.close()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def scrape_batch(tickers: list, mode: str, sessions: int = 1, rate: float | None = RATE_LIMIT,
+                 max_retries: int = MAX_RETRIES) -> pd.DataFrame:
+    """
+    Scrapes every ticker with `sessions` workers. The HTTP session and each
+    worker's browser are reused across tickers instead of one launch per quote.
+
+    Returns:
+        One row per ticker, in input order.
+    """
+    with QuoteScraper(mode, sessions, rate, max_retries) as scraper:
+        return scraper.scrape(tickers)
+
+
+def poll(tickers: list, mode: str, sessions: int, interval: float, store: QuoteStore,
+         max_polls: int | None = None, report_every: int = 10, rate: float | None = RATE_LIMIT,
+         max_retries: int = MAX_RETRIES):
+    """
+    Scrapes the tickers every `interval` seconds (fixed rate; missed ticks are
+    skipped, not queued) over warm sessions, appending typed snapshots to the
+    store until Ctrl+C or max_polls.
+    """
+    poll_latency = LatencyHistogram("Per-poll latency")
+    ticker_latency = LatencyHistogram("Per-ticker latency")
+    polls = 0
+    next_tick = time.monotonic()
+    with QuoteScraper(mode, sessions, rate, max_retries) as scraper:
+        try:
+            while max_polls is None or polls < max_polls:
+                start = time.perf_counter()
+                timestamp = pd.Timestamp.now(tz="UTC")
+                df = scraper.scrape(tickers)
+                elapsed = time.perf_counter() - start
+                poll_latency.observe(elapsed)
+                for latency in df["Latency_s"]:
+                    ticker_latency.observe(latency)
+                store.append([parse_quote(row, timestamp) for row in df.to_dict("records")])
+                polls += 1
+                print(f"Poll {polls}: {int((df['Failed_Fields'] == 0).sum())}/{len(df)} complete in {elapsed:.2f}s, "
+                      f"{len(store.buffer)} buffered, {store.rows_written} written")
+                if polls % report_every == 0:
+                    print(poll_latency.report())
+                if max_polls is not None and polls >= max_polls:
+                    break
+                next_tick += interval
+                now = time.monotonic()
+                if next_tick < now:
+                    # The poll overran: resume on the next tick of the original schedule
+                    next_tick += math.ceil((now - next_tick) / interval) * interval
+                time.sleep(next_tick - now)
+        except KeyboardInterrupt:
+            print("\nStopping poll mode...")
+        finally:
+            store.close()
+    print(f"\n{polls} poll(s), {store.rows_written} snapshot(s) written to '{os.path.abspath(store.path)}' "
+          f"in {store.flushes} flush(es)")
+    print(poll_latency.report())
+    print(ticker_latency.report())
+
+
+def print_batch_report(df: pd.DataFrame):
+    """Per-ticker latency and failures, plus totals."""
+    print("\nPer-ticker results:")
+    width = df["Ticker"].str.len().max()
+    for row in df.itertuples(index=False):
+        print(f"  {row.Ticker:<{width}} {row.Latency_s:>7.2f}s  {row.Source:<22} {row.Failed_Fields} failed field(s)")
+    failed = int((df["Failed_Fields"] > 0).sum())
+    print(f"Tickers: {len(df)}, with failures: {failed}, failed fields: {int(df['Failed_Fields'].sum())}")
+    print(f"Latency: median {statistics.median(df['Latency_s']):.2f}s, max {df['Latency_s'].max():.2f}s")
+
+# --- 3. MAIN SCRIPT ---
+
+def main():
+    """
+    Main function that runs the scraper.
+
+    By default the page is fetched over plain HTTP and parsed without a
+    browser; Selenium is only launched for fields missing from the
+    server-rendered HTML. With --tickers, many quotes are scraped in one run
+    over shared HTTP/browser sessions.
+    """
+    parser = argparse.ArgumentParser(description="Scrape stock quotes from Investing.com into a CSV")
+    parser.add_argument("--url", default=TARGET_URL, help="Stock page (default: %(default)s)")
+    parser.add_argument("--tickers", nargs="+", help="Batch mode: equity slugs or URLs (one row per ticker)")
+    parser.add_argument("--tickers-file", help="Batch mode: file with one slug or URL per line")
+    parser.add_argument("--sessions", type=int, default=1, help="Parallel workers/browser sessions in batch mode (default: %(default)s)")
+    parser.add_argument("--poll", type=float, metavar="SECONDS",
+                        help="Poll mode: scrape every N seconds and append typed snapshots to --store")
+    parser.add_argument("--max-polls", type=int, help="Stop poll mode after this many polls (default: run until Ctrl+C)")
+    parser.add_argument("--store", help="Poll mode output: Parquet directory or SQLite file (default: quotes_store / quotes.sqlite)")
+    parser.add_argument("--store-format", default="parquet", choices=STORE_FORMATS,
+                        help="parquet: date=YYYY-MM-DD partitions; sqlite: one table indexed by date (default: %(default)s)")
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS, help="Flush the write buffer every N snapshots (default: %(default)s)")
+    parser.add_argument("--flush-seconds", type=float, default=FLUSH_SECONDS,
+                        help="...or when the oldest buffered snapshot is this old (default: %(default)s)")
+    parser.add_argument("--report-every", type=int, default=10, help="Print the latency histogram every N polls (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT,
+                        help="Max HTTP requests/second per host (default: no rate limit; concurrency still backs off on 429/503)")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES,
+                        help="HTTP retries per page, honouring Retry-After on 429/503 (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Output CSV (default: %(default)s)")
+    parser.add_argument("--mode", default="auto", choices=["auto", "http", "selenium"],
+                        help="auto: HTTP first, Selenium only for missing fields (default); "
+                             "http: never launch a browser; selenium: browser only")
+    args = parser.parse_args()
+
+    tickers = list(args.tickers or [])
+    if args.tickers_file:
+        with open(args.tickers_file, encoding="utf-8") as f:
+            tickers += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    batch = bool(tickers)
+
+    if args.poll:
+        store = QuoteStore(args.store or STORE_PATHS[args.store_format], args.store_format,
+                           args.flush_rows, args.flush_seconds)
+        print(f"Polling {len(tickers) if batch else 1} page(s) every {args.poll}s in '{args.mode}' mode (Ctrl+C to stop)...")
+        poll(tickers if batch else [args.url], args.mode, args.sessions, args.poll, store,
+             args.max_polls, args.report_every, args.rate, args.max_retries)
+        return
+
+    start = time.perf_counter()
+
+    # --- 3.1. EXTRACTION (HTTP FIRST, SELENIUM FALLBACK) ---
+    print(f"Scraping {len(tickers) if batch else 1} page(s) in '{args.mode}' mode...")
+    df = scrape_batch(tickers if batch else [args.url], args.mode, args.sessions, args.rate, args.max_retries)
+
+    if batch:
+        print_batch_report(df)
+        columns = ["Ticker", *FIELDS]
+    else:
+        print("Extracted data:")
+        for column, (label, xpath) in FIELDS.items():
+            print(f"  {label}: {df.at[0, column]}")
+        columns = list(FIELDS)
+
+    # --- 3.2. SAVE DATA TO CSV ---
+    print("\nExtraction complete. Saving to CSV...")
+    df[columns].to_csv(args.output, index=False, encoding='utf-8-sig')
+    print(f"Data saved successfully to '{os.path.abspath(args.output)}'")
+    print(f"Done in {time.perf_counter() - start:.2f}s")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
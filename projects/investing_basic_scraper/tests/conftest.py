@@ -0,0 +1,52 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# the tests import the project's modules (scraper.py, ...) from the parent folder
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+FIXTURES = PROJECT_DIR / "fixtures"
+
+
+class FirstRequestThrottled(BaseHTTPRequestHandler):
+    """
+    Serves fixtures/<name>.html, but answers the first request for each path
+    with 429 + Retry-After, like a site that throttles a burst of new clients.
+    """
+
+    def do_GET(self):
+        with self.server.lock:
+            first = self.path not in self.server.seen
+            self.server.seen.add(self.path)
+        if first:
+            self.send_response(429)
+            self.send_header("Retry-After", "0.2")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        name = self.path.strip("/").split("/")[0]
+        body = (FIXTURES / f"{name}.html").read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttling_server():
+    """Base URL of the local fixture server; /quote/<anything> serves fixtures/quote.html."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FirstRequestThrottled)
+    server.lock = threading.Lock()
+    server.seen = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
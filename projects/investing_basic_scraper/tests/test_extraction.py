@@ -0,0 +1,35 @@
+from pathlib import Path
+
+import pytest
+
+import scraper
+from scraper import FIELDS, BrowserPool, extract_from_html, scrape_ticker
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures"
+FULL = {
+    "Current_Price": "229,87",
+    "Daily_Change_Percent": "(+1,24%)",
+    "Volume": "45.678.901",
+    "Day_Range": "226,50-230,10",
+}
+
+
+@pytest.mark.parametrize("fixture, missing", [
+    ("quote.html", []),
+    ("quote_partial.html", ["Day_Range"]),  # rendered client-side only
+])
+def test_extract_from_html(fixture, missing):
+    data = extract_from_html((FIXTURES / fixture).read_bytes())
+
+    assert set(data) == set(FIELDS)
+    assert [column for column, value in data.items() if value is None] == missing
+    assert {column: value for column, value in data.items() if value is not None} == \
+        {column: value for column, value in FULL.items() if column not in missing}
+
+
+def test_selenium_mode_without_a_browser(monkeypatch):
+    monkeypatch.setattr(scraper, "make_driver", lambda: None)
+    row = scrape_ticker("apple-computer-inc", "selenium", session=None, browsers=BrowserPool())
+
+    assert row["Source"] == "selenium (unavailable)"
+    assert row["Failed_Fields"] == len(FIELDS)
@@ -0,0 +1,27 @@
+import sqlite3
+
+import pandas as pd
+
+from quote_store import QuoteStore
+from scraper import FIELDS, poll, scrape_batch
+
+
+def test_batch_mode_waits_out_429(throttling_server):
+    urls = [f"{throttling_server}/quote/{ticker}" for ticker in ("a", "b", "c")]
+    df = scrape_batch(urls, "http", sessions=3)
+
+    assert list(df["Ticker"]) == urls
+    assert (df["Failed_Fields"] == 0).all()
+    assert (df[list(FIELDS)] != "N/A").all().all()
+    # each ticker was throttled once and retried after Retry-After
+    assert (df["Latency_s"] >= 0.2).all()
+
+
+def test_poll_mode_waits_out_429(throttling_server, tmp_path):
+    store = QuoteStore(str(tmp_path / "quotes.sqlite"), "sqlite", flush_rows=1, flush_seconds=60)
+    poll([f"{throttling_server}/quote/a"], "http", sessions=1, interval=0.01, store=store, max_polls=2)
+
+    assert store.rows_written == 2
+    with sqlite3.connect(tmp_path / "quotes.sqlite") as conn:
+        prices = pd.read_sql_query("SELECT * FROM quotes", conn)
+    assert prices.notna().all().all()
@@ -0,0 +1,255 @@
+# data_loader.py
+# Scale-factor data generator with parallel COPY loading (Python alternative to setup_tablas.sql)
+# Generador de datos por factor de escala con carga COPY en paralelo (alternativa a setup_tablas.sql)
+
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import psycopg2
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+CLIENTS_PER_SCALE = 50_000      # Scale 1 == setup_tablas.sql / Escala 1 == setup_tablas.sql
+ORDERS_PER_SCALE = 500_000
+MAX_ORDERS = 100_000_000        # Upper bound (scale 200) / Límite superior (escala 200)
+CHUNK_ROWS = 500_000            # Rows generated and streamed per COPY / Filas generadas y enviadas por COPY
+REGIONS = ["Norte", "Sur", "Este", "Oeste", "Centro"]
+ESTADOS = ["Completada", "Pendiente", "Cancelada"]
+DAYS_BACK = 365
+
+# Same columns as setup_tablas.sql, without constraints: the PK and UNIQUE are built after the load
+# Mismas columnas que setup_tablas.sql, sin restricciones: la PK y el UNIQUE se crean tras la carga
+SCHEMA = [
+    "DROP TABLE IF EXISTS resumen_clientes",
+    "DROP TABLE IF EXISTS ordenes",
+    "DROP TABLE IF EXISTS clientes",
+    """CREATE TABLE clientes (
+        cliente_id INT NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        region VARCHAR(50)
+    )""",
+    """CREATE TABLE ordenes (
+        orden_id BIGINT NOT NULL,
+        cliente_id INT NOT NULL,
+        fecha_orden DATE NOT NULL,
+        monto NUMERIC(10, 2) NOT NULL,
+        estado VARCHAR(20)
+    )""",
+]
+CONSTRAINTS = [
+    "ALTER TABLE clientes ADD PRIMARY KEY (cliente_id)",
+    "ALTER TABLE clientes ADD CONSTRAINT clientes_email_key UNIQUE (email)",
+    "ALTER TABLE ordenes ADD PRIMARY KEY (orden_id)",
+]
+
+
+@dataclass
+class LoadConfig:
+    """
+    scale 1 = 50k clientes / 500k ordenes. zipf = 0 draws cliente_id uniformly; s > 0
+    gives the k-th most active client a weight of 1/k^s. region_weights are relative
+    (REGIONS order).
+    escala 1 = 50k clientes / 500k ordenes. zipf = 0 reparte cliente_id uniformemente;
+    s > 0 da al k-ésimo cliente más activo un peso de 1/k^s. region_weights son relativos.
+    """
+    scale: float = 1.0
+    zipf: float = 0.0
+    region_weights: Tuple[float, ...] = (1, 1, 1, 1, 1)
+    workers: int = 4
+    chunk_rows: int = CHUNK_ROWS
+    seed: int = 42
+
+    @property
+    def n_clients(self) -> int:
+        return max(1, int(CLIENTS_PER_SCALE * self.scale))
+
+    @property
+    def n_orders(self) -> int:
+        return max(1, int(ORDERS_PER_SCALE * self.scale))
+
+
+def parse_region_weights(text: str) -> Tuple[float, ...]:
+    """'40,15,15,15,15' -> weights for Norte, Sur, Este, Oeste, Centro."""
+    weights = tuple(float(w) for w in text.split(","))
+    if len(weights) != len(REGIONS) or min(weights) < 0 or sum(weights) <= 0:
+        raise ValueError(f"Expected {len(REGIONS)} non-negative weights for {', '.join(REGIONS)}")
+    return weights
+
+
+# --- Per-process state / Estado por proceso ---
+# Each worker keeps one connection and, for skewed loads, the client-rank CDF,
+# so neither is rebuilt per chunk.
+# Cada worker mantiene una conexión y, con sesgo, la CDF de rangos de clientes.
+_worker = {}
+
+
+def _init_worker(conn_params: dict, config: LoadConfig):
+    _worker["conn"] = psycopg2.connect(**conn_params)
+    # Pool workers leave through os._exit, which skips atexit; multiprocessing finalizers still run
+    # Los workers terminan con os._exit (sin atexit); los finalizadores de multiprocessing sí se ejecutan
+    util.Finalize(None, _worker["conn"].close, exitpriority=10)
+    _worker["config"] = config
+    if config.zipf > 0:
+        ranks = np.arange(1, config.n_clients + 1, dtype=np.float64)
+        cdf = np.cumsum(ranks ** -config.zipf)
+        _worker["cdf"] = cdf / cdf[-1]
+        # Hot clients spread over all ids (and regions) instead of the lowest ids
+        # Los clientes más activos se reparten entre todos los ids (y regiones)
+        _worker["rank_to_id"] = np.random.default_rng(config.seed).permutation(config.n_clients).astype(np.int32) + 1
+
+
+def _clientes_chunk(rng: np.random.Generator, start: int, stop: int, config: LoadConfig) -> pa.Table:
+    ids = pa.array(np.arange(start, stop, dtype=np.int64)).cast(pa.string())
+    weights = np.asarray(config.region_weights, dtype=np.float64)
+    return pa.table({
+        "cliente_id": ids,
+        "nombre": pc.binary_join_element_wise("Cliente ", ids, ""),
+        "email": pc.binary_join_element_wise("cliente", ids, "@ejemplo.com", ""),
+        "region": pa.DictionaryArray.from_arrays(
+            rng.choice(len(REGIONS), size=stop - start, p=weights / weights.sum()), pa.array(REGIONS)),
+    })
+
+
+def _ordenes_chunk(rng: np.random.Generator, start: int, stop: int, config: LoadConfig) -> pa.Table:
+    n = stop - start
+    if config.zipf > 0:
+        cliente_id = _worker["rank_to_id"][np.searchsorted(_worker["cdf"], rng.random(n))]
+    else:
+        cliente_id = rng.integers(1, config.n_clients + 1, size=n)
+    # Dates, amounts and states have small domains: dictionary-encode random indices into
+    # pre-formatted text instead of formatting every row
+    # Fechas, montos y estados tienen dominios pequeños: índices aleatorios sobre texto
+    # preformateado en vez de formatear cada fila
+    dates, amounts = _lookup_tables()
+    return pa.table({
+        "orden_id": np.arange(start, stop, dtype=np.int64),
+        "cliente_id": cliente_id,
+        "fecha_orden": pa.DictionaryArray.from_arrays(rng.integers(0, len(dates), size=n), dates),
+        "monto": pa.DictionaryArray.from_arrays(rng.integers(0, len(amounts), size=n), amounts),
+        "estado": pa.DictionaryArray.from_arrays(rng.integers(0, len(ESTADOS), size=n), pa.array(ESTADOS)),
+    })
+
+
+def _lookup_tables() -> Tuple[pa.Array, pa.Array]:
+    if "dates" not in _worker:
+        today = np.datetime64("today", "D")
+        _worker["dates"] = pa.array((today - np.arange(DAYS_BACK + 1).astype("timedelta64[D]")).astype(str))
+        # Every NUMERIC(10, 2) amount from 10.00 to 1010.00, like setup_tablas.sql
+        # Todos los montos NUMERIC(10, 2) de 10.00 a 1010.00, como setup_tablas.sql
+        _worker["amounts"] = pa.array([f"{cents // 100}.{cents % 100:02d}" for cents in range(1000, 101001)])
+    return _worker["dates"], _worker["amounts"]
+
+
+GENERATORS = {"clientes": _clientes_chunk, "ordenes": _ordenes_chunk}
+# COPY text format: tab-separated, no quoting (the generated values never contain tabs or backslashes)
+# Formato text de COPY: separado por tabuladores, sin comillas (los valores nunca tienen tabs ni barras)
+COPY_FORMAT = pa_csv.WriteOptions(include_header=False, delimiter="\t", quoting_style="none")
+
+
+def _load_chunk(task: Tuple[str, int, int, int]) -> Tuple[str, int, float, float]:
+    """
+    Generates one chunk and streams it with COPY FROM STDIN.
+    Returns (table, rows, generate seconds, copy seconds).
+    Genera un bloque y lo envía con COPY FROM STDIN.
+    """
+    table, index, start, stop = task
+    config = _worker["config"]
+    began = time.perf_counter()
+    try:
+        # Seeded per chunk: the same config always produces the same data, whatever the worker count
+        # Semilla por bloque: la misma configuración produce los mismos datos con cualquier número de workers
+        rng = np.random.default_rng([config.seed, list(GENERATORS).index(table), index])
+        buffer = io.BytesIO()
+        pa_csv.write_csv(GENERATORS[table](rng, start, stop, config), buffer, COPY_FORMAT)
+        buffer.seek(0)
+        generated = time.perf_counter()
+        conn = _worker["conn"]
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT text)", buffer)
+        conn.commit()
+    except Exception as e:
+        # Name the chunk; a plain RuntimeError also pickles back to the parent whatever the cause
+        # Identifica el bloque; un RuntimeError simple vuelve al proceso padre sea cual sea la causa
+        raise RuntimeError(f"{table} chunk {index} (ids {start:,}-{stop - 1:,}): {type(e).__name__}: {e}") from None
+    return table, stop - start, generated - began, time.perf_counter() - generated
+
+
+def _tasks(table: str, total: int, chunk_rows: int) -> List[Tuple[str, int, int, int]]:
+    bounds = range(1, total + 1, chunk_rows)
+    return [(table, index, start, min(start + chunk_rows, total + 1)) for index, start in enumerate(bounds)]
+
+
+def load_dataset(conn_params: dict, config: LoadConfig) -> Optional[dict]:
+    """
+    Recreates clientes/ordenes at the configured scale: constraint-free tables,
+    parallel COPY of vectorized chunks over `config.workers` connections, then the
+    PK/UNIQUE builds and ANALYZE. Returns the timing summary (rows/sec per phase).
+    Recrea clientes/ordenes a la escala configurada: tablas sin restricciones, COPY
+    en paralelo de bloques vectorizados y luego PK/UNIQUE y ANALYZE.
+    """
+    if config.n_orders > MAX_ORDERS:
+        raise ValueError(f"Scale {config.scale} exceeds {MAX_ORDERS:,} orders")
+    print(f"\n[INFO] Loading / Cargando: {config.n_clients:,} clientes, {config.n_orders:,} ordenes "
+          f"(scale {config.scale:g}, zipf {config.zipf:g}, regions {config.region_weights}, {config.workers} workers)")
+    conn = psycopg2.connect(**conn_params)
+    try:
+        with conn.cursor() as cur:
+            for statement in SCHEMA:
+                cur.execute(statement)
+        conn.commit()
+
+        tasks = _tasks("clientes", config.n_clients, config.chunk_rows) + _tasks("ordenes", config.n_orders, config.chunk_rows)
+        rows = {"clientes": 0, "ordenes": 0}
+        generate_s = copy_s = 0.0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=config.workers, initializer=_init_worker,
+                                 initargs=(conn_params, config)) as pool:
+            for table, n, gen, cp in pool.map(_load_chunk, tasks):
+                rows[table] += n
+                generate_s += gen
+                copy_s += cp
+                done = rows["clientes"] + rows["ordenes"]
+                print(f"\r  {done:,} / {config.n_clients + config.n_orders:,} rows "
+                      f"({done / (time.perf_counter() - start):,.0f} rows/s)", end="", flush=True)
+        load_s = time.perf_counter() - start
+        print()
+
+        start = time.perf_counter()
+        with conn.cursor() as cur:
+            for statement in CONSTRAINTS:
+                cur.execute(statement)
+            cur.execute("ANALYZE clientes")
+            cur.execute("ANALYZE ordenes")
+        conn.commit()
+        index_s = time.perf_counter() - start
+    except Exception as e:
+        # Any failure (database, worker crash, generation) skips the PK/UNIQUE phase
+        # Cualquier fallo (base de datos, worker caído, generación) omite la fase de PK/UNIQUE
+        print(f"\n[ERROR] Load failed / La carga falló: {e}")
+        if not conn.closed:
+            conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+    total_rows = rows["clientes"] + rows["ordenes"]
+    summary = {
+        "rows": rows,
+        "load_s": load_s,
+        "rows_per_s": total_rows / load_s,
+        "generate_cpu_s": generate_s,
+        "copy_s": copy_s,
+        "constraints_s": index_s,
+        "total_s": load_s + index_s,
+    }
+    print(f"[SUCCESS] COPY: {total_rows:,} rows in {load_s:.1f} s = {summary['rows_per_s']:,.0f} rows/s "
+          f"(generation {generate_s:.1f} s, COPY {copy_s:.1f} s summed over workers)")
+    print(f"[SUCCESS] PK/UNIQUE + ANALYZE: {index_s:.1f} s; end-to-end {total_rows / summary['total_s']:,.0f} rows/s")
+    return summary
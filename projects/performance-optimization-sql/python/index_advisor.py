@@ -0,0 +1,322 @@
+# index_advisor.py
+# Measurement-backed index advisor for the consulta_lenta workload
+# Asesor de índices respaldado por mediciones para la carga de consulta_lenta
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_PREFIX = "adv_"   # Every index created by the advisor / Todos los índices creados por el asesor
+MIN_SPEEDUP = 1.05      # Below this a candidate is not worth keeping / Por debajo no vale la pena
+AGGREGATES = r'(?:COUNT|SUM|AVG|MIN|MAX)'
+DATE_TYPES = ("date", "timestamp without time zone", "timestamp with time zone")
+BRIN_MIN_CORRELATION = 0.9  # |physical vs logical order| needed for a useful BRIN / Correlación mínima para BRIN
+
+
+@dataclass
+class QueryFeatures:
+    """
+    Columns the query touches, resolved to table names.
+    Columnas que usa la consulta, resueltas a nombres de tabla.
+    """
+    tables: Dict[str, str]                                   # alias -> table
+    join_keys: List[Tuple[str, str]] = field(default_factory=list)        # (table, column)
+    filters: List[Tuple[str, str, str]] = field(default_factory=list)     # (table, column, literal)
+    group_by: List[Tuple[str, str]] = field(default_factory=list)
+    aggregated: List[Tuple[str, str]] = field(default_factory=list)
+
+    def columns_of(self, table: str, refs: List[Tuple[str, str]]) -> List[str]:
+        return list(dict.fromkeys(column for t, column in refs if t == table))
+
+
+@dataclass
+class IndexCandidate:
+    table: str
+    columns: List[str]
+    kind: str                          # btree, composite, covering, partial, brin
+    include: List[str] = field(default_factory=list)
+    where: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{INDEX_PREFIX}{self.table}_{'_'.join(self.columns)}_{self.kind}"[:63]
+
+    @property
+    def ddl(self) -> str:
+        method = " USING brin" if self.kind == "brin" else ""
+        sql = f"CREATE INDEX {self.name} ON {self.table}{method} ({', '.join(self.columns)})"
+        if self.include:
+            sql += f" INCLUDE ({', '.join(self.include)})"
+        if self.where:
+            sql += f" WHERE {self.where}"
+        return sql
+
+
+@dataclass
+class CandidateResult:
+    candidate: IndexCandidate
+    baseline_ms: float
+    median_ms: float
+    speedup: float
+    build_s: float
+    size_mb: float
+    used: bool
+    pareto: bool = False
+
+
+def parse_query(query: str) -> QueryFeatures:
+    """
+    Extracts tables, join keys, equality filters, GROUP BY and aggregated columns
+    from a SELECT ... FROM ... JOIN ... WHERE ... GROUP BY query.
+    Extrae tablas, claves de join, filtros de igualdad, GROUP BY y columnas agregadas.
+    """
+    sql = re.sub(r'--[^\n]*', ' ', query)
+    keywords = {"ON", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "GROUP", "ORDER", "HAVING", "LIMIT"}
+    tables = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, flags=re.I):
+        alias = alias if alias and alias.upper() not in keywords else table
+        tables[alias] = table
+
+    def resolve(alias: str, column: str) -> Tuple[str, str]:
+        return tables.get(alias, alias), column
+
+    def clause(name: str, stops: str) -> str:
+        match = re.search(rf'\b{name}\b(.*?)(?:\b(?:{stops})\b|$)', sql, flags=re.I | re.S)
+        return match.group(1) if match else ""
+
+    features = QueryFeatures(tables=tables)
+    for a1, c1, a2, c2 in re.findall(r'\b(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)', sql):
+        features.join_keys += [resolve(a1, c1), resolve(a2, c2)]
+    where = clause("WHERE", "GROUP|HAVING|ORDER|LIMIT")
+    for alias, column, literal in re.findall(r"\b(\w+)\.(\w+)\s*=\s*('[^']*'|\d+(?:\.\d+)?)", where):
+        features.filters.append((*resolve(alias, column), literal))
+    group_by = clause("GROUP BY", "HAVING|ORDER|LIMIT")
+    features.group_by = [resolve(a, c) for a, c in re.findall(r'\b(\w+)\.(\w+)', group_by)]
+    features.aggregated = [resolve(a, c) for a, c in re.findall(rf'\b{AGGREGATES}\s*\(\s*(\w+)\.(\w+)\s*\)', sql, flags=re.I)]
+    return features
+
+
+def enumerate_candidates(features: QueryFeatures, date_columns: Dict[str, List[str]]) -> List[IndexCandidate]:
+    """
+    Single-column, composite, covering (INCLUDE), partial (WHERE filter) and BRIN
+    candidates for every table of the query.
+    Candidatos de una columna, compuestos, de cobertura (INCLUDE), parciales y BRIN.
+    """
+    candidates = []
+    for table in dict.fromkeys(features.tables.values()):
+        keys = features.columns_of(table, features.join_keys)
+        aggregated = [c for c in features.columns_of(table, features.aggregated) if c not in keys]
+        grouped = features.columns_of(table, features.group_by)
+        filters = [(column, literal) for t, column, literal in features.filters if t == table]
+
+        for key in keys:
+            candidates.append(IndexCandidate(table, [key], "btree"))
+            if aggregated:
+                # Join key + aggregated columns: index-only scans of the join side
+                candidates.append(IndexCandidate(table, [key], "covering", include=aggregated))
+        for column, literal in filters:
+            candidates.append(IndexCandidate(table, [column], "btree"))
+            for key in keys:
+                candidates.append(IndexCandidate(table, [column, key], "composite"))
+                extra = [c for c in grouped if c not in (column, key)]
+                if extra:
+                    candidates.append(IndexCandidate(table, [column, key], "covering", include=extra))
+                # Only the rows the query filters on / Solo las filas que filtra la consulta
+                candidates.append(IndexCandidate(table, [key], "partial", where=f"{column} = {literal}"))
+        for column in date_columns.get(table, []):
+            # Dates stored in physical order: a tiny block-range index / Fechas en orden físico: índice BRIN diminuto
+            candidates.append(IndexCandidate(table, [column], "brin"))
+    unique = {}
+    for candidate in candidates:
+        unique.setdefault(candidate.ddl.replace(candidate.name, ""), candidate)
+    return list(unique.values())
+
+
+def date_columns_of(cur, tables: List[str]) -> Dict[str, List[str]]:
+    """
+    Date columns whose values follow the physical row order (pg_stats.correlation),
+    the only case where BRIN block ranges can skip anything; needs fresh ANALYZE.
+    Columnas de fecha cuyo orden coincide con el orden físico de las filas (pg_stats.correlation).
+    """
+    cur.execute(
+        "SELECT c.table_name, c.column_name FROM information_schema.columns c "
+        "JOIN pg_stats s ON s.schemaname = c.table_schema AND s.tablename = c.table_name AND s.attname = c.column_name "
+        "WHERE c.table_schema = current_schema() AND c.table_name = ANY(%s) AND c.data_type = ANY(%s) "
+        "AND abs(s.correlation) >= %s "
+        "ORDER BY c.table_name, c.ordinal_position",
+        (list(tables), list(DATE_TYPES), BRIN_MIN_CORRELATION),
+    )
+    columns = {}
+    for table, column in cur.fetchall():
+        columns.setdefault(table, []).append(column)
+    return columns
+
+
+def drop_advisor_indexes(cur):
+    cur.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND indexname LIKE %s",
+                (INDEX_PREFIX.replace("_", r"\_") + "%",))
+    for (name,) in cur.fetchall():
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def measure(cur, query: str, time_fn: Callable, warmup: int, runs: int) -> float:
+    """Median execution time in ms after warm-up. / Mediana del tiempo de ejecución tras el calentamiento."""
+    for _ in range(warmup):
+        time_fn(cur, query)
+    return float(np.median([time_fn(cur, query) for _ in range(runs)]))
+
+
+def plan_uses(cur, query: str, index_names: List[str]) -> bool:
+    cur.execute("EXPLAIN (FORMAT JSON) " + query)
+    plan = str(cur.fetchone()[0])
+    return any(name in plan for name in index_names)
+
+
+def build(cur, candidates: List[IndexCandidate]) -> Tuple[float, float]:
+    """Creates the indexes and refreshes statistics; returns (build seconds, size MB)."""
+    start = time.perf_counter()
+    for candidate in candidates:
+        cur.execute(candidate.ddl)
+    build_s = time.perf_counter() - start
+    for table in dict.fromkeys(c.table for c in candidates):
+        cur.execute(f"ANALYZE {table}")
+    cur.execute("SELECT COALESCE(SUM(pg_relation_size(indexrelid)), 0) FROM pg_stat_user_indexes WHERE indexrelname = ANY(%s)",
+                ([c.name for c in candidates],))
+    return build_s, cur.fetchone()[0] / 1024 ** 2
+
+
+def mark_pareto(results: List[CandidateResult]):
+    """
+    A candidate the plan uses is Pareto-optimal if no other one is at least as fast,
+    as cheap to build and as small, and strictly better in one of them. Indexes the
+    plan ignores only add noise and write cost, so they never are.
+    Un candidato usado por el plan es Pareto-óptimo si ningún otro es igual o mejor en
+    velocidad, tiempo de construcción y tamaño, y estrictamente mejor en alguno.
+    """
+    used = [r for r in results if r.used]
+    for r in results:
+        r.pareto = r.used and not any(
+            o.speedup >= r.speedup and o.build_s <= r.build_s and o.size_mb <= r.size_mb
+            and (o.speedup > r.speedup or o.build_s < r.build_s or o.size_mb < r.size_mb)
+            for o in used if o is not r
+        )
+
+
+def advise(conn, query: str, time_fn: Callable, warmup: int = 2, runs: int = 10) -> dict:
+    """
+    Builds and measures every candidate in isolation (build, ANALYZE, time, drop),
+    then measures the best candidate per table together. Each measurement is paired
+    with a baseline taken right before it, so cache warm-up and drift between
+    candidates do not show up as speedups.
+    Construye y mide cada candidato por separado (crear, ANALYZE, medir, eliminar)
+    y luego mide juntos el mejor candidato de cada tabla. Cada medición se compara
+    con una línea base tomada justo antes, para que el calentamiento de caché no
+    aparezca como mejora.
+    """
+    previous_autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            try:
+                return _advise(cur, query, time_fn, warmup, runs)
+            finally:
+                # No candidate outlives the run, even after a failed or interrupted measurement
+                # Ningún candidato sobrevive a la ejecución, aunque una medición falle
+                drop_advisor_indexes(cur)
+    finally:
+        conn.autocommit = previous_autocommit
+
+
+def _advise(cur, query: str, time_fn: Callable, warmup: int, runs: int) -> dict:
+    drop_advisor_indexes(cur)
+    features = parse_query(query)
+    tables = list(dict.fromkeys(features.tables.values()))
+    # Freshly loaded tables: set hint bits and the visibility map (index-only scans need it)
+    # Tablas recién cargadas: hint bits y mapa de visibilidad (necesario para index-only scans)
+    for table in tables:
+        cur.execute(f"VACUUM ANALYZE {table}")
+    candidates = enumerate_candidates(features, date_columns_of(cur, tables))
+    print(f"[INFO] {len(candidates)} candidate indexes / índices candidatos")
+
+    baselines = []
+    results = []
+    for candidate in candidates:
+        baseline = measure(cur, query, time_fn, warmup, runs)
+        baselines.append(baseline)
+        try:
+            build_s, size_mb = build(cur, [candidate])
+            median = measure(cur, query, time_fn, warmup, runs)
+            used = plan_uses(cur, query, [candidate.name])
+        finally:
+            cur.execute(f"DROP INDEX IF EXISTS {candidate.name}")
+        results.append(CandidateResult(candidate, baseline, median, baseline / median, build_s, size_mb, used))
+        print(f"  {candidate.ddl}: {baseline:.1f} -> {median:.1f} ms ({baseline / median:.2f}x), "
+              f"build {build_s:.2f} s, {size_mb:.1f} MB{'' if used else ', not used by the plan'}")
+    mark_pareto(results)
+    results.sort(key=lambda r: (not r.pareto, not r.used, -r.speedup))
+
+    # Best useful candidate per table, measured together / El mejor de cada tabla, medidos juntos
+    best = {}
+    for r in results:
+        if r.used and r.speedup >= MIN_SPEEDUP and r.candidate.table not in best:
+            best[r.candidate.table] = r
+    combined = None
+    if best:
+        chosen = [r.candidate for r in best.values()]
+        baseline = measure(cur, query, time_fn, warmup, runs)
+        baselines.append(baseline)
+        try:
+            build_s, size_mb = build(cur, chosen)
+            median = measure(cur, query, time_fn, warmup, runs)
+        finally:
+            for candidate in chosen:
+                cur.execute(f"DROP INDEX IF EXISTS {candidate.name}")
+        combined = {"indexes": chosen, "median_ms": median, "speedup": baseline / median,
+                    "build_s": build_s, "size_mb": size_mb}
+    return {"baseline_ms": float(np.median(baselines)), "results": results, "combined": combined, "features": features}
+
+
+def render_report(advice: dict) -> str:
+    """Markdown ranking of the candidates. / Ranking Markdown de los candidatos."""
+    features = advice["features"]
+    lines = [
+        "# Index advisor / Asesor de índices",
+        "",
+        f"Baseline (PK only, median of the paired baselines) / Línea base (solo PK, mediana): **{advice['baseline_ms']:.1f} ms**",
+        "",
+        f"- Join keys: {', '.join(f'{t}.{c}' for t, c in dict.fromkeys(features.join_keys))}",
+        f"- Filters: {', '.join(f'{t}.{c} = {v}' for t, c, v in features.filters) or '-'}",
+        f"- GROUP BY: {', '.join(f'{t}.{c}' for t, c in features.group_by) or '-'}",
+        f"- Aggregated: {', '.join(f'{t}.{c}' for t, c in dict.fromkeys(features.aggregated)) or '-'}",
+        "",
+        "Ranked: Pareto-optimal candidates (speedup vs build time vs size) first, then the other indexes the plan uses,",
+        "then by speedup. Each speedup is against a baseline measured right before the candidate was built.",
+        "Orden: primero los candidatos Pareto-óptimos (speedup vs construcción vs tamaño), luego los demás usados por el plan,",
+        "luego por speedup. Cada speedup se calcula contra una línea base medida justo antes de crear el candidato.",
+        "",
+        "| # | Index / Índice | Baseline ms | Median ms | Speedup | Build s | Size MB | Used by plan | Pareto |",
+        "| ---: | :--- | ---: | ---: | ---: | ---: | ---: | :---: | :---: |",
+    ]
+    for rank, r in enumerate(advice["results"], start=1):
+        lines.append(f"| {rank} | `{r.candidate.ddl}` | {r.baseline_ms:.1f} | {r.median_ms:.1f} | {r.speedup:.2f}x | {r.build_s:.2f} | "
+                     f"{r.size_mb:.1f} | {'✅' if r.used else '—'} | {'⭐' if r.pareto else ''} |")
+    combined = advice["combined"]
+    lines += ["", "## Recommended set / Conjunto recomendado", ""]
+    if combined:
+        lines += [f"- `{c.ddl};`" for c in combined["indexes"]]
+        lines += ["", f"Measured together / Medidos juntos: **{combined['median_ms']:.1f} ms ({combined['speedup']:.2f}x)**, "
+                      f"build {combined['build_s']:.2f} s, {combined['size_mb']:.1f} MB"]
+    else:
+        lines.append(f"No candidate reached {MIN_SPEEDUP:.2f}x / Ningún candidato alcanzó {MIN_SPEEDUP:.2f}x")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(advice: dict, assets_dir: str) -> str:
+    report_path = os.path.join(assets_dir, "index_advice.md")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(render_report(advice))
+    return report_path
@@ -2,11 +2,20 @@
 # SQL Performance Optimization Pipeline - FINAL VERSION with Graph Generation
 # Pipeline de Optimización de Rendimiento SQL - VERSIÓN FINAL con Generación de Gráfico
 
+import argparse
+import json
 import psycopg2
 import os
 import re
+import subprocess
+import time
+import numpy as np
 import matplotlib.pyplot as plt # Importamos Matplotlib para el gráfico
-from typing import Optional
+from typing import Callable, List, Optional
+
+from plan_analysis import QueryPlan, capture_plan, write_report
+import index_advisor
+from data_loader import MAX_ORDERS, ORDERS_PER_SCALE, LoadConfig, load_dataset, parse_region_weights
 
 # --- 1. CONFIGURATION / CONFIGURACIÓN ---
 
@@ -28,30 +37,62 @@ DB_CONFIG = {
     "port": "5432"
 }
 
+# Benchmark mode defaults / Valores por defecto del modo benchmark
+WARMUP_RUNS = 3        # Untimed executions before measuring / Ejecuciones sin medir antes de medir
+TIMED_RUNS = 20        # Timed executions per query / Ejecuciones medidas por consulta
+COLD_RUNS = 1          # First execution on a fresh connection, before any warm-up / Primera ejecución en conexión nueva
+BOOTSTRAP_SAMPLES = 10000
+
+# Summary-table mode write workload / Carga de escritura del modo tabla resumen
+WRITE_BATCHES = 20          # Multi-row INSERT ... SELECT statements / Sentencias INSERT ... SELECT multi-fila
+WRITE_BATCH_ROWS = 1000     # Orders per batch / Órdenes por lote
+SINGLE_ROW_WRITES = 200     # One-order INSERTs, each committed / INSERTs de una orden, cada uno con commit
+
 # --- 2. CORE EXECUTION FUNCTIONS / FUNCIONES PRINCIPALES ---
 
-def generate_performance_graph(time_before_ms: float, time_after_ms: float, reduction_percentage: float):
+def generate_performance_graph(time_before_ms: float, time_after_ms: float, reduction_percentage: float,
+                               ci_before_ms: Optional[tuple] = None, ci_after_ms: Optional[tuple] = None,
+                               cold_ms: Optional[tuple] = None):
     """
     Generates and saves a performance comparison bar chart to the assets directory.
     Genera y guarda un gráfico de barras de comparación de rendimiento en el directorio 'assets'.
+
+    In benchmark mode the bars are medians, the error bars their 95% bootstrap
+    confidence intervals and the markers the cold-cache (first) executions.
+    En modo benchmark las barras son medianas, las barras de error sus intervalos
+    de confianza bootstrap del 95% y los marcadores las ejecuciones en frío.
     """
     times = [time_before_ms / 1000, time_after_ms / 1000] # Convert to seconds / Convertir a segundos
     labels = ['ANTES (Before)', 'DESPUÉS (After)']
     
     # Calculate colors based on performance
     colors = ['#FF6347', '#3CB371'] # Tomato (Red) for slow, MediumSeaGreen (Green) for fast
+
+    # Asymmetric error bars from the confidence intervals / Barras de error asimétricas desde los IC
+    yerr = None
+    tops = times
+    if ci_before_ms and ci_after_ms:
+        lows = [ci_before_ms[0] / 1000, ci_after_ms[0] / 1000]
+        highs = [ci_before_ms[1] / 1000, ci_after_ms[1] / 1000]
+        yerr = [[t - lo for t, lo in zip(times, lows)], [hi - t for t, hi in zip(times, highs)]]
+        tops = highs
     
     plt.figure(figsize=(7, 5))
-    bars = plt.bar(labels, times, color=colors)
+    bars = plt.bar(labels, times, color=colors, yerr=yerr, capsize=8 if yerr else 0)
+    if cold_ms:
+        cold_s = [c / 1000 for c in cold_ms]
+        plt.scatter(labels, cold_s, marker='D', color='black', zorder=3, label='Cold cache (1st run) / En frío')
+        plt.legend(loc='upper right')
+    y_max = max(tops + (cold_s if cold_ms else []))
     
     plt.title(f"Performance Optimization: {reduction_percentage:.2f}% Latency Reduction", fontsize=14)
-    plt.ylabel("Execution Time (Seconds)")
-    plt.ylim(0, max(times) * 1.2) # Set Y limit
+    plt.ylabel("Median Execution Time (Seconds)" if yerr else "Execution Time (Seconds)")
+    plt.ylim(0, y_max * 1.25) # Set Y limit
     
     # Add data labels on top of the bars / Agregar etiquetas de datos
-    for bar in bars:
+    for bar, top in zip(bars, tops):
         yval = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2, yval + 0.05, f'{yval:.3f} s', ha='center', va='bottom', fontweight='bold')
+        plt.text(bar.get_x() + bar.get_width()/2, top + y_max * 0.02, f'{yval:.3f} s', ha='center', va='bottom', fontweight='bold')
     
     # Save the graph
     graph_path = os.path.join(ASSETS_DIR, "performance_graph.png")
@@ -105,9 +146,591 @@ def execute_sql_file(file_path: str, conn) -> Optional[float]:
         conn.rollback()
         return None
 
+def explain_sql_file(file_path: str, conn) -> Optional[QueryPlan]:
+    """
+    Executes an SQL script statement by statement and captures the plan of its
+    EXPLAIN query with EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+    Ejecuta un script SQL sentencia por sentencia y captura el plan de su consulta
+    EXPLAIN con EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+    """
+    print(f"\n[INFO] Running / Ejecutando: {file_path}")
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            statements = split_sql_statements(f.read())
+    except Exception as e:
+        print(f"[ERROR] Could not read file / No se pudo leer el archivo {file_path}: {e}")
+        return None
+
+    try:
+        plan = None
+        with conn.cursor() as cur:
+            for statement in statements:
+                query = measured_query(statement)
+                if query is None:
+                    cur.execute(statement)
+                else:
+                    plan = capture_plan(cur, query)
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"[ERROR] Database error during execution of {file_path}: {e}")
+        conn.rollback()
+        return None
+
+    if plan is None:
+        print(f"[ERROR] No EXPLAIN query in / No hay consulta EXPLAIN en {file_path}")
+    else:
+        print(f"[SUCCESS] Extracted Execution Time / Tiempo Extraído: {plan.execution_time_ms} ms")
+    return plan
+
+# --- 3. BENCHMARK MODE / MODO BENCHMARK ---
+
+def connection_params() -> dict:
+    """
+    psycopg2.connect() keyword arguments (also used by the loader's worker processes).
+    Argumentos de psycopg2.connect() (también los usan los procesos del cargador).
+    """
+    # CRITICAL FIX: Use 'latin1' for client_encoding and sslmode='disable'
+    return dict(
+        dbname=DB_CONFIG['dbname'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        client_encoding='latin1',
+        sslmode='disable'
+    )
+
+
+def connect():
+    """
+    Opens a new connection with the pipeline settings.
+    Abre una nueva conexión con la configuración del pipeline.
+    """
+    return psycopg2.connect(**connection_params())
+
+
+def setup_tables(conn, load_config: Optional[LoadConfig] = None) -> bool:
+    """
+    Recreates the tables: setup_tablas.sql by default, or the parallel COPY loader
+    when a scale is configured (--scale).
+    Recrea las tablas: setup_tablas.sql por defecto, o el cargador COPY en paralelo
+    cuando se configura una escala (--scale).
+    """
+    if load_config is None:
+        execute_sql_file(os.path.join(SQL_DIR, "setup_tablas.sql"), conn)
+        return True
+    return load_dataset(connection_params(), load_config) is not None
+
+
+def split_sql_statements(sql_script: str) -> List[str]:
+    """
+    Splits a script into statements on ';', ignoring semicolons inside quotes,
+    dollar-quoted bodies and comments. Comment-only chunks are dropped.
+    Divide un script en sentencias por ';', ignorando los que están entre comillas,
+    bloques $$ y comentarios. Se descartan los fragmentos que solo tienen comentarios.
+    """
+    statements, current = [], []
+    i, n = 0, len(sql_script)
+    while i < n:
+        ch = sql_script[i]
+        if sql_script.startswith('--', i):
+            end = sql_script.find('\n', i)
+            end = n if end == -1 else end
+            current.append(sql_script[i:end])
+            i = end
+        elif sql_script.startswith('/*', i):
+            end = sql_script.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            current.append(sql_script[i:end])
+            i = end
+        elif ch in ("'", '"'):
+            end = i + 1
+            while end < n:
+                if sql_script[end] == ch:
+                    # Doubled quote = escaped quote / Comilla doble = comilla escapada
+                    if end + 1 < n and sql_script[end + 1] == ch:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(sql_script[i:end + 1])
+            i = end + 1
+        elif ch == '$' and re.match(r'\$[A-Za-z_]*\$', sql_script[i:]):
+            tag = re.match(r'\$[A-Za-z_]*\$', sql_script[i:]).group(0)
+            end = sql_script.find(tag, i + len(tag))
+            end = n if end == -1 else end + len(tag)
+            current.append(sql_script[i:end])
+            i = end
+        elif ch == ';':
+            statements.append(''.join(current))
+            current = []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+    statements.append(''.join(current))
+    return [s.strip() for s in statements if strip_sql_comments(s).strip()]
+
+
+def strip_sql_comments(statement: str) -> str:
+    """Removes -- and /* */ comments (to detect comment-only chunks). / Elimina comentarios."""
+    statement = re.sub(r'/\*.*?\*/', ' ', statement, flags=re.S)
+    return re.sub(r'--[^\n]*', ' ', statement)
+
+
+def measured_query(statement: str) -> Optional[str]:
+    """
+    Returns the query under an EXPLAIN statement (the part to benchmark), or
+    None for setup/DDL statements.
+    Devuelve la consulta bajo un EXPLAIN (la parte a medir), o None para setup/DDL.
+    """
+    # Skip leading comments only; the query body is executed as written
+    # Solo se omiten los comentarios iniciales; la consulta se ejecuta tal cual
+    code = re.sub(r'^(\s*(--[^\n]*(\n|$)|/\*.*?\*/))*', '', statement, flags=re.S).strip()
+    match = re.match(r'EXPLAIN\s+(\([^)]*\)\s*|ANALYZE\s+|VERBOSE\s+)*', code, flags=re.I)
+    return code[match.end():].strip() if match else None
+
+
+def time_query(cur, query: str) -> float:
+    """
+    Executes the query once and returns the server-side execution time in ms.
+    TIMING OFF skips per-node clock calls, so instrumentation overhead stays low.
+    Ejecuta la consulta una vez y devuelve el tiempo de ejecución del servidor en ms.
+    """
+    cur.execute("EXPLAIN (ANALYZE, TIMING OFF) " + query)
+    for (line,) in cur.fetchall():
+        match = re.search(r'Execution Time: (\d+\.\d+) ms', line)
+        if match:
+            return float(match.group(1))
+    raise RuntimeError("No 'Execution Time' in EXPLAIN ANALYZE output")
+
+
+def benchmark_sql_file(file_path: str, connect_fn: Callable, warmup: int = WARMUP_RUNS, runs: int = TIMED_RUNS,
+                       cold_runs: int = COLD_RUNS, cold_command: Optional[str] = None) -> Optional[dict]:
+    """
+    Runs the script's setup/DDL statements once (untimed), then benchmarks its
+    EXPLAIN query:
+    - cold: each of `cold_runs` executions on a fresh connection, after
+      `cold_command` (e.g. a server restart + OS cache drop) if given;
+    - warm: `warmup` untimed executions, then `runs` timed ones, plus one
+      EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) capture for the plan report.
+    Ejecuta una vez (sin medir) las sentencias de setup/DDL y luego mide la consulta
+    EXPLAIN: ejecuciones en frío y, tras el calentamiento, ejecuciones en caliente.
+    """
+    print(f"\n[INFO] Benchmarking / Midiendo: {file_path}")
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            statements = split_sql_statements(f.read())
+    except Exception as e:
+        print(f"[ERROR] Could not read file / No se pudo leer el archivo {file_path}: {e}")
+        return None
+
+    queries = [q for q in (measured_query(s) for s in statements) if q]
+    setup = [s for s in statements if measured_query(s) is None]
+    if not queries:
+        print(f"[ERROR] No EXPLAIN query to benchmark in / No hay consulta EXPLAIN en {file_path}")
+        return None
+    query = queries[-1]
+
+    try:
+        # 1. Setup / DDL, untimed / Setup / DDL, sin medir
+        conn = connect_fn()
+        try:
+            with conn.cursor() as cur:
+                for statement in setup:
+                    cur.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"[INFO] {len(setup)} setup/DDL statement(s) executed untimed / sentencias de setup/DDL sin medir")
+
+        # 2. Cold-cache runs / Ejecuciones en frío
+        cold = []
+        for _ in range(cold_runs):
+            if cold_command:
+                subprocess.run(cold_command, shell=True, check=True)
+            conn = connect_fn()
+            try:
+                with conn.cursor() as cur:
+                    cold.append(time_query(cur, query))
+                conn.rollback()
+            finally:
+                conn.close()
+
+        # 3. Warm-up, then timed runs / Calentamiento y luego ejecuciones medidas
+        warm = []
+        conn = connect_fn()
+        try:
+            with conn.cursor() as cur:
+                for _ in range(warmup):
+                    time_query(cur, query)
+                for _ in range(runs):
+                    warm.append(time_query(cur, query))
+                # One more warm run with the full JSON plan / Una ejecución más con el plan JSON completo
+                plan = capture_plan(cur, query)
+            conn.rollback()
+        finally:
+            conn.close()
+    except (psycopg2.Error, subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"[ERROR] Benchmark failed for {file_path}: {e}")
+        return None
+
+    print(f"[SUCCESS] cold / frío: {', '.join(f'{t:.1f}' for t in cold) or '-'} ms | "
+          f"warm median / mediana en caliente: {np.median(warm):.1f} ms (n={len(warm)})")
+    return {"cold": cold, "warm": warm, "plan": plan}
+
+
+def summarize_samples(samples: List[float]) -> dict:
+    """Median, p95, standard deviation, min and max in ms. / Mediana, p95, desviación estándar, mín y máx."""
+    values = np.asarray(samples, dtype=float)
+    return {
+        "n": int(values.size),
+        "median": float(np.median(values)),
+        "p95": float(np.percentile(values, 95)),
+        "stddev": float(values.std(ddof=1)) if values.size > 1 else 0.0,
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def bootstrap_ci(before: List[float], after: List[float], n_boot: int = BOOTSTRAP_SAMPLES,
+                 confidence: float = 0.95, seed: Optional[int] = 0) -> dict:
+    """
+    Percentile bootstrap: resamples both sample sets with replacement and returns
+    confidence intervals for each median and for the speedup (median before /
+    median after).
+    Bootstrap de percentiles: remuestrea ambos conjuntos con reemplazo y devuelve
+    intervalos de confianza para cada mediana y para el speedup.
+    """
+    rng = np.random.default_rng(seed)
+    before, after = np.asarray(before, dtype=float), np.asarray(after, dtype=float)
+    medians_before = np.median(rng.choice(before, size=(n_boot, before.size)), axis=1)
+    medians_after = np.median(rng.choice(after, size=(n_boot, after.size)), axis=1)
+    tail = (1 - confidence) / 2 * 100
+    interval = lambda values: tuple(float(v) for v in np.percentile(values, [tail, 100 - tail]))
+    return {
+        "before_ms": interval(medians_before),
+        "after_ms": interval(medians_after),
+        "speedup": interval(medians_before / medians_after),
+    }
+
+
+def run_benchmark(warmup: int, runs: int, cold_runs: int, cold_command: Optional[str], n_boot: int,
+                  load_config: Optional[LoadConfig] = None):
+    """
+    Benchmark mode pipeline: setup, repeated trials before/after, statistics,
+    JSON results and a graph with error bars.
+    Pipeline en modo benchmark: setup, ensayos repetidos antes/después, estadísticas,
+    resultados JSON y gráfico con barras de error.
+    """
+    print("--- 1. CONNECTING TO POSTGRESQL / CONECTANDO A POSTGRESQL ---")
+    try:
+        conn = connect()
+    except psycopg2.Error as e:
+        print(f"\n[FATAL ERROR] Could not connect to the database: {e}")
+        return
+    print("Connection successful! / Conexión exitosa!")
+    try:
+        if not setup_tables(conn, load_config):
+            return
+    finally:
+        conn.close()
+
+    before = benchmark_sql_file(os.path.join(SQL_DIR, "consulta_lenta.sql"), connect, warmup, runs, cold_runs, cold_command)
+    after = benchmark_sql_file(os.path.join(SQL_DIR, "consulta_optimizada.sql"), connect, warmup, runs, cold_runs, cold_command)
+    if not before or not after:
+        print("Could not benchmark both queries. Review logs.")
+        return
+
+    stats_before, stats_after = summarize_samples(before["warm"]), summarize_samples(after["warm"])
+    ci = bootstrap_ci(before["warm"], after["warm"], n_boot)
+    speedup = stats_before["median"] / stats_after["median"]
+    reduction_percentage = (1 - stats_after["median"] / stats_before["median"]) * 100
+
+    print("\n" + "="*50)
+    print("--- BENCHMARK RESULTS (WARM CACHE) / RESULTADOS (CACHÉ CALIENTE) ---")
+    print(f"| {'':<22} {'median':>9} {'p95':>9} {'stddev':>9} {'cold':>9}")
+    for label, stats, samples in (("BEFORE / ANTES", stats_before, before), ("AFTER / DESPUÉS", stats_after, after)):
+        cold = f"{np.median(samples['cold']):.1f}" if samples['cold'] else "-"
+        print(f"| {label:<22} {stats['median']:>9.1f} {stats['p95']:>9.1f} {stats['stddev']:>9.1f} {cold:>9}  (ms, n={stats['n']})")
+    print(f"|")
+    print(f"| ✅ SPEEDUP (median): {speedup:.2f}x  [95% CI {ci['speedup'][0]:.2f}x - {ci['speedup'][1]:.2f}x]")
+    print(f"| ✅ PERCENTAGE IMPROVEMENT (MEJORA PORCENTUAL): {reduction_percentage:.2f}%")
+    print("="*50)
+
+    results = {
+        "warmup_runs": warmup,
+        "timed_runs": runs,
+        "bootstrap_samples": n_boot,
+        "before": {"warm": stats_before, "cold_ms": before["cold"], "median_ci_ms": ci["before_ms"], "samples_ms": before["warm"]},
+        "after": {"warm": stats_after, "cold_ms": after["cold"], "median_ci_ms": ci["after_ms"], "samples_ms": after["warm"]},
+        "speedup": {"median": speedup, "ci95": ci["speedup"]},
+    }
+    results_path = os.path.join(ASSETS_DIR, "benchmark_results.json")
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n[INFO] Results saved / Resultados guardados en: {results_path}")
+
+    cold_ms = (float(np.median(before["cold"])), float(np.median(after["cold"]))) if before["cold"] and after["cold"] else None
+    generate_performance_graph(stats_before["median"], stats_after["median"], reduction_percentage,
+                               ci["before_ms"], ci["after_ms"], cold_ms)
+
+    report_path = write_report(before["plan"], after["plan"], ASSETS_DIR)
+    print(f"[INFO] Plan diff report / Reporte de diferencias de planes: {report_path}")
+
+
+def measure_writes(connect_fn: Callable, batches: int = WRITE_BATCHES, batch_rows: int = WRITE_BATCH_ROWS,
+                   single_rows: int = SINGLE_ROW_WRITES, seed: int = 0) -> dict:
+    """
+    Times a committed write workload on 'ordenes': multi-row batches (INSERT ... SELECT)
+    and single-order INSERTs. Returns per-statement latencies in ms.
+    Mide una carga de escritura confirmada sobre 'ordenes': lotes multi-fila y INSERTs
+    de una sola orden. Devuelve latencias por sentencia en ms.
+    """
+    rng = np.random.default_rng(seed)
+    conn = connect_fn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT MAX(cliente_id) FROM clientes")
+            n_clients = cur.fetchone()[0]
+            cur.execute("SELECT COALESCE(MAX(orden_id), 0) + 1 FROM ordenes")
+            next_id = cur.fetchone()[0]
+            conn.commit()
+
+            batch_ms = []
+            for _ in range(batches):
+                start = time.perf_counter()
+                cur.execute(
+                    "INSERT INTO ordenes (orden_id, cliente_id, fecha_orden, monto, estado) "
+                    "SELECT %s + s.i, (random() * (%s - 1) + 1)::int, CURRENT_DATE, "
+                    "(random() * 1000 + 10)::numeric(10, 2), 'Pendiente' FROM generate_series(0, %s - 1) s(i)",
+                    (next_id, n_clients, batch_rows),
+                )
+                conn.commit()
+                batch_ms.append((time.perf_counter() - start) * 1000)
+                next_id += batch_rows
+
+            single_ms = []
+            for _ in range(single_rows):
+                start = time.perf_counter()
+                cur.execute(
+                    "INSERT INTO ordenes (orden_id, cliente_id, fecha_orden, monto, estado) "
+                    "VALUES (%s, %s, CURRENT_DATE, %s, 'Pendiente')",
+                    (next_id, int(rng.integers(1, n_clients + 1)), round(float(rng.uniform(10, 1010)), 2)),
+                )
+                conn.commit()
+                single_ms.append((time.perf_counter() - start) * 1000)
+                next_id += 1
+    finally:
+        conn.close()
+    return {
+        "batch_ms": batch_ms,
+        "batch_rows_per_s": batches * batch_rows / (sum(batch_ms) / 1000),
+        "single_row_ms": single_ms,
+    }
+
+
+def summary_mismatches(conn) -> int:
+    """
+    Clients whose summary row disagrees with a full recomputation (0 = consistent).
+    Clientes cuyo resumen no coincide con un recálculo completo (0 = consistente).
+    """
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT COUNT(*)
+            FROM resumen_clientes r
+            FULL JOIN (SELECT cliente_id, COUNT(*) AS n, SUM(monto) AS suma FROM ordenes GROUP BY cliente_id) o
+                ON o.cliente_id = r.cliente_id
+            WHERE COALESCE(r.total_ordenes, 0) <> COALESCE(o.n, 0)
+               OR COALESCE(r.suma_monto, 0) <> COALESCE(o.suma, 0)
+        """)
+        mismatches = cur.fetchone()[0]
+    conn.rollback()
+    return mismatches
+
+
+def run_summary_benchmark(warmup: int, runs: int, n_boot: int, load_config: Optional[LoadConfig] = None):
+    """
+    Summary-table mode: index-only approach (consulta_optimizada.sql) vs the trigger-
+    maintained summary (consulta_resumen.sql). Compares query latency and the cost of
+    the same write workload with and without the triggers, then checks the summary
+    against a full recomputation.
+    Modo tabla resumen: enfoque solo índices vs resumen mantenido por triggers. Compara
+    la latencia de la consulta y el costo de la misma carga de escritura con y sin
+    triggers, y luego verifica el resumen contra un recálculo completo.
+    """
+    print("--- 1. CONNECTING TO POSTGRESQL / CONECTANDO A POSTGRESQL ---")
+    try:
+        conn = connect()
+    except psycopg2.Error as e:
+        print(f"\n[FATAL ERROR] Could not connect to the database: {e}")
+        return
+    print("Connection successful! / Conexión exitosa!")
+    try:
+        if not setup_tables(conn, load_config):
+            return
+    finally:
+        conn.close()
+
+    # The summary is built after the index-only writes, so it starts from the same data they left
+    # El resumen se construye tras las escrituras del enfoque de índices, sobre los mismos datos
+    try:
+        indexed = benchmark_sql_file(os.path.join(SQL_DIR, "consulta_optimizada.sql"), connect, warmup, runs, cold_runs=0)
+        if not indexed:
+            return
+        print("\n[INFO] Write workload, indexes only / Carga de escritura, solo índices")
+        writes_indexed = measure_writes(connect)
+        summary = benchmark_sql_file(os.path.join(SQL_DIR, "consulta_resumen.sql"), connect, warmup, runs, cold_runs=0)
+        if not summary:
+            return
+        print("[INFO] Write workload, indexes + summary triggers / Carga de escritura, índices + triggers del resumen")
+        writes_summary = measure_writes(connect, seed=1)
+        conn = connect()
+        try:
+            mismatches = summary_mismatches(conn)
+        finally:
+            conn.close()
+    except psycopg2.Error as e:
+        print(f"[ERROR] Summary benchmark failed / Falló el benchmark del resumen: {e}")
+        return
+
+    stats_indexed, stats_summary = summarize_samples(indexed["warm"]), summarize_samples(summary["warm"])
+    ci = bootstrap_ci(indexed["warm"], summary["warm"], n_boot)
+    speedup = stats_indexed["median"] / stats_summary["median"]
+    batch_indexed, batch_summary = summarize_samples(writes_indexed["batch_ms"]), summarize_samples(writes_summary["batch_ms"])
+    single_indexed, single_summary = summarize_samples(writes_indexed["single_row_ms"]), summarize_samples(writes_summary["single_row_ms"])
+    overhead = lambda before, after: (after["median"] / before["median"] - 1) * 100
+
+    print("\n" + "="*50)
+    print("--- SUMMARY TABLE VS INDEXES / TABLA RESUMEN VS ÍNDICES ---")
+    print(f"| {'':<32} {'indexes':>10} {'summary':>10} {'change':>9}")
+    print(f"| {'Query median (ms)':<32} {stats_indexed['median']:>10.1f} {stats_summary['median']:>10.1f} {speedup:>8.1f}x")
+    print(f"| {'Query p95 (ms)':<32} {stats_indexed['p95']:>10.1f} {stats_summary['p95']:>10.1f}")
+    print(f"| {f'Batch INSERT x{WRITE_BATCH_ROWS} median (ms)':<32} {batch_indexed['median']:>10.2f} {batch_summary['median']:>10.2f} "
+          f"{overhead(batch_indexed, batch_summary):>+8.1f}%")
+    print(f"| {'Batch throughput (rows/s)':<32} {writes_indexed['batch_rows_per_s']:>10,.0f} {writes_summary['batch_rows_per_s']:>10,.0f}")
+    print(f"| {'Single-row INSERT median (ms)':<32} {single_indexed['median']:>10.2f} {single_summary['median']:>10.2f} "
+          f"{overhead(single_indexed, single_summary):>+8.1f}%")
+    print(f"|")
+    print(f"| ✅ QUERY SPEEDUP (median): {speedup:.1f}x  [95% CI {ci['speedup'][0]:.1f}x - {ci['speedup'][1]:.1f}x]")
+    print(f"| {'✅' if mismatches == 0 else '❌'} SUMMARY CONSISTENCY (CONSISTENCIA): {mismatches} mismatched clients after the writes")
+    print("="*50)
+
+    results = {
+        "warmup_runs": warmup,
+        "timed_runs": runs,
+        "query": {
+            "indexes": {"warm": stats_indexed, "samples_ms": indexed["warm"]},
+            "summary": {"warm": stats_summary, "samples_ms": summary["warm"]},
+            "speedup": {"median": speedup, "ci95": ci["speedup"]},
+        },
+        "writes": {
+            "batches": WRITE_BATCHES, "batch_rows": WRITE_BATCH_ROWS, "single_rows": SINGLE_ROW_WRITES,
+            "indexes": {"batch": batch_indexed, "batch_rows_per_s": writes_indexed["batch_rows_per_s"], "single_row": single_indexed},
+            "summary": {"batch": batch_summary, "batch_rows_per_s": writes_summary["batch_rows_per_s"], "single_row": single_summary},
+            "batch_overhead_pct": overhead(batch_indexed, batch_summary),
+            "single_row_overhead_pct": overhead(single_indexed, single_summary),
+        },
+        "summary_mismatches": mismatches,
+    }
+    results_path = os.path.join(ASSETS_DIR, "summary_benchmark.json")
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n[INFO] Results saved / Resultados guardados en: {results_path}")
+
+
+def run_index_advisor(warmup: int, runs: int, load_config: Optional[LoadConfig] = None):
+    """
+    Index advisor pipeline: setup (PK only), then build and measure every candidate
+    index for consulta_lenta and write assets/index_advice.md.
+    Pipeline del asesor de índices: setup (solo PK), luego crea y mide cada índice
+    candidato para consulta_lenta y escribe assets/index_advice.md.
+    """
+    print("--- 1. CONNECTING TO POSTGRESQL / CONECTANDO A POSTGRESQL ---")
+    try:
+        conn = connect()
+    except psycopg2.Error as e:
+        print(f"\n[FATAL ERROR] Could not connect to the database: {e}")
+        return
+    print("Connection successful! / Conexión exitosa!")
+    try:
+        if not setup_tables(conn, load_config):
+            return
+        with open(os.path.join(SQL_DIR, "consulta_lenta.sql"), 'r', encoding='utf-8') as f:
+            queries = [q for q in map(measured_query, split_sql_statements(f.read())) if q]
+        if not queries:
+            print("[ERROR] No query found in consulta_lenta.sql / No se encontró la consulta")
+            return
+        advice = index_advisor.advise(conn, queries[-1], time_query, warmup, runs)
+    except psycopg2.Error as e:
+        print(f"\n[ERROR] Index advisor failed / El asesor de índices falló: {e}")
+        return
+    finally:
+        conn.close()
+
+    print("\n" + "="*50)
+    print("--- INDEX ADVISOR RANKING / RANKING DEL ASESOR DE ÍNDICES ---")
+    for rank, r in enumerate(advice["results"], start=1):
+        print(f"| {rank:>2}. {'*' if r.pareto else ' '} {r.speedup:>5.2f}x {r.build_s:>6.2f} s {r.size_mb:>7.1f} MB  {r.candidate.name}")
+    if advice["combined"]:
+        combined = advice["combined"]
+        print(f"|")
+        print(f"| ✅ RECOMMENDED / RECOMENDADO: {', '.join(c.name for c in combined['indexes'])} "
+              f"-> {combined['speedup']:.2f}x, {combined['size_mb']:.1f} MB")
+    print("="*50)
+    report_path = index_advisor.write_report(advice, ASSETS_DIR)
+    print(f"[INFO] Index advice report / Reporte del asesor de índices: {report_path}")
+
+
+# --- 4. MAIN / PRINCIPAL ---
 
 def main():
     """Main pipeline execution function."""
+
+    parser = argparse.ArgumentParser(description="SQL performance optimization pipeline / Pipeline de optimización SQL")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Repeated trials with warm-up, cold/warm numbers and bootstrap CIs instead of one sample per query")
+    parser.add_argument("--warmup", type=int, default=WARMUP_RUNS, help="Untimed warm-up runs per query (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=TIMED_RUNS, help="Timed runs per query (default: %(default)s)")
+    parser.add_argument("--cold-runs", type=int, default=COLD_RUNS,
+                        help="Executions on a fresh connection before any warm-up (default: %(default)s)")
+    parser.add_argument("--cold-command",
+                        help="Shell command run before each cold execution, e.g. restart PostgreSQL and drop the OS page cache")
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_SAMPLES, help="Bootstrap resamples (default: %(default)s)")
+    parser.add_argument("--advise-indexes", action="store_true",
+                        help="Build and measure candidate indexes for consulta_lenta and rank them (uses --warmup/--runs)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Compare the trigger-maintained summary table (consulta_resumen.sql) with the index-only "
+                             "approach: query latency and write overhead (uses --warmup/--runs)")
+    parser.add_argument("--scale", type=float,
+                        help=f"Load the tables with the parallel COPY loader instead of setup_tablas.sql; "
+                             f"1 = {ORDERS_PER_SCALE:,} ordenes, max {MAX_ORDERS // ORDERS_PER_SCALE} = {MAX_ORDERS:,}")
+    parser.add_argument("--zipf", type=float, default=0.0,
+                        help="Zipf exponent for ordenes.cliente_id with --scale (0 = uniform, e.g. 1.1 = heavy skew)")
+    parser.add_argument("--region-weights", type=parse_region_weights, default=(1, 1, 1, 1, 1),
+                        help="Relative weights for Norte,Sur,Este,Oeste,Centro with --scale, e.g. 40,15,15,15,15")
+    parser.add_argument("--load-workers", type=int, default=os.cpu_count() or 1,
+                        help="Parallel COPY connections with --scale (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for --scale data (default: %(default)s)")
+    args = parser.parse_args()
+
+    load_config = None
+    if args.scale is not None:
+        if not 0 < args.scale * ORDERS_PER_SCALE <= MAX_ORDERS:
+            parser.error(f"--scale must be in (0, {MAX_ORDERS // ORDERS_PER_SCALE}]")
+        load_config = LoadConfig(scale=args.scale, zipf=args.zipf, region_weights=args.region_weights,
+                                 workers=max(1, args.load_workers), seed=args.seed)
+
+    if args.summary:
+        run_summary_benchmark(args.warmup, args.runs, args.bootstrap, load_config)
+        return
+    if args.advise_indexes:
+        run_index_advisor(args.warmup, args.runs, load_config)
+        return
+    if args.benchmark:
+        run_benchmark(args.warmup, args.runs, args.cold_runs, args.cold_command, args.bootstrap, load_config)
+        return
     
     time_before_ms = None
     time_after_ms = None
@@ -117,26 +740,20 @@ def main():
         # 1. ESTABLISH CONNECTION (WITH ENCODING FIX)
         print("--- 1. CONNECTING TO POSTGRESQL / CONECTANDO A POSTGRESQL ---")
         
-        # CRITICAL FIX: Use 'latin1' for client_encoding and sslmode='disable'
-        conn = psycopg2.connect(
-            dbname=DB_CONFIG['dbname'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            host=DB_CONFIG['host'],
-            port=DB_CONFIG['port'],
-            client_encoding='latin1', 
-            sslmode='disable'         
-        )
+        conn = connect()
         print("Connection successful! / Conexión exitosa!")
         
         # 2. STEP 1: LOAD (SETUP)
-        execute_sql_file(os.path.join(SQL_DIR, "setup_tablas.sql"), conn)
+        if not setup_tables(conn, load_config):
+            return
 
         # 3. STEP 2: MEASURE BASELINE (SLOW QUERY)
-        time_before_ms = execute_sql_file(os.path.join(SQL_DIR, "consulta_lenta.sql"), conn)
+        plan_before = explain_sql_file(os.path.join(SQL_DIR, "consulta_lenta.sql"), conn)
 
         # 4. STEP 3: APPLY OPTIMIZATION & MEASURE NEW PERFORMANCE
-        time_after_ms = execute_sql_file(os.path.join(SQL_DIR, "consulta_optimizada.sql"), conn)
+        plan_after = explain_sql_file(os.path.join(SQL_DIR, "consulta_optimizada.sql"), conn)
+        time_before_ms = plan_before.execution_time_ms if plan_before else None
+        time_after_ms = plan_after.execution_time_ms if plan_after else None
 
         # 5. FINAL PERFORMANCE ANALYSIS & GRAPH GENERATION
         print("\n" + "="*50)
@@ -159,6 +776,10 @@ def main():
             # --- GENERATE GRAPH / GENERAR GRÁFICO ---
             generate_performance_graph(time_before_ms, time_after_ms, reduction_percentage)
 
+            # --- PLAN DIFF REPORT / REPORTE DE DIFERENCIAS DE PLANES ---
+            report_path = write_report(plan_before, plan_after, ASSETS_DIR)
+            print(f"[INFO] Plan diff report / Reporte de diferencias de planes: {report_path}")
+
         else:
             print("Could not extract both execution times. Review logs.")
 
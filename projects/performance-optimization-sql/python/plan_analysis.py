@@ -0,0 +1,243 @@
+# plan_analysis.py
+# Plan tree model and before/after plan diff for EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+# Modelo de árbol de planes y comparación antes/después para EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+EXPLAIN_JSON = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+HOT_NODES = 3          # Nodes highlighted per plan / Nodos destacados por plan
+JOIN_NODES = ("Hash Join", "Merge Join", "Nested Loop")
+
+
+@dataclass
+class PlanNode:
+    """
+    One node of an executed plan. Times are wall-clock totals over all loops
+    (parallel workers counted once); self_* values exclude the children.
+    Un nodo del plan ejecutado. Los tiempos son totales reales de todos los loops
+    (workers paralelos contados una vez); los valores self_* excluyen a los hijos.
+    """
+    node_type: str
+    relation: Optional[str]
+    index_name: Optional[str]
+    strategy: Optional[str]
+    parallel: bool
+    estimated_rows: float
+    actual_rows: float
+    loops: int
+    total_time_ms: float
+    shared_hit: int
+    shared_read: int
+    children: List["PlanNode"] = field(default_factory=list)
+    depth: int = 0
+
+    @property
+    def self_time_ms(self) -> float:
+        return max(0.0, self.total_time_ms - sum(c.total_time_ms for c in self.children))
+
+    @property
+    def self_hit(self) -> int:
+        return max(0, self.shared_hit - sum(c.shared_hit for c in self.children))
+
+    @property
+    def self_read(self) -> int:
+        return max(0, self.shared_read - sum(c.shared_read for c in self.children))
+
+    @property
+    def misestimate(self) -> float:
+        """Actual / estimated rows (>1: underestimated). / Filas reales / estimadas."""
+        return self.actual_rows / max(self.estimated_rows, 1.0)
+
+    @property
+    def relations(self) -> frozenset:
+        """Tables read under this node (identifies joins across plans). / Tablas leídas bajo este nodo."""
+        own = {self.relation} if self.relation else set()
+        return frozenset(own.union(*(c.relations for c in self.children)))
+
+    @property
+    def label(self) -> str:
+        text = ("Parallel " if self.parallel else "") + self.node_type
+        if self.strategy and self.strategy != "Plain":
+            text += f" ({self.strategy})"
+        if self.index_name:
+            text += f" using {self.index_name}"
+        if self.relation:
+            text += f" on {self.relation}"
+        return text
+
+    def walk(self):
+        """Pre-order traversal. / Recorrido en preorden."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+@dataclass
+class QueryPlan:
+    root: PlanNode
+    planning_time_ms: float
+    execution_time_ms: float
+    raw: list
+
+    def nodes(self) -> List[PlanNode]:
+        return list(self.root.walk())
+
+    def hottest(self, n: int = HOT_NODES) -> List[PlanNode]:
+        return sorted(self.nodes(), key=lambda node: node.self_time_ms, reverse=True)[:n]
+
+
+def _parse_node(data: dict, depth: int = 0, under_gather: bool = False) -> PlanNode:
+    loops = int(data.get("Actual Loops", 1)) or 1
+    # Below a Gather the loops are parallel workers: the per-loop average is
+    # already wall time. Elsewhere loops run one after another.
+    # Bajo un Gather los loops son workers en paralelo: el promedio por loop ya es
+    # tiempo real. En el resto los loops se ejecutan uno tras otro.
+    time_factor = 1 if under_gather else loops
+    gather = under_gather or data["Node Type"] in ("Gather", "Gather Merge")
+    return PlanNode(
+        node_type=data["Node Type"],
+        relation=data.get("Relation Name"),
+        index_name=data.get("Index Name"),
+        strategy=data.get("Strategy"),
+        parallel=bool(data.get("Parallel Aware", False)),
+        estimated_rows=float(data.get("Plan Rows", 0)) * loops,
+        actual_rows=float(data.get("Actual Rows", 0)) * loops,
+        loops=loops,
+        total_time_ms=float(data.get("Actual Total Time", 0.0)) * time_factor,
+        shared_hit=int(data.get("Shared Hit Blocks", 0)),
+        shared_read=int(data.get("Shared Read Blocks", 0)),
+        children=[_parse_node(child, depth + 1, gather) for child in data.get("Plans", [])],
+        depth=depth,
+    )
+
+
+def parse_plan(explain_output) -> QueryPlan:
+    """
+    Builds the plan tree from EXPLAIN ... FORMAT JSON output (decoded list or JSON text).
+    Construye el árbol del plan a partir de la salida de EXPLAIN ... FORMAT JSON.
+    """
+    raw = json.loads(explain_output) if isinstance(explain_output, str) else explain_output
+    top = raw[0]
+    return QueryPlan(
+        root=_parse_node(top["Plan"]),
+        planning_time_ms=float(top.get("Planning Time", 0.0)),
+        execution_time_ms=float(top.get("Execution Time", 0.0)),
+        raw=raw,
+    )
+
+
+def capture_plan(cur, query: str) -> QueryPlan:
+    """
+    Executes the query under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) and parses the plan.
+    Ejecuta la consulta con EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) y procesa el plan.
+    """
+    cur.execute(EXPLAIN_JSON + query)
+    return parse_plan(cur.fetchone()[0])
+
+
+def diff_plans(before: QueryPlan, after: QueryPlan) -> List[str]:
+    """
+    Node-level changes between two plans of the same query: access method per
+    table, join strategy per set of joined tables and aggregate strategy.
+    Cambios a nivel de nodo entre dos planes de la misma consulta: método de acceso
+    por tabla, estrategia de join por conjunto de tablas y estrategia de agregación.
+    """
+    def scans(plan: QueryPlan) -> Dict[str, PlanNode]:
+        return {node.relation: node for node in plan.nodes() if node.relation}
+
+    def joins(plan: QueryPlan) -> Dict[frozenset, PlanNode]:
+        return {node.relations: node for node in plan.nodes() if node.node_type in JOIN_NODES}
+
+    changes = []
+    scans_before, scans_after = scans(before), scans(after)
+    for relation in sorted(set(scans_before) | set(scans_after)):
+        old, new = scans_before.get(relation), scans_after.get(relation)
+        if old is None or new is None:
+            changes.append(f"`{relation}`: {'read only after' if old is None else 'no longer read after'} the optimization")
+        elif old.label != new.label:
+            changes.append(
+                f"`{relation}`: {old.label} → {new.label} "
+                f"(self time {old.self_time_ms:.1f} → {new.self_time_ms:.1f} ms, "
+                f"blocks read {old.self_read} → {new.self_read}, hit {old.self_hit} → {new.self_hit})"
+            )
+
+    joins_before, joins_after = joins(before), joins(after)
+    for tables in sorted(set(joins_before) | set(joins_after), key=sorted):
+        old, new = joins_before.get(tables), joins_after.get(tables)
+        names = " ⋈ ".join(sorted(tables))
+        if old and new and old.node_type != new.node_type:
+            changes.append(f"Join {names}: {old.node_type} → {new.node_type} "
+                           f"(time {old.total_time_ms:.1f} → {new.total_time_ms:.1f} ms)")
+        elif old and not new:
+            changes.append(f"Join {names}: {old.node_type} removed")
+        elif new and not old:
+            changes.append(f"Join {names}: {new.node_type} added")
+    # Aggregates have no table to key on: compare them in plan order
+    # Los agregados no tienen tabla: se comparan en orden del plan
+    aggregates_before = [node for node in before.nodes() if node.node_type == "Aggregate"]
+    aggregates_after = [node for node in after.nodes() if node.node_type == "Aggregate"]
+    for position, (old, new) in enumerate(zip(aggregates_before, aggregates_after), start=1):
+        if old.label != new.label:
+            changes.append(f"Aggregate #{position}: {old.label} → {new.label} "
+                           f"(self time {old.self_time_ms:.1f} → {new.self_time_ms:.1f} ms)")
+    return changes
+
+
+def _node_table(plan: QueryPlan) -> List[str]:
+    hot = {id(node) for node in plan.hottest()}
+    total = max(plan.execution_time_ms, 1e-9)
+    lines = [
+        "| Node / Nodo | Est. rows | Actual rows | Actual/Est. | Self ms | % time | Shared hit | Shared read |",
+        "| :--- | ---: | ---: | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for node in plan.nodes():
+        name = "&nbsp;&nbsp;" * node.depth + ("🔥 **" + node.label + "**" if id(node) in hot else node.label)
+        lines.append(
+            f"| {name} | {node.estimated_rows:,.0f} | {node.actual_rows:,.0f} | {node.misestimate:.2f} | "
+            f"{node.self_time_ms:.1f} | {node.self_time_ms / total:.0%} | {node.self_hit:,} | {node.self_read:,} |"
+        )
+    return lines
+
+
+def render_report(before: QueryPlan, after: QueryPlan, title: str = "Plan diff: consulta_lenta vs consulta_optimizada") -> str:
+    """Markdown report of both plans and their differences. / Reporte Markdown de ambos planes y sus diferencias."""
+    def totals(plan: QueryPlan) -> Tuple[int, int]:
+        return plan.root.shared_hit, plan.root.shared_read
+
+    (hit_before, read_before), (hit_after, read_after) = totals(before), totals(after)
+    lines = [
+        f"# {title}",
+        "",
+        "| | BEFORE / ANTES | AFTER / DESPUÉS |",
+        "| :--- | ---: | ---: |",
+        f"| Execution time (ms) | {before.execution_time_ms:.1f} | {after.execution_time_ms:.1f} |",
+        f"| Planning time (ms) | {before.planning_time_ms:.1f} | {after.planning_time_ms:.1f} |",
+        f"| Shared blocks hit | {hit_before:,} | {hit_after:,} |",
+        f"| Shared blocks read | {read_before:,} | {read_after:,} |",
+        "",
+        "## Node changes / Cambios por nodo",
+        "",
+    ]
+    changes = diff_plans(before, after)
+    lines += [f"- {change}" for change in changes] or ["- No access method or join strategy changes / Sin cambios de acceso ni de join"]
+    for name, plan in (("BEFORE / ANTES", before), ("AFTER / DESPUÉS", after)):
+        lines += ["", f"## {name}", "", f"🔥 = top {HOT_NODES} nodes by self time / nodos con mayor tiempo propio", ""]
+        lines += _node_table(plan)
+    return "\n".join(lines) + "\n"
+
+
+def write_report(before: QueryPlan, after: QueryPlan, assets_dir: str) -> str:
+    """
+    Writes plan_diff.md plus the raw JSON plans to assets_dir; returns the report path.
+    Escribe plan_diff.md y los planes JSON originales en assets_dir; devuelve la ruta del reporte.
+    """
+    for name, plan in (("plan_before.json", before), ("plan_after.json", after)):
+        with open(os.path.join(assets_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(plan.raw, f, indent=2)
+    report_path = os.path.join(assets_dir, "plan_diff.md")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(render_report(before, after))
+    return report_path
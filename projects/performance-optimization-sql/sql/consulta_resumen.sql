@@ -0,0 +1,121 @@
+-- consulta_resumen.sql
+-- ELT/ETL Step 3 (alternative): Incrementally maintained summary table - AFTER OPTIMIZATION
+-- Paso 3 de ELT/ETL (alternativa): Tabla resumen mantenida incrementalmente - DESPUÉS DE LA OPTIMIZACIÓN
+
+-- GOAL: Stop recomputing COUNT/AVG over every order on each run. One row per client keeps
+-- the running count, sum and region; triggers on 'ordenes' apply every new, changed or
+-- deleted order, so the query reads ~50k summary rows instead of aggregating 500k orders.
+-- OBJETIVO: Dejar de recalcular COUNT/AVG sobre todas las órdenes en cada ejecución. Una fila
+-- por cliente guarda el conteo, la suma y la región; los triggers sobre 'ordenes' aplican cada
+-- orden nueva, modificada o eliminada, y la consulta lee ~50k filas resumen en vez de agregar 500k.
+
+-- PASO 1: BUILDING THE SUMMARY / CONSTRUYENDO EL RESUMEN
+
+-- IDEMPOTENCE: Drop the triggers and the table if they exist.
+-- IDEMPOTENCIA: Eliminar los triggers y la tabla si existen.
+DROP TRIGGER IF EXISTS ordenes_resumen_insert ON ordenes;
+DROP TRIGGER IF EXISTS ordenes_resumen_update ON ordenes;
+DROP TRIGGER IF EXISTS ordenes_resumen_delete ON ordenes;
+DROP TRIGGER IF EXISTS clientes_resumen_region ON clientes;
+DROP TABLE IF EXISTS resumen_clientes;
+
+-- 1.1. Block writes to 'ordenes' until the triggers exist (the script runs in one transaction),
+-- so no order is missed between the initial load and the first trigger call.
+-- 1.1. Bloquear escrituras en 'ordenes' hasta que existan los triggers (el script corre en una
+-- transacción), para no perder órdenes entre la carga inicial y el primer trigger.
+LOCK TABLE ordenes IN SHARE ROW EXCLUSIVE MODE;
+
+-- 1.2. The summary table: count and sum (not the average) so that changes can be added and subtracted.
+-- 1.2. La tabla resumen: conteo y suma (no el promedio) para poder sumar y restar cambios.
+CREATE TABLE resumen_clientes (
+    cliente_id INT PRIMARY KEY,
+    region VARCHAR(50),                 -- Copied from 'clientes' for the filter. / Copiada de 'clientes' para el filtro.
+    total_ordenes BIGINT NOT NULL,
+    suma_monto NUMERIC NOT NULL
+);
+
+INSERT INTO resumen_clientes (cliente_id, region, total_ordenes, suma_monto)
+SELECT c.cliente_id, c.region, COUNT(o.orden_id), COALESCE(SUM(o.monto), 0)
+FROM clientes c
+LEFT JOIN ordenes o ON c.cliente_id = o.cliente_id
+GROUP BY c.cliente_id, c.region;
+
+CREATE INDEX idx_resumen_clientes_region ON resumen_clientes (region);
+
+-- 1.3. INCREMENTAL MAINTENANCE: statement-level triggers with transition tables, so a
+-- batch INSERT/COPY updates each affected client once instead of once per row.
+-- 1.3. MANTENIMIENTO INCREMENTAL: triggers por sentencia con tablas de transición, así un
+-- INSERT/COPY por lotes actualiza cada cliente afectado una sola vez y no una vez por fila.
+CREATE OR REPLACE FUNCTION resumen_clientes_aplicar() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE resumen_clientes r
+        SET total_ordenes = r.total_ordenes - d.n,
+            suma_monto = r.suma_monto - d.suma
+        FROM (SELECT cliente_id, COUNT(*) AS n, SUM(monto) AS suma FROM filas_viejas GROUP BY cliente_id) d
+        WHERE r.cliente_id = d.cliente_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- Region through a PK lookup per client: the planner cannot size the transition
+        -- table and would otherwise hash-join against a full scan of 'clientes'.
+        -- Región mediante búsqueda por PK: el planificador no conoce el tamaño de la tabla
+        -- de transición y de otro modo haría un hash join con un scan completo de 'clientes'.
+        INSERT INTO resumen_clientes AS r (cliente_id, region, total_ordenes, suma_monto)
+        SELECT d.cliente_id, (SELECT c.region FROM clientes c WHERE c.cliente_id = d.cliente_id), d.n, d.suma
+        FROM (SELECT cliente_id, COUNT(*) AS n, SUM(monto) AS suma FROM filas_nuevas GROUP BY cliente_id) d
+        ON CONFLICT (cliente_id) DO UPDATE
+        SET total_ordenes = r.total_ordenes + EXCLUDED.total_ordenes,
+            suma_monto = r.suma_monto + EXCLUDED.suma_monto;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER ordenes_resumen_insert AFTER INSERT ON ordenes
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_clientes_aplicar();
+CREATE TRIGGER ordenes_resumen_update AFTER UPDATE ON ordenes
+    REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_clientes_aplicar();
+CREATE TRIGGER ordenes_resumen_delete AFTER DELETE ON ordenes
+    REFERENCING OLD TABLE AS filas_viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION resumen_clientes_aplicar();
+
+-- 1.4. Keep the copied region in sync when a client moves.
+-- 1.4. Mantener sincronizada la región copiada cuando un cliente cambia de región.
+CREATE OR REPLACE FUNCTION resumen_clientes_region() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE resumen_clientes SET region = NEW.region WHERE cliente_id = NEW.cliente_id;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER clientes_resumen_region AFTER UPDATE OF region ON clientes
+    FOR EACH ROW WHEN (OLD.region IS DISTINCT FROM NEW.region)
+    EXECUTE FUNCTION resumen_clientes_region();
+
+ANALYZE resumen_clientes;
+
+
+-- PASO 2: THE QUERY, ANSWERED FROM THE SUMMARY / LA CONSULTA, RESPONDIDA DESDE EL RESUMEN
+-- Same result as consulta_lenta.sql: AVG = suma / total, and the HAVING becomes a WHERE
+-- (suma > 100 * total avoids dividing before the count filter).
+-- Mismo resultado que consulta_lenta.sql: AVG = suma / total, y el HAVING pasa a ser un WHERE
+-- (suma > 100 * total evita dividir antes del filtro por conteo).
+EXPLAIN ANALYZE
+SELECT
+    c.cliente_id,
+    c.nombre,
+    c.email,
+    r.total_ordenes,
+    r.suma_monto / r.total_ordenes AS promedio_monto
+FROM
+    resumen_clientes r
+JOIN
+    clientes c ON c.cliente_id = r.cliente_id
+WHERE
+    r.region = 'Norte'
+    AND r.total_ordenes >= 10
+    AND r.suma_monto > 100.00 * r.total_ordenes
+ORDER BY
+    promedio_monto DESC;
@@ -9,6 +9,7 @@
 
 -- 1. CLEANUP (Ensuring Idempotency): Drop tables if they exist to start fresh.
 -- 1. LIMPIEZA (Asegurando Idempotencia): Eliminar tablas si existen para comenzar de nuevo.
+DROP TABLE IF EXISTS resumen_clientes; -- Summary from consulta_resumen.sql (stale once the orders are reloaded). / Resumen de consulta_resumen.sql.
 DROP TABLE IF EXISTS ordenes;
 DROP TABLE IF EXISTS clientes;
 
@@ -0,0 +1,196 @@
+"""
+Adaptive, rate-limited request scheduler for the scrapers.
+
+- Per-host token bucket: at most `rate` requests/second (bursts up to `burst`).
+- Per-host AIMD concurrency limit: grows by ~1 per window of successful
+  responses, halves on 429/503 and shrinks gently when latency exceeds
+  `latency_target`.
+- 429/503 honour Retry-After; other failures retry with jittered exponential
+  backoff (full jitter).
+- metrics() exposes requests/sec, in-flight count and error rate over a
+  sliding window; start_reporter() prints them periodically.
+
+RequestScheduler.get() has the same shape as requests.Session.get(), so it
+can be passed anywhere a session is expected (e.g. ResponseCache.fetch).
+"""
+import math
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+
+THROTTLE_STATUSES = (429, 503)
+METRICS_WINDOW = 10.0  # seconds
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (delta-seconds or HTTP-date); None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # 'inf' and 'nan' parse as floats but are not delays
+        return max(0.0, seconds) if math.isfinite(seconds) else None
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _HostState:
+    def __init__(self, burst, initial_limit):
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.not_before = 0.0
+
+
+class RequestScheduler:
+    def __init__(self, session, rate=10.0, burst=None, max_concurrency=8, min_concurrency=1,
+                 max_retries=5, backoff_base=0.5, backoff_cap=30.0, latency_target=None):
+        self.session = session
+        self.rate = rate
+        self.burst = burst or max(1.0, rate or 1.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.latency_target = latency_target
+        self._hosts = {}
+        self._cond = threading.Condition()
+        self._events = deque()  # (finished_at, is_error)
+        self._reporter = None
+        self._started = time.monotonic()
+
+    # --- slots and tokens ---
+
+    def _host(self, host):
+        if host not in self._hosts:
+            # start at half the ceiling and let AIMD find the right level
+            self._hosts[host] = _HostState(self.burst, max(self.min_concurrency, self.max_concurrency / 2))
+        return self._hosts[host]
+
+    def _acquire(self, host):
+        with self._cond:
+            state = self._host(host)
+            while True:
+                now = time.monotonic()
+                if self.rate:
+                    state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+                    state.refilled_at = now
+                if now < state.not_before:
+                    wait_for = state.not_before - now
+                elif state.in_flight >= int(state.limit):
+                    wait_for = None  # woken up by _release
+                elif self.rate and state.tokens < 1:
+                    wait_for = (1 - state.tokens) / self.rate
+                else:
+                    if self.rate:
+                        state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait_for)
+
+    def _release(self, host, outcome, latency, delay=0.0):
+        with self._cond:
+            state = self._hosts[host]
+            state.in_flight -= 1
+            if outcome == "throttled":
+                # multiplicative decrease, and nobody talks to this host until the delay passes
+                state.limit = max(self.min_concurrency, state.limit / 2)
+                state.not_before = max(state.not_before, time.monotonic() + delay)
+            elif outcome == "ok":
+                if self.latency_target is not None and latency > self.latency_target:
+                    state.limit = max(self.min_concurrency, state.limit * 0.9)
+                else:
+                    # additive increase: about +1 per `limit` successful responses
+                    state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+            self._events.append((time.monotonic(), outcome != "ok"))
+            self._cond.notify_all()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    # --- public API ---
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the scheduler. Throttled (429/503) and failed
+        attempts are retried up to max_retries times; the last response is
+        returned (or the last exception raised) when retries run out.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self._acquire(host)
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException:
+                self._release(host, "error", time.monotonic() - start)
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            latency = time.monotonic() - start
+            if response.status_code in THROTTLE_STATUSES:
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                self._release(host, "throttled", latency, delay if delay is not None else self._backoff(attempt))
+                if last_attempt:
+                    return response
+                continue
+            self._release(host, "ok" if response.status_code < 500 else "error", latency)
+            if response.status_code >= 500 and not last_attempt:
+                time.sleep(self._backoff(attempt))
+                continue
+            return response
+
+    def metrics(self):
+        with self._cond:
+            now = time.monotonic()
+            while self._events and self._events[0][0] < now - METRICS_WINDOW:
+                self._events.popleft()
+            span = min(METRICS_WINDOW, now - self._started) or METRICS_WINDOW
+            total = len(self._events)
+            errors = sum(1 for _, is_error in self._events if is_error)
+            return {
+                "requests_per_sec": total / span,
+                "in_flight": sum(state.in_flight for state in self._hosts.values()),
+                "error_rate": errors / total if total else 0.0,
+                "concurrency_limits": {host: round(state.limit, 1) for host, state in self._hosts.items()},
+            }
+
+    def format_metrics(self):
+        m = self.metrics()
+        limits = ", ".join(f"{host}={limit}" for host, limit in m["concurrency_limits"].items())
+        return (f"{m['requests_per_sec']:.1f} req/s, {m['in_flight']} in flight, "
+                f"{m['error_rate']:.0%} errors, limits: {limits or '-'}")
+
+    def start_reporter(self, interval=5.0):
+        """Print metrics every `interval` seconds from a daemon thread until stop_reporter()."""
+        stop = threading.Event()
+
+        def report():
+            while not stop.wait(interval):
+                print(f"[scheduler] {self.format_metrics()}")
+
+        self._reporter = stop
+        threading.Thread(target=report, daemon=True).start()
+
+    def stop_reporter(self):
+        if self._reporter is not None:
+            self._reporter.set()
+            self._reporter = None
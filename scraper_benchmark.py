@@ -0,0 +1,91 @@
+"""
+Parser benchmark for scraper_etl.py.
+
+Parses saved listing and detail pages with every available backend, checks
+that they extract the same records and reports the time per page and the
+speedup over BeautifulSoup's html.parser.
+
+By default it runs on fixtures/books_site, an offline catalogue in
+books.toscrape.com's markup (7 listing pages, 60 detail pages).
+
+Usage:
+    python scraper_benchmark.py --repeat 20                         # the fixture site
+    python scraper_benchmark.py saved_pages/*.html --details saved_pages/book_*.html
+    python scraper_benchmark.py --url https://books.toscrape.com/   # fetch one live page instead
+"""
+import argparse
+import time
+from pathlib import Path
+
+import requests
+
+from scraper_parsers import PARSERS, get_parser
+
+FIXTURE_SITE = Path(__file__).resolve().parent / "fixtures" / "books_site"
+
+
+def fixture_pages(site=FIXTURE_SITE):
+    """(listing pages, detail pages) of the saved fixture catalogue."""
+    catalogue = site / "catalogue"
+    listings = [site / "index.html", *sorted(catalogue.glob("page-*.html")),
+                *sorted(catalogue.glob("category/books/*/*.html"))]
+    details = sorted(catalogue.glob("*/index.html"))
+    return listings, details
+
+
+def time_backend(parser, pages, repeat, method="parse_listing"):
+    parse = getattr(parser, method)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            parse(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def compare(backends, pages, repeat, method, label):
+    reference = [getattr(backends[0], method)(html) for html in pages]
+    for parser in backends[1:]:
+        if [getattr(parser, method)(html) for html in pages] != reference:
+            print(f"WARNING: {parser.name} {label} output differs from {backends[0].name}")
+
+    timings = {parser.name: time_backend(parser, pages, repeat, method) for parser in backends}
+    baseline = timings["html.parser"]
+    print(f"{label}: {len(pages)} page(s), {repeat} passes")
+    for name, per_page in timings.items():
+        print(f"  {name:<12} {per_page * 1000:8.2f} ms/page   x{baseline / per_page:.1f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Compare HTML parsing backends on saved pages")
+    arg_parser.add_argument("pages", nargs="*", help="Saved HTML listing pages (default: the fixture site)")
+    arg_parser.add_argument("--details", nargs="*", default=[], help="Saved HTML book detail pages")
+    arg_parser.add_argument("--url", help="Fetch this live listing page instead of using saved pages")
+    arg_parser.add_argument("--repeat", type=int, default=10, help="Passes over the page set per backend")
+    args = arg_parser.parse_args()
+
+    if args.pages or args.details:
+        listing_paths, detail_paths = args.pages, args.details
+    elif args.url:
+        listing_paths, detail_paths = [], []
+    else:
+        listing_paths, detail_paths = fixture_pages()
+    listings = [Path(p).read_text(encoding="utf-8") for p in listing_paths]
+    details = [Path(p).read_text(encoding="utf-8") for p in detail_paths]
+    if args.url:
+        listings.append(requests.get(args.url, timeout=30).text)
+
+    backends = []
+    for name in PARSERS:
+        try:
+            backends.append(get_parser(name))
+        except ImportError as e:
+            print(f"Skipping {name}: {e}")
+
+    if listings:
+        compare(backends, listings, args.repeat, "parse_listing", "Listing pages")
+    if details:
+        compare(backends, details, args.repeat, "parse_detail", "Detail pages")
+
+
+if __name__ == "__main__":
+    main()
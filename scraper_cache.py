@@ -0,0 +1,132 @@
+"""
+On-disk HTTP response cache with conditional requests for scraper_etl.py.
+
+Each URL is stored as a body file plus a small JSON header file holding its
+ETag / Last-Modified. Cached entries are revalidated with If-None-Match /
+If-Modified-Since; a 304 answer reuses the stored body. With a TTL, entries
+younger than the TTL are served without touching the network at all.
+
+The cache is bounded by size: least recently used entries (body mtime) are
+evicted first.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = ".scraper_cache"
+DEFAULT_MAX_MB = 256
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB, ttl=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._total_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.body"))
+        self.stats = {"fresh": 0, "revalidated": 0, "misses": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            body = body_path.read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def fetch(self, url, session, timeout=None):
+        """GET url through the cache and return the body text."""
+        meta, body = self._load(url)
+        headers = {}
+        if meta is not None:
+            if self.ttl is not None and time.time() - meta["stored_at"] < self.ttl:
+                return self._hit(url, body, "fresh")
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and meta is not None:
+            self._store_meta(url, meta)
+            return self._hit(url, body, "revalidated")
+        response.raise_for_status()
+        self._count("misses")
+        self._count("bytes_downloaded", len(response.content))
+        self._store(url, response)
+        return response.text
+
+    def _hit(self, url, body, kind):
+        _, body_path = self._paths(url)
+        # mark as recently used for LRU eviction; another thread may have just
+        # evicted the entry, but the body is already in memory
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            pass
+        self._count(kind)
+        self._count("bytes_saved", len(body.encode("utf-8")))
+        return body
+
+    def _store_meta(self, url, meta):
+        meta_path, _ = self._paths(url)
+        meta = dict(meta, stored_at=time.time())
+        tmp = meta_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        tmp = body_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(response.text, encoding="utf-8")
+        new_size = tmp.stat().st_size
+        with self._lock:
+            # replace and account under the lock, so the size being replaced is
+            # the one counted in _total_bytes (not one another thread changed)
+            try:
+                old_size = body_path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp, body_path)
+            self._total_bytes += new_size - old_size
+            self._store_meta(url, {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            })
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # called with the lock held
+        bodies = sorted(self.cache_dir.glob("*.body"), key=lambda p: p.stat().st_mtime)
+        while self._total_bytes > self.max_bytes and len(bodies) > 1:
+            oldest = bodies.pop(0)
+            self._total_bytes -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+            oldest.with_suffix(".json").unlink(missing_ok=True)
+
+    def report(self):
+        hits = self.stats["fresh"] + self.stats["revalidated"]
+        lookups = hits + self.stats["misses"]
+        ratio = hits / lookups if lookups else 0.0
+        return (
+            f"HTTP cache: {hits}/{lookups} hits ({ratio:.0%}; {self.stats['fresh']} fresh, "
+            f"{self.stats['revalidated']} revalidated by 304), "
+            f"{self.stats['bytes_saved'] / 1024:.0f} KB saved, "
+            f"{self.stats['bytes_downloaded'] / 1024:.0f} KB downloaded"
+        )
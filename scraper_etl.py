@@ -1,61 +1,347 @@
+import argparse
+import os
+import re
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from urllib.parse import urljoin
+
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 
+from request_scheduler import RequestScheduler
+from scraper_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, ResponseCache
+from scraper_index import KEY_COLUMN, ProductIndex, index_path_for
+from scraper_parsers import PARSERS, get_parser
+
 # ------------------------------
 # CONFIGURATION
 # ------------------------------
 URL = "https://books.toscrape.com/"
+OUTPUT_FILE = "scraped_data.csv"
+MAX_WORKERS = 8        # Concurrent page fetches in crawl mode
+REQUEST_TIMEOUT = 30   # Seconds per request
+RATE_LIMIT = None      # Requests per second per host (None: no rate limit, opt in with --rate)
+MAX_RETRIES = 5        # Retries on 429/503, 5xx and connection errors
+WRITE_BATCH = 500      # Rows per incremental write in --details mode
+COLUMNS = ["Name", "Price", "Availability"]
+DETAIL_COLUMNS = COLUMNS + ["UPC", "Stock", "Category", "Description"]
 
 # ------------------------------
 # SCRAPING
 # ------------------------------
-response = requests.get(URL)
-response.raise_for_status()  # Check if the request was successful
+def make_session(pool_size=MAX_WORKERS):
+    """Shared keep-alive session whose connection pool fits the number of workers."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def make_scheduler(session, max_workers=MAX_WORKERS, rate=RATE_LIMIT, max_retries=MAX_RETRIES, latency_target=None):
+    """
+    Wrap the session in a polite scheduler: per-host token bucket, AIMD
+    concurrency (capped at max_workers) and Retry-After aware retries.
+    It exposes .get() like a session, so fetch() and the cache use it as-is.
+    """
+    return RequestScheduler(session, rate=rate, max_concurrency=max_workers,
+                            max_retries=max_retries, latency_target=latency_target)
+
+
+def fetch(url, session, cache=None):
+    if cache is not None:
+        return cache.fetch(url, session, timeout=REQUEST_TIMEOUT)
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()  # Check if the request was successful
+    return response.text
+
 
-# Parse HTML content
-soup = BeautifulSoup(response.text, "html.parser")
+def listing_links(page, page_url, follow_categories=False):
+    """
+    Listing pages reachable from page_url: every page of the pagination and,
+    optionally, the category pages from the sidebar.
+    """
+    links = []
+    if page.next_href is not None:
+        next_url = urljoin(page_url, page.next_href)
+        links.append(next_url)
+        # "Page 1 of 50" lets us enqueue the whole pagination at once instead
+        # of discovering one page per round trip
+        total = re.search(r"of\s+(\d+)", page.page_label)
+        numbered = re.search(r"page-(\d+)\.html$", next_url)
+        if total and numbered:
+            first = int(numbered.group(1))
+            links.extend(
+                next_url[:numbered.start(1)] + f"{n}.html"
+                for n in range(first + 1, int(total.group(1)) + 1)
+            )
+    if follow_categories:
+        links.extend(urljoin(page_url, href) for href in page.category_hrefs)
+    return links
 
-# List to store product data
-data = []
 
-# Loop through product containers
-# NOTE: Adjust selectors depending on target website
-for product in soup.select("article.product_pod"):
-    name = product.h3.a.get("title").strip()
-    price_text = product.select_one("p.price_color").text.strip()
-    availability_text = product.select_one("p.availability").text.strip()
-    
-    data.append({
-        "Name": name,
-        "Price": price_text,
-        "Availability": availability_text
-    })
+def resolve_links(products, page_url):
+    """Make each product's detail link absolute (it is relative to the listing page)."""
+    for product in products:
+        product["Href"] = urljoin(page_url, product["Href"])
+    return products
+
+
+def crawl(start_url, session, parser, max_workers=MAX_WORKERS, follow_categories=False, cache=None):
+    """
+    Fetch listing pages concurrently (bounded by max_workers) starting at
+    start_url and yield product records as each page is parsed.
+    """
+    seen = {start_url}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(fetch, start_url, session, cache): start_url}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                page_url = pending.pop(future)
+                try:
+                    html = future.result()
+                except requests.RequestException as e:
+                    print(f"Failed to fetch {page_url}: {e}")
+                    continue
+                page = parser.parse_listing(html)
+                for url in listing_links(page, page_url, follow_categories):
+                    if url not in seen:
+                        seen.add(url)
+                        pending[pool.submit(fetch, url, session, cache)] = url
+                yield from resolve_links(page.products, page_url)
+
+
+def fetch_details(records, session, parser, max_workers=MAX_WORKERS, parse_workers=None, cache=None):
+    """
+    Follow every record's detail link and yield the record merged with the
+    detail fields, in completion order. Pages are downloaded in a thread pool
+    and parsed in a process pool, so parsing never blocks the downloads; at
+    most 2 * max_workers records are in flight, so memory does not grow with
+    the catalogue. The parse pool defaults to one process per CPU, capped at
+    max_workers (parsing cannot outpace the downloads feeding it).
+    """
+    parse_workers = parse_workers or min(os.cpu_count() or 1, max_workers)
+    records = iter(records)
+    window = 2 * max_workers
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=max_workers) as io_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as cpu_pool:
+        pending = {}  # future -> record; a download until it is swapped for its parse
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                record = next(records, None)
+                if record is None:
+                    exhausted = True
+                else:
+                    pending[io_pool.submit(fetch, record["Href"], session, cache)] = record
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = pending.pop(future)
+                try:
+                    result = future.result()
+                except requests.RequestException as e:
+                    print(f"Failed to fetch {record['Href']}: {e}")
+                    continue
+                if isinstance(result, str):
+                    # downloaded: hand the HTML to the parse pool
+                    pending[cpu_pool.submit(parser.parse_detail, result)] = record
+                else:
+                    yield {**record, **result}
+
 
 # ------------------------------
 # DATA VALIDATION & CLEANING
 # ------------------------------
-df = pd.DataFrame(data)
+def clean(records, columns=COLUMNS):
+    df = pd.DataFrame(records, columns=columns)
 
-# Remove duplicates
-df.drop_duplicates(inplace=True)
+    # Remove duplicates
+    df.drop_duplicates(inplace=True)
 
-# Convert price to float: remove currency symbol and any extra characters
-df["Price"] = df["Price"].str.replace(r"[^\d\.]", "", regex=True).astype(float)
+    # Convert price to float: remove currency symbol and any extra characters
+    df["Price"] = df["Price"].str.replace(r"[^\d\.]", "", regex=True).astype(float)
 
-# Filter out rows with empty names or prices
-df = df[df["Name"].notna() & df["Price"].notna()]
+    # Filter out rows with empty names or prices
+    df = df[df["Name"].notna() & df["Price"].notna()]
+    return df
 
-# Save cleaned data to CSV
-df.to_csv("scraped_data.csv", index=False)
 
 # ------------------------------
 # SUMMARY STATISTICS
 # ------------------------------
-total_rows = len(df)
-unique_products = df["Name"].nunique()
-average_price = df["Price"].mean()
+def summarize(df):
+    total_rows = len(df)
+    unique_products = df["Name"].nunique()
+    average_price = df["Price"].mean()
+    print_summary(total_rows, unique_products, average_price)
+
+
+def unique_links(records):
+    """Drop records whose detail page was already queued (e.g. a book listed in several categories)."""
+    seen = set()
+    for record in records:
+        if record["Href"] not in seen:
+            seen.add(record["Href"])
+            yield record
+
+
+def check_append_target(output, columns):
+    """
+    Raise ValueError if output already holds a CSV with other columns (e.g. a
+    3-column listing scrape that a --details run would append wide rows to).
+    Returns True if rows can be appended, False if the file needs a header.
+    """
+    if not os.path.exists(output) or os.path.getsize(output) == 0:
+        return False
+    existing = list(pd.read_csv(output, nrows=0).columns)
+    if existing != list(columns):
+        raise ValueError(f"{output} has columns {existing}, this run writes {list(columns)}; "
+                         f"use another --output")
+    return True
+
+
+def open_index(path, output, columns):
+    """
+    Open the product index of an incremental run into output. If output is
+    missing or empty, nothing the index knows about is in it, so the index
+    is reset and every product is written again.
+    """
+    index = ProductIndex(path)
+    if not check_append_target(output, columns):
+        dropped = index.reset()
+        if dropped:
+            print(f"Index: {output} is missing or empty, forgetting {dropped} known products")
+    return index
+
+
+def write_batches(records, output, index=None, batch_rows=WRITE_BATCH):
+    """
+    Clean and write enriched records to the CSV every batch_rows rows, so only
+    one batch is held in memory. With an index, only new/changed rows are
+    appended (to an output with the same columns). Returns the summary
+    figures (rows, unique names, average price).
+    """
+    if index is None or not check_append_target(output, DETAIL_COLUMNS):
+        pd.DataFrame(columns=DETAIL_COLUMNS).to_csv(output, index=False)
+    names = set()
+    total_rows = written = 0
+    price_sum = 0.0
+    counts = {"new": 0, "changed": 0, "unchanged": 0}
+    records = iter(records)
+    while batch := list(islice(records, batch_rows)):
+        df = clean(batch, DETAIL_COLUMNS + [KEY_COLUMN])
+        total_rows += len(df)
+        price_sum += df["Price"].sum()
+        names.update(df["Name"])
+        if index is not None:
+            df = index.apply(df)
+            for key in counts:
+                counts[key] += index.last_run[key]
+        df[DETAIL_COLUMNS].to_csv(output, mode="a", header=False, index=False)
+        written += len(df)
+        print(f"Wrote {written} rows to {output}")
+    if index is not None:
+        print(f"Index: {counts['new']} new, {counts['changed']} changed, "
+              f"{counts['unchanged']} unchanged -> {written} rows appended to {output}")
+    return total_rows, len(names), price_sum / total_rows if total_rows else float("nan")
+
+
+def print_summary(total_rows, unique_products, average_price):
+    print(f"Total rows: {total_rows}")
+    print(f"Unique products: {unique_products}")
+    print(f"Average price: {average_price:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape books.toscrape.com listings into a clean CSV")
+    parser.add_argument("--url", default=URL, help="Start page (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Output CSV (default: %(default)s)")
+    parser.add_argument("--crawl", action="store_true", help="Follow pagination and fetch every listing page")
+    parser.add_argument("--categories", action="store_true", help="In crawl mode, also follow category links")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS, help="Concurrent fetches in crawl mode")
+    parser.add_argument("--parser", default="auto", choices=["auto", *PARSERS],
+                        help="HTML backend: lxml (fast, compiled) or html.parser (pure Python); auto prefers lxml")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="HTTP response cache directory (default: %(default)s)")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB, help="Cache size limit, LRU eviction (default: %(default)s)")
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="Serve cached pages younger than this many seconds without revalidating")
+    parser.add_argument("--no-cache", action="store_true", help="Always download pages in full")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT,
+                        help="Max requests/second per host (default: no rate limit; concurrency still adapts to 429/503)")
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES, help="Retries per request (default: %(default)s)")
+    parser.add_argument("--latency-target", type=float, default=None,
+                        help="Back off concurrency when responses take longer than this many seconds")
+    parser.add_argument("--metrics-interval", type=float, default=None,
+                        help="Print requests/sec, in-flight and error rate every N seconds")
+    parser.add_argument("--details", action="store_true",
+                        help="Follow each product to its detail page for UPC, stock, category and description")
+    parser.add_argument("--parse-workers", type=int, default=None,
+                        help="Processes parsing detail pages in --details mode (default: CPU count, at most --max-workers)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only append new/changed products to the output and the price history")
+    parser.add_argument("--index", default=None,
+                        help="SQLite product index for --incremental (default: next to --output, e.g. scraped_data.index.sqlite)")
+    args = parser.parse_args()
+
+    if args.incremental:
+        args.index = args.index or index_path_for(args.output)
+        # Fail before crawling, not after, if the rows would not match the existing file
+        try:
+            check_append_target(args.output, DETAIL_COLUMNS if args.details else COLUMNS)
+        except ValueError as e:
+            parser.error(str(e))
+
+    html_parser = get_parser(args.parser)
+    session = make_scheduler(make_session(args.max_workers), args.max_workers, args.rate,
+                             args.max_retries, args.latency_target)
+    if args.metrics_interval:
+        session.start_reporter(args.metrics_interval)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir, args.cache_max_mb, args.cache_ttl)
+    try:
+        if args.crawl:
+            records = crawl(args.url, session, html_parser, args.max_workers, args.categories, cache)
+        else:
+            # Parse HTML content of the single start page
+            records = resolve_links(html_parser.parse_listing(fetch(args.url, session, cache)).products, args.url)
+
+        if args.details:
+            # Fan out to the detail pages and stream the enriched rows to disk
+            records = fetch_details(unique_links(records), session, html_parser,
+                                    args.max_workers, args.parse_workers, cache)
+            index = open_index(args.index, args.output, DETAIL_COLUMNS) if args.incremental else None
+            try:
+                print_summary(*write_batches(records, args.output, index))
+            finally:
+                if index is not None:
+                    index.close()
+        else:
+            if args.incremental:
+                # Append only what changed since the last run (products are keyed by their detail URL)
+                df = clean(records, COLUMNS + [KEY_COLUMN])
+                index = open_index(args.index, args.output, COLUMNS)
+                try:
+                    delta = index.apply(df)
+                finally:
+                    index.close()
+                delta[COLUMNS].to_csv(args.output, mode="a", index=False,
+                                      header=not check_append_target(args.output, COLUMNS))
+                print(f"Index: {index.last_run['new']} new, {index.last_run['changed']} changed, "
+                      f"{index.last_run['unchanged']} unchanged -> {len(delta)} rows appended to {args.output}")
+            else:
+                # Save cleaned data to CSV
+                df = clean(records)
+                df.to_csv(args.output, index=False)
+            summarize(df)
+    finally:
+        # stop the periodic metrics thread even when the crawl fails
+        session.stop_reporter()
+    print(f"Requests: {session.format_metrics()}")
+    if cache is not None:
+        print(cache.report())
+
 
-print(f"Total rows: {total_rows}")
-print(f"Unique products: {unique_products}")
-print(f"Average price: {average_price:.2f}")
+if __name__ == "__main__":
+    main()
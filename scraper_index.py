@@ -0,0 +1,125 @@
+"""
+Persistent product index for incremental scraper_etl.py runs.
+
+SQLite keeps one row per product (keyed by its detail-page URL, since titles
+are not unique) with a 64-bit content hash of Name + Price + Availability,
+plus a price_history table. Each run only writes products that are new or
+whose hash changed, so write volume follows catalogue churn instead of
+catalogue size. Lookups only touch the keys of the batch being applied.
+
+An index describes what one output file already holds, so by default it sits
+next to that file (index_path_for).
+"""
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+
+HASH_COLUMNS = ["Name", "Price", "Availability"]
+KEY_COLUMN = "Href"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    content_hash INTEGER NOT NULL,
+    price REAL,
+    availability TEXT,
+    first_seen TEXT NOT NULL,
+    last_changed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS price_history (
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL,
+    availability TEXT,
+    scraped_at TEXT NOT NULL
+);
+"""
+
+
+def index_path_for(output):
+    """Default index for an output CSV: scraped_data.csv -> scraped_data.index.sqlite."""
+    return f"{os.path.splitext(output)[0]}.index.sqlite"
+
+
+def content_hashes(df):
+    """Stable signed 64-bit hash per row (pandas' hash uses a fixed key, so it survives restarts)."""
+    return pd.util.hash_pandas_object(df[HASH_COLUMNS], index=False).to_numpy().view("int64")
+
+
+class ProductIndex:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.conn.executescript(
+            "CREATE INDEX IF NOT EXISTS idx_price_history_url ON price_history (url);"
+            "CREATE TEMP TABLE IF NOT EXISTS batch_keys (url TEXT PRIMARY KEY);"
+        )
+
+    def _known_hashes(self, keys):
+        """Stored hashes for this batch's keys only, via a temp-table join."""
+        with self.conn:
+            self.conn.execute("DELETE FROM batch_keys")
+            self.conn.executemany("INSERT OR IGNORE INTO batch_keys (url) VALUES (?)", ((k,) for k in keys))
+        known = pd.read_sql_query(
+            f"SELECT p.url AS {KEY_COLUMN}, p.content_hash AS known_hash "
+            "FROM products p JOIN batch_keys b ON b.url = p.url",
+            self.conn,
+        )
+        # Int64 keeps the 64-bit hashes exact through the left merge (float64 would round them)
+        known["known_hash"] = known["known_hash"].astype("Int64")
+        return known
+
+    def apply(self, df):
+        """
+        Compare the cleaned scrape (which must carry the Href key) with the index,
+        record new/changed products and return only those rows (with a Status
+        column: 'new' or 'changed').
+        """
+        columns = list(df.columns)
+        df = df.drop_duplicates(subset=KEY_COLUMN, keep="last")
+        df = df.assign(content_hash=pd.array(content_hashes(df), dtype="Int64"))
+        merged = df.merge(self._known_hashes(df[KEY_COLUMN]), on=KEY_COLUMN, how="left")
+        is_new = merged["known_hash"].isna()
+        is_changed = (merged["content_hash"] != merged["known_hash"]).fillna(False) & ~is_new
+        delta = merged[is_new | is_changed].copy()
+        delta["Status"] = "changed"
+        delta.loc[is_new[delta.index], "Status"] = "new"
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = list(delta[[KEY_COLUMN, "Name", "content_hash", "Price", "Availability"]].itertuples(index=False, name=None))
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO products (url, name, content_hash, price, availability, first_seen, last_changed)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    name = excluded.name,
+                    content_hash = excluded.content_hash,
+                    price = excluded.price,
+                    availability = excluded.availability,
+                    last_changed = excluded.last_changed
+                """,
+                [(url, name, int(h), float(price), availability, now, now)
+                 for url, name, h, price, availability in rows],
+            )
+            self.conn.executemany(
+                "INSERT INTO price_history (url, name, price, availability, scraped_at) VALUES (?, ?, ?, ?, ?)",
+                [(url, name, float(price), availability, now) for url, name, _, price, availability in rows],
+            )
+        self.last_run = {
+            "new": int(is_new.sum()),
+            "changed": int(is_changed.sum()),
+            "unchanged": len(df) - len(delta),
+        }
+        return delta[columns + ["Status"]]
+
+    def reset(self):
+        """Forget every known product (the price history is kept); returns how many were dropped."""
+        with self.conn:
+            return self.conn.execute("DELETE FROM products").rowcount
+
+    def close(self):
+        self.conn.close()
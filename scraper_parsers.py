@@ -0,0 +1,128 @@
+"""
+HTML parsing backends for scraper_etl.py.
+
+Both backends turn a listing page into the same ListingPage tuple, and a
+book detail page into the same dict (UPC, Stock, Category, Description):
+- SoupParser: BeautifulSoup with the pure-Python "html.parser" (always available).
+- LxmlParser: lxml with XPath expressions compiled once at import time (C speed).
+
+get_parser("auto") picks lxml when it is installed and falls back to BeautifulSoup otherwise.
+"""
+import re
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # lxml is optional
+    lxml = None
+
+ListingPage = namedtuple("ListingPage", ["products", "next_href", "page_label", "category_hrefs"])
+
+
+def _record(name, price, availability, href):
+    return {"Name": name.strip(), "Price": price.strip(), "Availability": availability.strip(), "Href": href}
+
+
+def _detail(upc, availability, category, description):
+    # "In stock (14 available)" -> 14
+    stock = re.search(r"(\d+)\s+available", availability)
+    return {
+        "UPC": upc.strip(),
+        "Stock": int(stock.group(1)) if stock else 0,
+        "Category": category.strip(),
+        "Description": description.strip(),
+    }
+
+
+class SoupParser:
+    name = "html.parser"
+
+    def parse_listing(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        # NOTE: Adjust selectors depending on target website
+        products = [
+            _record(
+                product.h3.a.get("title"),
+                product.select_one("p.price_color").text,
+                product.select_one("p.availability").text,
+                product.h3.a.get("href"),
+            )
+            for product in soup.select("article.product_pod")
+        ]
+        next_link = soup.select_one("li.next a")
+        current = soup.select_one("li.current")
+        return ListingPage(
+            products=products,
+            next_href=next_link["href"] if next_link is not None else None,
+            page_label=current.text if current is not None else "",
+            category_hrefs=[a["href"] for a in soup.select("div.side_categories ul li ul li a")],
+        )
+
+    def parse_detail(self, html):
+        soup = BeautifulSoup(html, "html.parser")
+        upc = soup.find("th", string="UPC")
+        availability = soup.select_one("div.product_main p.availability")
+        crumbs = soup.select("ul.breadcrumb li a")
+        description = soup.select_one("#product_description + p")
+        return _detail(
+            upc.find_next_sibling("td").text if upc is not None else "",
+            availability.text if availability is not None else "",
+            crumbs[-1].text if crumbs else "",
+            description.text if description is not None else "",
+        )
+
+
+def _has_class(name):
+    # XPath equivalent of the CSS ".name" class selector
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+if lxml is not None:
+    _PRODUCTS = etree.XPath(f"//article[{_has_class('product_pod')}]")
+    _NAME = etree.XPath("string((.//h3/a/@title)[1])")
+    _PRICE = etree.XPath(f"string((.//p[{_has_class('price_color')}])[1])")
+    _AVAILABILITY = etree.XPath(f"string((.//p[{_has_class('availability')}])[1])")
+    _NEXT = etree.XPath(f"(//li[{_has_class('next')}]//a/@href)[1]")
+    _CURRENT = etree.XPath(f"string((//li[{_has_class('current')}])[1])")
+    _CATEGORIES = etree.XPath(f"//div[{_has_class('side_categories')}]//ul//li//ul//li//a/@href")
+    _HREF = etree.XPath("string((.//h3/a/@href)[1])")
+    _UPC = etree.XPath("string((//table//tr[th='UPC']/td)[1])")
+    _STOCK = etree.XPath(f"string((//div[{_has_class('product_main')}]//p[{_has_class('availability')}])[1])")
+    _CATEGORY = etree.XPath(f"string((//ul[{_has_class('breadcrumb')}]//li/a)[last()])")
+    _DESCRIPTION = etree.XPath("string((//div[@id='product_description']/following-sibling::p)[1])")
+
+
+class LxmlParser:
+    name = "lxml"
+
+    def parse_listing(self, html):
+        root = lxml.html.document_fromstring(html)
+        products = [
+            _record(_NAME(product), _PRICE(product), _AVAILABILITY(product), str(_HREF(product)))
+            for product in _PRODUCTS(root)
+        ]
+        next_href = _NEXT(root)
+        return ListingPage(
+            products=products,
+            next_href=str(next_href[0]) if next_href else None,
+            page_label=str(_CURRENT(root)),
+            category_hrefs=[str(href) for href in _CATEGORIES(root)],
+        )
+
+    def parse_detail(self, html):
+        root = lxml.html.document_fromstring(html)
+        return _detail(str(_UPC(root)), str(_STOCK(root)), str(_CATEGORY(root)), str(_DESCRIPTION(root)))
+
+
+PARSERS = {"html.parser": SoupParser, "lxml": LxmlParser}
+
+
+def get_parser(name="auto"):
+    if name == "auto":
+        name = "lxml" if lxml is not None else "html.parser"
+    if name == "lxml" and lxml is None:
+        raise ImportError("The lxml backend needs the 'lxml' package (pip install lxml)")
+    return PARSERS[name]()
@@ -0,0 +1,121 @@
+import functools
+import os
+import shutil
+import sys
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# the tests import the top-level scripts (scraper_etl.py, request_scheduler.py, ...)
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+BOOKS_SITE = ROOT / "fixtures" / "books_site"
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for a rate-limited site: more than `server.limit` concurrent
+    requests get 429 + Retry-After, the rest a small page after `server.delay`.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            throttled = server.active > server.limit
+            if throttled:
+                server.throttled += 1
+        try:
+            if throttled:
+                self.send_response(429)
+                self.send_header("Retry-After", server.retry_after)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            threading.Event().wait(server.delay)
+            body = b"<html><body>ok</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with server.lock:
+                server.served += 1
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def throttling_server():
+    """Local server allowing 2 concurrent requests; returns it (base URL in .url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingHandler)
+    server.lock = threading.Lock()
+    server.limit, server.delay, server.retry_after = 2, 0.05, "0.1"
+    server.active = server.throttled = server.served = 0
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FixtureSiteHandler(SimpleHTTPRequestHandler):
+    """
+    Serves a copy of fixtures/books_site and records (path, status) of every
+    request in server.log. Conditional requests are honoured: Last-Modified /
+    If-Modified-Since (built in) and, unless server.etags is False, an ETag
+    from the file's mtime and size with If-None-Match.
+    """
+
+    def send_head(self):
+        self.etag = None
+        path = self.translate_path(self.path)
+        if self.server.etags and os.path.isfile(path):
+            stat = os.stat(path)
+            self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self.headers.get("If-None-Match") == self.etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def end_headers(self):
+        if getattr(self, "etag", None):
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+    def log_request(self, code="-", size="-"):
+        with self.server.lock:
+            self.server.log.append((self.path, int(code)))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def books_site(tmp_path):
+    """
+    Local copy of the fixture catalogue over HTTP (tests may edit the files in
+    .root); returns the server, base URL in .url.
+    """
+    root = tmp_path / "books_site"
+    shutil.copytree(BOOKS_SITE, root)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FixtureSiteHandler, directory=str(root)))
+    server.root = root
+    server.etags = True
+    server.lock = threading.Lock()
+    server.log = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from request_scheduler import RequestScheduler, retry_after_seconds
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("3", 3.0), ("0.5", 0.5), ("-1", 0.0), ("inf", None), ("nan", None), ("-inf", None),
+    ("soon", None), ("", None), (None, None),
+])
+def test_retry_after_seconds(value, expected):
+    assert retry_after_seconds(value) == expected
+
+
+def test_retry_after_http_date():
+    assert 5 < retry_after_seconds(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+def test_backs_off_under_throttling(throttling_server):
+    scheduler = RequestScheduler(requests.Session(), rate=None, max_concurrency=8, max_retries=10)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(lambda i: scheduler.get(f"{throttling_server.url}/{i}"), range(24)))
+
+    assert [r.status_code for r in responses] == [200] * 24
+    assert throttling_server.served == 24
+    assert throttling_server.throttled > 0
+    # AIMD halved the limit from its starting point (4) on the 429s
+    host = throttling_server.url.split("//")[1]
+    assert scheduler.metrics()["concurrency_limits"][host] < 4
+
+
+def test_honours_retry_after(throttling_server):
+    throttling_server.limit = 0  # every request is throttled
+    throttling_server.retry_after = "0.3"
+    scheduler = RequestScheduler(requests.Session(), rate=None, max_retries=1)
+    start = time.monotonic()
+    response = scheduler.get(f"{throttling_server.url}/page")
+    # out of retries: the last 429 comes back, after waiting out the first Retry-After
+    assert response.status_code == 429
+    assert time.monotonic() - start >= 0.3
+    assert throttling_server.throttled == 2
+
+
+def test_token_bucket_caps_rate(throttling_server):
+    throttling_server.limit, throttling_server.delay = 100, 0
+    scheduler = RequestScheduler(requests.Session(), rate=20.0, burst=1)
+    start = time.monotonic()
+    for i in range(6):
+        scheduler.get(f"{throttling_server.url}/{i}")
+    # one token up front, then one every 1/20 s
+    assert time.monotonic() - start >= 5 / 20
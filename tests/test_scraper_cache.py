@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+import pytest
+
+from scraper_cache import ResponseCache
+from scraper_etl import crawl, make_session
+from scraper_parsers import get_parser
+
+
+def detail_pages(site, n=None):
+    """(path on the server, size in bytes) of the fixture's book detail pages."""
+    paths = sorted(site.root.glob("catalogue/*/index.html"))[:n]
+    return [("/" + p.relative_to(site.root).as_posix(), p.stat().st_size) for p in paths]
+
+
+def disk_bytes(cache):
+    return sum(p.stat().st_size for p in cache.cache_dir.glob("*.body"))
+
+
+@pytest.mark.parametrize("etags", [True, False], ids=["etag", "last-modified"])
+def test_revalidates_with_304(books_site, tmp_path, etags):
+    books_site.etags = etags
+    cache = ResponseCache(tmp_path / "cache")
+    session = make_session()
+    url = f"{books_site.url}/index.html"
+
+    first = cache.fetch(url, session)
+    second = cache.fetch(url, session)
+
+    assert second == first
+    assert books_site.log == [("/index.html", 200), ("/index.html", 304)]
+    assert cache.stats["misses"] == 1 and cache.stats["revalidated"] == 1
+    assert cache.stats["bytes_saved"] == len(first.encode("utf-8"))
+    assert cache.stats["bytes_downloaded"] == (books_site.root / "index.html").stat().st_size
+
+
+def test_changed_page_is_downloaded_again(books_site, tmp_path):
+    cache = ResponseCache(tmp_path / "cache")
+    session = make_session()
+    url = f"{books_site.url}/index.html"
+    cache.fetch(url, session)
+
+    page = books_site.root / "index.html"
+    page.write_text(page.read_text(encoding="utf-8").replace("£", "EUR "), encoding="utf-8")
+    os.utime(page, (time.time() + 5, time.time() + 5))
+
+    assert "EUR " in cache.fetch(url, session)
+    assert [status for _, status in books_site.log] == [200, 200]
+    assert cache.stats["misses"] == 2
+
+
+def test_ttl_serves_fresh_entries_without_a_request(books_site, tmp_path):
+    cache = ResponseCache(tmp_path / "cache", ttl=3600)
+    session = make_session()
+    url = f"{books_site.url}/index.html"
+
+    assert cache.fetch(url, session) == cache.fetch(url, session)
+    assert books_site.log == [("/index.html", 200)]
+    assert cache.stats["fresh"] == 1
+
+
+def test_lru_eviction_keeps_recently_used_entries(books_site, tmp_path):
+    session = make_session()
+    a, b, c, d = (f"{books_site.url}{path}" for path, _ in detail_pages(books_site, 4))
+    # sized as stored (the decoded text re-encoded): room for a, c and d, not for b too
+    size = {url: len(session.get(url).text.encode("utf-8")) for url in (a, b, c, d)}
+    cache = ResponseCache(tmp_path / "cache", max_mb=(size[a] + size[c] + size[d] + 0.5) / 1024 ** 2)
+
+    for url in (a, b, c, a, d):  # the 304 hit on a marks it as recently used
+        cache.fetch(url, session)
+        time.sleep(0.01)
+
+    assert not cache._paths(b)[1].exists()
+    assert all(cache._paths(url)[1].exists() for url in (a, c, d))
+    assert disk_bytes(cache) <= cache.max_bytes
+    assert cache._total_bytes == disk_bytes(cache)
+
+
+def test_concurrent_fetches_keep_size_accounting(books_site, tmp_path):
+    pages = detail_pages(books_site)
+    # a few pages fit, so the threads evict each other's entries all the time
+    cache = ResponseCache(tmp_path / "cache", max_mb=5 * pages[0][1] / 1024 ** 2)
+    session = make_session(8)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(2 * len(pages)):
+                path, _ = pages[(offset + i) % len(pages)]
+                cache.fetch(f"{books_site.url}{path}", session)
+        except Exception as e:  # noqa: BLE001 - any failure fails the test
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(7 * n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache._total_bytes == disk_bytes(cache)
+    assert disk_bytes(cache) <= cache.max_bytes
+
+
+def test_second_crawl_is_all_revalidated(books_site, tmp_path):
+    cache = ResponseCache(tmp_path / "cache")
+    session = make_session()
+    parser = get_parser()
+    first = crawl(f"{books_site.url}/index.html", session, parser, cache=cache)
+    first = sorted(first, key=lambda r: r["Href"])
+    second = crawl(f"{books_site.url}/index.html", session, parser, cache=cache)
+
+    assert sorted(second, key=lambda r: r["Href"]) == first
+    assert sorted(status for _, status in books_site.log) == [200] * 3 + [304] * 3
+    assert cache.report().startswith("HTTP cache: 3/6 hits (50%; 0 fresh, 3 revalidated by 304)")
@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from scraper_etl import crawl, fetch_details, listing_links, make_session, unique_links
+from scraper_parsers import PARSERS, get_parser
+
+LISTING_PAGES = {"/index.html", "/catalogue/page-2.html", "/catalogue/page-3.html"}
+CATEGORY_PAGES = {
+    "/catalogue/category/books/travel_2/index.html",
+    "/catalogue/category/books/travel_2/page-2.html",
+    "/catalogue/category/books/mystery_3/index.html",
+    "/catalogue/category/books/poetry_23/index.html",
+}
+DETAIL_URL = re.compile(r"^http://127\.0\.0\.1:\d+/catalogue/[\w-]+_\d+/index\.html$")
+
+
+@pytest.fixture(params=list(PARSERS))
+def parser(request):
+    return get_parser(request.param)
+
+
+def test_listing_links_enqueue_the_whole_pagination(books_site, parser):
+    page = parser.parse_listing((books_site.root / "index.html").read_text(encoding="utf-8"))
+    links = listing_links(page, f"{books_site.url}/index.html")
+    assert links == [f"{books_site.url}/catalogue/page-2.html", f"{books_site.url}/catalogue/page-3.html"]
+
+
+def test_crawl_follows_pagination(books_site, parser):
+    records = list(crawl(f"{books_site.url}/index.html", make_session(), parser, max_workers=4))
+
+    assert len(records) == 60
+    assert len({r["Href"] for r in records}) == 60
+    assert all(DETAIL_URL.match(r["Href"]) for r in records)
+    assert {path for path, _ in books_site.log} == LISTING_PAGES
+
+
+def test_crawl_follows_categories(books_site, parser):
+    records = list(crawl(f"{books_site.url}/index.html", make_session(), parser, max_workers=4, follow_categories=True))
+
+    # every book once from the main listing, plus 45 from the three categories
+    assert len(records) == 105
+    assert len(list(unique_links(records))) == 60
+    fetched = [path for path, _ in books_site.log]
+    assert set(fetched) == LISTING_PAGES | CATEGORY_PAGES
+    assert len(fetched) == len(set(fetched))  # each page once, although every page links the categories
+
+
+def test_fetch_details_enriches_every_book(books_site, parser):
+    session = make_session()
+    records = unique_links(crawl(f"{books_site.url}/index.html", session, parser, max_workers=4))
+    details = list(fetch_details(records, session, parser, max_workers=4, parse_workers=2))
+
+    assert len(details) == 60
+    assert all(re.fullmatch(r"[0-9a-f]{16}", d["UPC"]) for d in details)
+    assert all(d["Stock"] > 0 for d in details)
+    assert {d["Category"] for d in details} == {"Travel", "Mystery", "Poetry", "Default"}
+